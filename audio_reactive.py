@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+🎧 Color Symphony Audio-Reactive Mode
+Lights the LED and the buzzer from a WAV file. The file is memory-mapped
+and cut into fixed-size blocks; a producer thread runs a windowed FFT on
+each block a few blocks ahead of the output, and the main thread plays
+the results at the block's own time in the file: bass, mid and treble
+energy as red, green and blue, and the dominant pitch as the nearest
+note of the show's note table. On the OLED show a spectrum and level
+meter runs alongside at the framebuffer frame rate.
+
+    python3 audio_reactive.py song.wav --simulate
+    python3 audio_reactive.py song.wav --analyze    # analysis headroom only
+"""
+
+import argparse
+import struct
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from producer import Producer
+from scheduler import JitterStats, percentile
+
+# Samples per FFT block: 2048 at 44.1 kHz is 46 ms, about 22 updates a second
+BLOCK = 2048
+
+# Analyzed blocks allowed to wait for the output
+AHEAD = 8
+
+# Frequency bands (Hz) for red, green and blue
+BANDS = ((20, 250), (250, 2000), (2000, 8000))
+
+# Where the dominant pitch is looked for (Hz)
+PITCH_RANGE = (80, 2000)
+
+# Blocks quieter than this RMS (full scale 1.0) are dark and silent
+SILENCE = 0.01
+
+# Per-block decay of the running peak energy, the automatic gain
+PEAK_DECAY = 0.995
+
+# Spectrum screen: bars from 60 Hz to 8 kHz, the range shown in dB, and
+# how fast bars and peak markers fall (full heights per second)
+METER_BARS = 32
+METER_RANGE = (60, 8000)
+METER_DB = 60
+METER_FALL = 1.5
+PEAK_HOLD = 0.5
+
+# Analysis times kept for the summary
+TIMING_SAMPLES = 1000
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Frame: block number, RGB levels, note name (None when silent), its
+# frequency, spectrum bar heights and overall level (both 0-1)
+Frame = namedtuple('Frame', 'index color note frequency spectrum level')
+
+
+class WavFile:
+    """A PCM or float WAV file memory-mapped as a frames x channels array"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave != b'WAVE':
+                raise ValueError(f"{path}: not a WAV file")
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{path}: no audio data")
+                chunk, size = struct.unpack('<4sI', header)
+                if chunk == b'fmt ':
+                    fmt = f.read(size)
+                elif chunk == b'data':
+                    offset = f.tell()
+                    break
+                else:
+                    f.seek(size, 1)
+                # Chunks are padded to an even length
+                if size % 2:
+                    f.seek(1, 1)
+        if fmt is None:
+            raise ValueError(f"{path}: no format chunk")
+
+        tag, self.channels, self.rate, _, _, bits = struct.unpack_from('<HHIIHH', fmt)
+        if tag == WAVE_FORMAT_EXTENSIBLE:
+            tag, = struct.unpack_from('<H', fmt, 24)
+        if tag == WAVE_FORMAT_PCM and bits in (8, 16, 32):
+            dtype = {8: np.uint8, 16: np.int16, 32: np.int32}[bits]
+        elif tag == WAVE_FORMAT_FLOAT and bits == 32:
+            dtype = np.float32
+        else:
+            raise ValueError(f"{path}: {bits}-bit format {tag} is not supported, "
+                             "use 8, 16 or 32-bit PCM or 32-bit float")
+
+        self.frames = min(size, _file_size(path) - offset) // (bits // 8 * self.channels)
+        self.samples = np.memmap(path, dtype=np.dtype(dtype).newbyteorder('<'), mode='r',
+                                 offset=offset, shape=(self.frames, self.channels))
+        if dtype == np.uint8:
+            self.center, self.scale = 128.0, 1 / 128
+        elif dtype == np.float32:
+            self.center, self.scale = 0.0, 1.0
+        else:
+            self.center, self.scale = 0.0, 1 / float(np.iinfo(dtype).max + 1)
+
+    @property
+    def duration(self):
+        return self.frames / self.rate
+
+    def blocks(self, size):
+        """(index, mono float32 samples) per block; only the block is read in
+
+        The last block is padded with silence.
+        """
+        for index, first in enumerate(range(0, self.frames, size)):
+            chunk = self.samples[first:first + size]
+            mono = chunk.mean(axis=1, dtype=np.float32)
+            if self.center:
+                mono -= self.center
+            mono *= self.scale
+            if len(mono) < size:
+                mono = np.pad(mono, (0, size - len(mono)))
+            yield index, mono
+
+
+def _file_size(path):
+    with open(path, 'rb') as f:
+        return f.seek(0, 2)
+
+
+class Analyzer:
+    """Windowed FFT of one block into band levels and the nearest note
+
+    The note table usually spans one octave, so a pitch outside it is
+    folded into that octave first: a bass line still picks its note name.
+    """
+
+    def __init__(self, rate, block, notes, bands=BANDS, pitch_range=PITCH_RANGE, bars=METER_BARS):
+        self.rate = rate
+        self.block = block
+        self.window = np.hanning(block).astype(np.float32)
+        freqs = np.fft.rfftfreq(block, 1 / rate)
+
+        # One row per band, so every band energy is a single matrix product
+        self.bands = np.array([(freqs >= low) & (freqs < high) for low, high in bands],
+                              dtype=np.float32)
+        self.pitch_bins = np.flatnonzero((freqs >= pitch_range[0]) & (freqs <= pitch_range[1]))
+        self.peak = 1e-9
+
+        # Log-spaced spectrum bars; each gets at least its nearest bin
+        edges = np.geomspace(*METER_RANGE, bars + 1)
+        self.meter = np.array([(freqs >= low) & (freqs < high) for low, high in zip(edges, edges[1:])],
+                              dtype=np.float32)
+        empty = self.meter.sum(axis=1) == 0
+        self.meter[empty, np.searchsorted(freqs, edges[:-1][empty]).clip(max=len(freqs) - 1)] = 1
+        self.meter /= self.meter.sum(axis=1, keepdims=True)
+        self.silent = np.zeros(bars)
+        self.bar_peak = 1e-9
+
+        self.names = list(notes)
+        self.frequencies = np.array([notes[name] for name in self.names], dtype=float)
+        self.octave = np.log2(self.frequencies)
+        self.low, self.high = self.octave.min(), self.octave.max()
+
+    def analyze(self, index, samples):
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        level = decibel_level(rms * rms)
+        if rms < SILENCE:
+            return Frame(index, (0.0, 0.0, 0.0), None, 0, self.silent, level)
+
+        spectrum = np.abs(np.fft.rfft(samples * self.window))
+        power = spectrum * spectrum
+        energy = self.bands @ power
+        # One gain for all bands keeps their balance; square root so
+        # quieter bands still show
+        self.peak = max(float(energy.max()), self.peak * PEAK_DECAY)
+        levels = np.sqrt(energy / self.peak)
+
+        # Mean power per bar in dB below the loudest bar lately
+        bars = self.meter @ power
+        self.bar_peak = max(float(bars.max()), self.bar_peak * PEAK_DECAY)
+        bars = decibel_level(bars / self.bar_peak)
+
+        note = self.nearest(self.pitch(spectrum))
+        return Frame(index, tuple(float(level) for level in levels),
+                     self.names[note], int(self.frequencies[note]), bars, level)
+
+    def pitch(self, spectrum):
+        """Frequency of the strongest bin, refined between its neighbours"""
+        bins = self.pitch_bins
+        k = bins[np.argmax(spectrum[bins])]
+        if 0 < k < len(spectrum) - 1:
+            a, b, c = np.log(spectrum[k - 1:k + 2] + 1e-12)
+            denominator = a - 2 * b + c
+            if denominator:
+                k = k + 0.5 * (a - c) / denominator
+        return k * self.rate / self.block
+
+    def nearest(self, frequency):
+        """Index of the note closest to frequency by ratio, in any octave"""
+        position = np.log2(frequency)
+        # Half a semitone of slack around the table before folding
+        if not self.low - 1 / 24 <= position <= self.high + 1 / 24:
+            position = self.low + (position - self.low) % 1.0
+        return int(np.argmin(np.abs(self.octave - position)))
+
+
+def decibel_level(power):
+    """Power (1.0 full scale) as a 0-1 height over the METER_DB range"""
+    decibels = 10 * np.log10(np.maximum(power, 1e-12))
+    return np.clip(1 + decibels / METER_DB, 0.0, 1.0)
+
+
+class LevelMeter:
+    """Spectrum bars with falling peak markers and a level meter
+
+    Blocks arrive about 20 times a second; in between the bars fall, so
+    the screen has something new for every frame at the higher rate.
+    """
+
+    def __init__(self, show, bars=METER_BARS):
+        self.show = show
+        self.heights = np.zeros(bars)
+        self.peaks = np.zeros(bars)
+        self.peak_at = np.zeros(bars)
+        self.at = 0.0
+        self.level = 0.0
+        self.note = None
+        self.next_frame = None
+
+    def fallen(self, now):
+        return np.maximum(self.heights - METER_FALL * (now - self.at), 0.0)
+
+    def peak_levels(self, now):
+        held = np.maximum(now - self.peak_at - PEAK_HOLD, 0.0)
+        return np.maximum(self.peaks - METER_FALL * held, 0.0)
+
+    def update(self, frame, now):
+        heights = np.maximum(self.fallen(now), frame.spectrum)
+        rising = heights >= self.peak_levels(now)
+        self.peaks = np.where(rising, heights, self.peak_levels(now))
+        self.peak_at = np.where(rising, now, np.maximum(self.peak_at, now - PEAK_HOLD))
+        self.heights, self.at = heights, now
+        self.level = float(frame.level)
+        self.note = frame.note
+
+    def run_until(self, deadline, scheduler):
+        """Draw frames at the framebuffer rate until deadline; False when pressed"""
+        from render_worker import FRAME_RATE
+
+        clock = self.show.clock
+        if self.next_frame is None or self.next_frame < clock.now() - 1 / FRAME_RATE:
+            self.next_frame = clock.now()
+        while self.next_frame < deadline:
+            if not scheduler.wait_until(self.next_frame, cancel=self.show.wake, spin=0):
+                return False
+            self.draw(self.next_frame)
+            self.next_frame += 1 / FRAME_RATE
+        return True
+
+    def draw(self, now):
+        """Submit one frame; the state is copied so the worker paints a snapshot"""
+        heights, peaks, level = self.fallen(now), self.peak_levels(now), self.level
+        note = None
+        if self.note is not None:
+            note = self.show.frames.get(('meter_note', self.note), lambda: self.render_note(self.note))
+
+        def paint(buffer):
+            buffer.clear()
+            buffer.bars(0, heights, width=3, gap=1, bottom=47)
+            buffer.bars(0, peaks, width=3, gap=1, bottom=47, thickness=1)
+            buffer.meter(0, 52, 95, 61, level)
+            if note is not None:
+                buffer.paste_pages(note, 100, 50, mode='or')
+        self.show.renderer.submit(paint, pages=True)
+
+    def render_note(self, name):
+        from PIL import Image
+        image = Image.new(self.show.oled.mode, (28, 14))
+        self.show.text.draw(image, (0, 0), name.replace('_HIGH', "'"), self.show.font)
+        return image
+
+
+class AnalysisPipeline(Producer):
+    """Analyzes blocks on a producer thread, at most ahead blocks ahead
+
+    The queue is bounded and the file is memory-mapped, so memory stays
+    the same however long the file is.
+    """
+
+    def __init__(self, wav, analyzer, block=BLOCK, ahead=AHEAD):
+        super().__init__('audio-analysis', ahead)
+        self.wav = wav
+        self.analyzer = analyzer
+        self.block = block
+
+        # Timing, kept in constant memory too
+        self.times = deque(maxlen=TIMING_SAMPLES)
+        self.analyzed = 0
+        self.slowest = 0.0
+
+    def produce(self):
+        for index, samples in self.wav.blocks(self.block):
+            started = time.perf_counter()
+            frame = self.analyzer.analyze(index, samples)
+            cost = time.perf_counter() - started
+            self.times.append(cost)
+            self.analyzed += 1
+            self.slowest = max(self.slowest, cost)
+            yield frame
+
+    def summary(self):
+        """Analysis time per block against the time one block lasts"""
+        values = sorted(self.times)
+        budget = self.block / self.wav.rate
+        p95 = percentile(values, 0.95)
+        return {
+            'blocks': self.analyzed,
+            'block_ms': budget * 1000,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': p95 * 1000,
+            'max_ms': self.slowest * 1000,
+            'headroom': budget / p95 if p95 else float('inf'),
+            'underruns': self.underruns,
+        }
+
+
+def analysis_report(summary):
+    return (f"{summary['blocks']} blocks of {summary['block_ms']:.1f} ms analyzed in "
+            f"p50 {summary['p50_ms']:.3f} ms, p95 {summary['p95_ms']:.3f} ms, "
+            f"max {summary['max_ms']:.3f} ms ({summary['headroom']:.0f}x headroom)"
+            + (f", {summary['underruns']} underruns" if 'underruns' in summary else ""))
+
+
+def play(show, path, block=BLOCK, ahead=AHEAD):
+    """Drive the show's LED and buzzer from a WAV file; a press stops it
+
+    Every block is shown at its own time in the file, measured from the
+    first block, so slow blocks are caught up on rather than drifting.
+    Returns the output lateness and the analysis summary.
+    """
+    wav = WavFile(path)
+    analyzer = Analyzer(wav.rate, block, show.notes)
+    pipeline = AnalysisPipeline(wav, analyzer, block, ahead).start()
+    scheduler = show.scheduler
+    stats = JitterStats()
+    seconds = block / wav.rate
+    # The OLED show gets the spectrum screen
+    meter = LevelMeter(show) if getattr(show, 'renderer', None) is not None else None
+    playing = None
+    start = None
+
+    print(f"\n🎧 {path}: {wav.duration:.1f} s, {wav.rate} Hz, {wav.channels} channel(s)")
+    try:
+        for frame in pipeline:
+            if start is None:
+                start = show.clock.now()
+            deadline = start + frame.index * seconds
+            if meter is not None and not meter.run_until(deadline, scheduler):
+                stats.cancelled = True
+                break
+            if not scheduler.wait_until(deadline, cancel=show.wake):
+                stats.cancelled = True
+                break
+            lateness = show.clock.now() - deadline
+            if lateness > scheduler.max_lateness:
+                stats.drop('block', lateness)
+                continue
+            if stats.first_fire is None:
+                stats.first_fire = show.clock.now()
+
+            show.set_color(*frame.color)
+            if meter is not None:
+                meter.update(frame, deadline)
+            if frame.frequency != playing:
+                if frame.frequency:
+                    show.start_tone(frame.frequency)
+                else:
+                    show.stop_tone()
+                playing = frame.frequency
+            stats.add('block', lateness)
+    finally:
+        pipeline.stop()
+        show.stop_tone()
+        show.set_color(0, 0, 0)
+
+    summary = pipeline.summary()
+    print(f"   ⏱️  Timing: {stats}")
+    print(f"   🔬 Analysis: {analysis_report(summary)}")
+    return stats, summary
+
+
+def analyze(path, notes, block=BLOCK):
+    """Analyze a whole file as fast as possible, for the headroom only"""
+    wav = WavFile(path)
+    pipeline = AnalysisPipeline(wav, Analyzer(wav.rate, block, notes), block).start()
+    for _ in pipeline:
+        pass
+    # Nothing waits on the output here, so running dry says nothing
+    summary = pipeline.summary()
+    del summary['underruns']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Light the Color Symphony from a WAV file")
+    parser.add_argument('wav', help="8, 16 or 32-bit PCM or 32-bit float WAV file")
+    parser.add_argument('--show', choices=['basic', 'oled'], default='basic')
+    parser.add_argument('--simulate', action='store_true',
+                        help="run without hardware on the simulated backend")
+    parser.add_argument('--block', type=int, default=BLOCK,
+                        help=f"samples per FFT block (default {BLOCK})")
+    parser.add_argument('--ahead', type=int, default=AHEAD,
+                        help=f"blocks analyzed ahead of the output (default {AHEAD})")
+    parser.add_argument('--analyze', action='store_true',
+                        help="only time the analysis of the whole file, without output")
+    args = parser.parse_args()
+
+    from pattern_store import PatternLibrary
+
+    if args.analyze:
+        print(f"🔬 {analysis_report(analyze(args.wav, PatternLibrary().notes, args.block))}")
+        return
+
+    from hal import SimBackend
+    if args.show == 'oled':
+        from color_symphony_oled import ColorSymphonyOLED as Show
+    else:
+        from color_symphony import ColorSymphony as Show
+
+    show = Show(SimBackend() if args.simulate else None, standby_after=None)
+    try:
+        play(show, args.wav, args.block, args.ahead)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        show.cleanup()
+
+
+if __name__ == "__main__":
+    main()
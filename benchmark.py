@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+📊 Color Symphony Benchmark
+Plays every pattern, the welcome sequence, transitions and idle animations
+headlessly on the simulated backend and writes timing, frame and bus
+numbers to a JSON file so runs can be compared across versions.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+from framebuffer import bus_time
+from hal import SimBackend, VirtualClock
+from scheduler import SystemClock, percentile
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+
+
+def make_clock(speed):
+    """Real clock at speed 1, stepped virtual clock at 0, scaled otherwise"""
+    if not speed >= 0:
+        raise ValueError(f"clock speed must be 0 or above, got {speed}")
+    if speed == 1:
+        return SystemClock()
+    return VirtualClock(None if speed == 0 else speed)
+
+
+def lateness_summary(values):
+    """Percentiles of lateness samples, in milliseconds"""
+    values = sorted(values)
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean_ms': sum(values) / len(values) * 1000,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p90_ms': percentile(values, 0.90) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': values[-1] * 1000,
+    }
+
+
+class Probe:
+    """Measures one benchmark segment of a show"""
+
+    def __init__(self, show, backend):
+        self.show = show
+        self.backend = backend
+        self.pwm_writes = 0
+        backend.listeners.append(self.count)
+
+    def count(self, entry):
+        if entry[1] in ('duty', 'frequency', 'start', 'stop'):
+            self.pwm_writes += 1
+
+    def snapshot(self):
+        renderer = getattr(self.show, 'renderer', None)
+        display = self.backend.display
+        return {
+            'clock': self.backend.clock.now(),
+            'wall': time.perf_counter(),
+            'cpu': time.process_time(),
+            'pwm_writes': self.pwm_writes,
+            'frames': renderer.rendered if renderer else 0,
+            'render_time': renderer.render_time if renderer else 0.0,
+            'dropped': renderer.dropped if renderer else 0,
+            'bus_bytes': display.bytes_written if display else 0,
+        }
+
+    def measure(self, action):
+        """Run action and return what it cost"""
+        before = self.snapshot()
+        result = action()
+        renderer = getattr(self.show, 'renderer', None)
+        if renderer is not None:
+            renderer.flush()
+        after = self.snapshot()
+
+        duration = after['clock'] - before['clock']
+        frames = after['frames'] - before['frames']
+        return result, {
+            'duration_s': duration,
+            'wall_s': after['wall'] - before['wall'],
+            'cpu_s': after['cpu'] - before['cpu'],
+            'pwm_writes': after['pwm_writes'] - before['pwm_writes'],
+            'frames': frames,
+            'frames_dropped': after['dropped'] - before['dropped'],
+            'fps': frames / duration if duration > 0 else 0.0,
+            'render_ms': (after['render_time'] - before['render_time']) / frames * 1000 if frames else 0.0,
+            'bus_bytes': after['bus_bytes'] - before['bus_bytes'],
+            # What each frame would keep a 400 kHz I2C bus busy for
+            'bus_ms': bus_time(after['bus_bytes'] - before['bus_bytes']) / frames * 1000 if frames else 0.0,
+            'bus_bytes_per_s': (after['bus_bytes'] - before['bus_bytes']) / duration if duration > 0 else 0.0,
+        }
+
+
+def bench_show(show, backend, patterns, idle_cycles):
+    """Benchmark every segment of one show"""
+    probe = Probe(show, backend)
+    segments = {}
+    onsets = []
+    events = []
+    cpu_start = time.process_time()
+
+    _, segments['welcome_sequence'] = probe.measure(show.welcome_sequence)
+
+    for index, pattern in enumerate(patterns):
+        show.pattern_index = index
+        stats, cost = probe.measure(lambda: show.play_pattern(pattern))
+        onsets.extend(late for kind, late in stats.samples if kind == 'tone_on')
+        events.extend(late for kind, late in stats.samples)
+        cost['jitter'] = lateness_summary(late for kind, late in stats.samples if kind == 'tone_on')
+        segments[f"pattern:{pattern['name']}"] = cost
+
+        if hasattr(show, 'display_transition'):
+            next_pattern = patterns[(index + 1) % len(patterns)]
+            _, segments[f"transition:{pattern['name']}"] = probe.measure(
+                lambda: show.display_transition(pattern['name'], next_pattern['name']))
+
+    def idle():
+        for _ in range(idle_cycles):
+            if hasattr(show, 'display_idle'):
+                show.display_idle()
+            show.idle_animation()
+
+    _, segments['idle_animation'] = probe.measure(idle)
+
+    caches = {}
+    for name in ('frames', 'text'):
+        cache = getattr(show, name, None)
+        if cache is not None:
+            caches[name] = cache.stats()
+
+    return {
+        'cpu_s': time.process_time() - cpu_start,
+        'caches': caches,
+        'note_onset_jitter': lateness_summary(onsets),
+        'event_jitter': lateness_summary(events),
+        'segments': segments,
+    }
+
+
+def bench_standby(show, backend, seconds):
+    """CPU use of idling versus standby, and how fast a press wakes the show
+
+    Runs on the real clock: both phases last seconds of wall time. On the
+    simulator this only counts the show's own Python threads, not the
+    GPIO library's PWM threads or the panel's own current.
+    """
+    def usage(phase):
+        wall, cpu, writes = time.monotonic(), time.process_time(), show.led.writes
+        phase()
+        wall = time.monotonic() - wall
+        return {
+            'duration_s': wall,
+            'cpu_per_s': (time.process_time() - cpu) / wall,
+            'led_writes_per_s': (show.led.writes - writes) / wall,
+        }
+
+    def idle():
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if hasattr(show, 'display_idle'):
+                show.display_idle()
+            show.idle_animation()
+
+    thread = threading.Thread(target=show.standby, name='standby', daemon=True)
+
+    def standby():
+        thread.start()
+        time.sleep(seconds)
+
+    results = {'idle': usage(idle), 'standby': usage(standby)}
+    backend.press()
+    thread.join()
+    show.next_gesture()
+    results['wake_ms'] = show.wake_latencies[-1] * 1000 if show.wake_latencies else None
+    return results
+
+
+def bench_generators(library, steps):
+    """Cost of generating one step of every generative pattern kind"""
+    import generative
+
+    results = {}
+    for kind in generative.GENERATORS:
+        source, _ = generative.make_steps(kind, library, seed=1)
+        results[kind] = generative.benchmark(source, library.notes, steps)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(speed=1.0, idle_cycles=2, shows=('basic', 'oled'), standby=None, steps=10000):
+    """Benchmark the selected shows and return the results"""
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'speed': speed,
+        'shows': {},
+    }
+    library = None
+
+    if 'basic' in shows:
+        import color_symphony
+        backend = SimBackend(make_clock(speed), maxlen=0)
+        show = color_symphony.ColorSymphony(backend)
+        results['shows']['basic'] = bench_show(show, backend, show.patterns, idle_cycles)
+        library = show.library
+        show.cleanup()
+        if standby:
+            backend = SimBackend(SystemClock(), maxlen=0)
+            show = color_symphony.ColorSymphony(backend)
+            results['shows']['basic']['standby'] = bench_standby(show, backend, standby)
+            show.cleanup()
+
+    if 'oled' in shows:
+        import color_symphony_oled
+        backend = SimBackend(make_clock(speed), maxlen=0)
+        show = color_symphony_oled.ColorSymphonyOLED(backend)
+        results['shows']['oled'] = bench_show(show, backend, show.patterns, idle_cycles)
+        library = show.library
+        show.cleanup()
+        if standby:
+            backend = SimBackend(SystemClock(), maxlen=0)
+            show = color_symphony_oled.ColorSymphonyOLED(backend)
+            results['shows']['oled']['standby'] = bench_standby(show, backend, standby)
+            show.cleanup()
+
+    if steps and library is not None:
+        results['generators'] = bench_generators(library, steps)
+
+    return results
+
+
+def print_summary(results):
+    for kind, cost in results.get('generators', {}).items():
+        print(f"\n🎲 {kind}: {cost['steps']} steps, p50 {cost['p50_us']:.1f} µs, "
+              f"p99 {cost['p99_us']:.1f} µs, max {cost['max_us']:.1f} µs per step "
+              f"({cost['headroom']:.0f}x headroom on the shortest note)")
+    for name, show in results['shows'].items():
+        jitter = show['note_onset_jitter']
+        print(f"\n📊 {name}: {show['cpu_s']:.2f} s CPU")
+        if jitter['count']:
+            print(f"   Note onsets: p50 {jitter['p50_ms']:.2f} ms, p99 {jitter['p99_ms']:.2f} ms, "
+                  f"max {jitter['max_ms']:.2f} ms")
+        for segment, cost in show['segments'].items():
+            print(f"   {segment:32s} {cost['duration_s']:6.2f} s  {cost['cpu_s']:6.3f} s CPU  "
+                  f"{cost['fps']:5.1f} fps  {cost['render_ms']:5.2f} ms/frame  "
+                  f"{cost['bus_ms']:5.2f} ms bus/frame  {cost['bus_bytes_per_s']:8.0f} B/s")
+        standby = show.get('standby')
+        if standby:
+            print(f"   Idle: {standby['idle']['cpu_per_s'] * 100:.1f}% CPU, "
+                  f"{standby['idle']['led_writes_per_s']:.0f} LED writes/s; "
+                  f"standby: {standby['standby']['cpu_per_s'] * 100:.2f}% CPU, "
+                  f"{standby['standby']['led_writes_per_s']:.0f} LED writes/s; "
+                  f"wake in {standby['wake_ms'] or 0:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Color Symphony shows off-device")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"JSON results file (default: {DEFAULT_OUTPUT})")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="clock speed: 1 = real time, 0 = as fast as possible")
+    parser.add_argument('--idle-cycles', type=int, default=2,
+                        help="idle animation cycles to measure")
+    parser.add_argument('--show', choices=['basic', 'oled'], action='append',
+                        help="show to benchmark (default: both)")
+    parser.add_argument('--standby', type=float, metavar='SECONDS',
+                        help="also compare CPU use idling and in standby for SECONDS each, "
+                             "then time the wake-up")
+    parser.add_argument('--generator-steps', type=int, default=10000, metavar='N',
+                        help="generative pattern steps to time, 0 to skip")
+    args = parser.parse_args()
+    if not args.speed >= 0:
+        parser.error("--speed must be 0 (as fast as possible) or above")
+
+    results = run_benchmarks(args.speed, args.idle_cycles, tuple(args.show or ('basic', 'oled')),
+                             args.standby, args.generator_steps)
+    print_summary(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
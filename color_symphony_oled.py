@@ -4,319 +4,395 @@
 Interactive RGB LED + Buzzer + OLED show!
 """
 
-import RPi.GPIO as GPIO
-import time
-import random
-from luma.core.interface.serial import i2c
-from luma.oled.device import ssd1306
-from luma.core.render import canvas
-from PIL import ImageFont
+# Everything both shows share, starting the time-to-interactive clock
+from show_base import ShowBase, main
 
-# GPIO Pin Definitions
-RED_PIN = 17
-GREEN_PIN = 27
-BLUE_PIN = 22
-BUZZER_PIN = 18
-BUTTON_PIN = 23
+import math
+from PIL import Image, ImageDraw
+from fonts import FontLoader, FONT_PATH, BOLD_FONT_PATH
+from text_cache import TextRenderer
+from frame_cache import FrameCache
+from oled_delta import DeltaDisplay
+from render_worker import RenderWorker, FRAME_RATE
+from led_output import breath
 
 # OLED setup (128x64, I2C address 0x3C)
-serial = i2c(port=1, address=0x3C)
-oled = ssd1306(serial)
+OLED_PORT = 1
+OLED_ADDRESS = 0x3C
 
-# Musical note frequencies (Hz)
-NOTES = {
-    'C': 261, 'D': 294, 'E': 329, 'F': 349,
-    'G': 392, 'A': 440, 'B': 493, 'C_HIGH': 523
-}
+# Framebuffer animations: wipe and sparkle lengths in seconds, sparkles
+# per frame, and the size of the idle screen's note sprite
+WIPE_TIME = 0.4
+SPARKLE_TIME = 0.5
+SPARKLES = 5
+NOTE_SPRITE = (8, 14)
 
-# Color patterns with their musical notes
-COLOR_PATTERNS = [
-    {
-        'name': 'Sunrise',
-        'icon': '🌅',
-        'colors': [(1, 0, 0), (1, 0.3, 0), (1, 0.5, 0), (1, 0.7, 0), (1, 1, 0), (1, 1, 0.5), (1, 0.5, 0)],
-        'notes': ['C', 'D', 'E', 'F', 'G', 'A', 'G'],
-        'durations': [0.4, 0.3, 0.3, 0.3, 0.5, 0.4, 0.6]
-    },
-    {
-        'name': 'Ocean Wave',
-        'icon': '🌊',
-        'colors': [(0, 0, 1), (0, 0.3, 1), (0, 0.6, 1), (0, 1, 1), (0, 1, 0.6), (0, 1, 0.3), (0, 1, 0)],
-        'notes': ['E', 'F', 'G', 'A', 'B', 'A', 'G'],
-        'durations': [0.5, 0.3, 0.3, 0.4, 0.5, 0.3, 0.6]
-    },
-    {
-        'name': 'Cherry Blossom',
-        'icon': '🌸',
-        'colors': [(1, 0, 1), (1, 0, 0.7), (1, 0.2, 0.5), (1, 0.4, 0.4), (1, 0.5, 0.5), (1, 0.3, 0.6)],
-        'notes': ['A', 'B', 'C_HIGH', 'E', 'C_HIGH', 'A'],
-        'durations': [0.4, 0.3, 0.5, 0.4, 0.3, 0.7]
-    },
-    {
-        'name': 'Lightning',
-        'icon': '⚡',
-        'colors': [(1, 1, 1), (0, 0, 1), (1, 1, 1), (0.5, 0.5, 1), (1, 1, 1), (0, 0, 0.5), (1, 1, 1)],
-        'notes': ['C_HIGH', 'A', 'C_HIGH', 'G', 'C_HIGH', 'E', 'C_HIGH'],
-        'durations': [0.2, 0.2, 0.2, 0.3, 0.2, 0.3, 0.5]
-    },
-    {
-        'name': 'Fireworks',
-        'icon': '🎆',
-        'colors': [(1, 0, 0), (1, 0.5, 0), (0, 1, 0), (0, 0.5, 1), (0, 0, 1), (1, 0, 1), (1, 0, 0)],
-        'notes': ['C', 'E', 'G', 'C_HIGH', 'G', 'E', 'C'],
-        'durations': [0.3, 0.3, 0.3, 0.5, 0.3, 0.3, 0.6]
-    },
-    {
-        'name': 'Love for Boogie',
-        'icon': '💕',
-        'colors': [(1, 0.2, 0.3), (1, 0.4, 0.5), (1, 0.6, 0.6), (1, 0.8, 0.7), (1, 0.6, 0.8), (1, 0.4, 0.6)],
-        'notes': ['G', 'E', 'G', 'A', 'E', 'C'],
-        'durations': [0.6, 0.4, 0.6, 0.8, 0.6, 1.0]
-    }
-]
+# Longest standby waits for the frame on the bus before the panel goes off
+FLUSH_TIMEOUT = 0.5
 
-class ColorSymphonyOLED:
-    def __init__(self):
-        self.setup_gpio()
-        self.setup_oled()
-        self.pattern_index = 0
-        self.button_pressed = False
-        self.running = True
-        
-    def setup_gpio(self):
-        """Initialize all GPIO pins"""
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-        
-        # Setup LED pins
-        GPIO.setup(RED_PIN, GPIO.OUT)
-        GPIO.setup(GREEN_PIN, GPIO.OUT)
-        GPIO.setup(BLUE_PIN, GPIO.OUT)
-        
-        self.red_pwm = GPIO.PWM(RED_PIN, 1000)
-        self.green_pwm = GPIO.PWM(GREEN_PIN, 1000)
-        self.blue_pwm = GPIO.PWM(BLUE_PIN, 1000)
-        
-        self.red_pwm.start(0)
-        self.green_pwm.start(0)
-        self.blue_pwm.start(0)
-        
-        # Setup buzzer
-        GPIO.setup(BUZZER_PIN, GPIO.OUT)
-        self.buzzer_pwm = GPIO.PWM(BUZZER_PIN, 1000)
-        self.buzzer_pwm.start(0)
-        
-        # Setup button
-        GPIO.setup(BUTTON_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.add_event_detect(BUTTON_PIN, GPIO.FALLING, 
-                            callback=self.button_callback, 
-                            bouncetime=300)
+# The idle screen changes this many times a second; in between nothing
+# is sent, so an idle show keeps the bus and the CPU quiet
+IDLE_RATE = 2
+
+# Idle breathing, computed once: a one second breath peaking at the same
+# 10% duty cycle as always, in perceptually even steps 25 times a second
+BREATH = breath(1.0, 25, peak=0.35)
+
+class ColorSymphonyOLED(ShowBase):
+    DISPLAY = True
     
+    def setup_display(self):
+        """Initialize the OLED, its frame cache and the render worker"""
+        # Pre-rendered 1-bit frames for playback and idle screens,
+        # warmed in the background once the fonts are loaded
+        self.frames = FrameCache()
+        self.setup_oled()
+        
+        # Frames are drawn and sent by a worker so notes never wait on I2C
+        self.renderer = RenderWorker(self.oled, threaded=self.clock.realtime, metrics=self.metrics,
+                                     recorder=self.recorder)
+        self.sparkle_rng = None
+        self.timing = None
+        
+        # Idle screen last sent, and the renderer's frame count right after
+        self.idle_shown = None
+        
+    def handlers(self):
+        """Scheduler handlers, with the pattern screen for display events"""
+        return dict(super().handlers(), display=self.display_pattern_info)
+        
     def setup_oled(self):
         """Initialize OLED display"""
-        # Try to load fonts
-        try:
-            self.font = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', 12)
-            self.font_large = ImageFont.truetype('/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf', 16)
-        except:
-            self.font = ImageFont.load_default()
-            self.font_large = self.font
-            
-    def button_callback(self, channel):
-        """Handle button press events"""
-        self.button_pressed = True
-        
-    def set_color(self, r, g, b):
-        """Set RGB LED color (values 0-1)"""
-        self.red_pwm.ChangeDutyCycle(r * 100)
-        self.green_pwm.ChangeDutyCycle(g * 100)
-        self.blue_pwm.ChangeDutyCycle(b * 100)
-        
-    def play_tone(self, frequency, duration):
-        """Play a tone on the passive buzzer"""
-        if frequency > 0:
-            self.buzzer_pwm.ChangeFrequency(frequency)
-            self.buzzer_pwm.start(10)
-            time.sleep(duration)
-            self.buzzer_pwm.stop()
-        else:
-            time.sleep(duration)
+        # The device itself is only opened when the first frame goes out;
+        # only the regions that changed since the last frame go over the bus
+        self.oled = DeltaDisplay(self.backend.oled(port=OLED_PORT, address=OLED_ADDRESS))
+        
+        # Text is blitted from cached glyph and string bitmaps
+        self.text = TextRenderer()
+        
+        # Load fonts in the background; drawing waits for them if needed
+        self.fonts = FontLoader({
+            'font': (FONT_PATH, 12),
+            'font_large': (BOLD_FONT_PATH, 16),
+        }, then=self.warm_frames)
+        self.fonts.start()
+        
+    @property
+    def font(self):
+        return self.fonts.get('font')
+        
+    @property
+    def font_large(self):
+        return self.fonts.get('font_large')
             
+    def new_frame(self):
+        """Create a blank frame matching the OLED and a drawing context"""
+        image = Image.new(self.oled.mode, self.oled.size)
+        return image, ImageDraw.Draw(image)
+        
+    def show_frame(self, key, render):
+        """Hand a cached frame to the render worker, rendering it on first use"""
+        # Cached frames are packed already and go to the panel as they are
+        self.renderer.submit(lambda: self.frames.get(key, render), packed=True)
+        
+    def warm_frames(self):
+        """Pre-render the frames playback and idle will need"""
+        items = []
+        for index, pattern in enumerate(self.patterns):
+            for note_index in range(len(pattern['notes'])):
+                key = ('info', pattern['name'], note_index, index)
+                items.append((key, lambda p=pattern, n=note_index, i=index: self.render_pattern_info(p, n, i)))
+        for dot_count in range(3):
+            items.append((('idle', dot_count), lambda d=dot_count: self.render_idle(d)))
+        items.append((('note',), self.render_note))
+        self.frames.warm(items)
+        
+    def render_pattern_info(self, pattern, note_index, pattern_index):
+        """Render the pattern information screen"""
+        image, draw = self.new_frame()
+        
+        # Pattern name at top
+        self.text.draw(image, (10, 5), pattern['name'], self.font_large)
+        
+        # Progress bar
+        if note_index is not None:
+            progress = (note_index + 1) / len(pattern['notes'])
+            bar_width = int(100 * progress)
+            draw.rectangle((14, 30, 14 + bar_width, 35), fill="white")
+            draw.rectangle((14, 30, 114, 35), outline="white")
+        
+        # Current note
+        if note_index is not None and note_index < len(pattern['notes']):
+            note_text = f"Note: {pattern['notes'][note_index]}"
+            self.text.draw(image, (40, 45), note_text, self.font)
+        
+        # Pattern number
+        pattern_num = f"{pattern_index + 1}/{len(self.patterns)}"
+        self.text.draw(image, (90, 50), pattern_num, self.font)
+        return image
+        
     def display_pattern_info(self, pattern, note_index=None):
         """Update OLED with pattern information"""
-        with canvas(oled) as draw:
-            # Pattern name at top
-            draw.text((10, 5), pattern['name'], font=self.font_large, fill="white")
-            
-            # Progress bar
-            if note_index is not None:
-                progress = (note_index + 1) / len(pattern['notes'])
-                bar_width = int(100 * progress)
-                draw.rectangle((14, 30, 14 + bar_width, 35), fill="white")
-                draw.rectangle((14, 30, 114, 35), outline="white")
-            
-            # Current note
-            if note_index is not None and note_index < len(pattern['notes']):
-                note_text = f"Note: {pattern['notes'][note_index]}"
-                draw.text((40, 45), note_text, font=self.font, fill="white")
-            
-            # Pattern number
-            pattern_num = f"{self.pattern_index + 1}/{len(COLOR_PATTERNS)}"
-            draw.text((90, 50), pattern_num, font=self.font, fill="white")
+        index = self.pattern_index
+        key = ('info', pattern['name'], note_index, index)
+        self.show_frame(key, lambda: self.render_pattern_info(pattern, note_index, index))
+        
+    def render_idle(self, dot_count):
+        """Render the idle screen text for one step of the dots"""
+        image, draw = self.new_frame()
+        
+        # Title
+        self.text.draw(image, (15, 10), "Color Symphony", self.font_large)
+        
+        # Instructions
+        dots = "." * (dot_count + 1)
+        self.text.draw(image, (20, 35), "Press button", self.font)
+        self.text.draw(image, (25, 48), f"to start{dots}", self.font)
+        return image
+        
+    def render_note(self):
+        """Render the music note sprite the idle screen floats around"""
+        image = Image.new(self.oled.mode, NOTE_SPRITE)
+        self.text.draw(image, (0, 0), "♪", self.font)
+        return image
         
     def display_idle(self):
-        """Display idle screen with animation"""
-        # Animated dots
-        dots = "." * ((int(time.time() * 2) % 3) + 1)
+        """Display idle screen with animation; nothing is sent until it changes"""
+        # Dots step twice a second; two notes bob up and down the sides
+        step = int(self.clock.now() * IDLE_RATE)
+        dot_count = step % 3
+        lift = (1 - math.cos(step / IDLE_RATE * math.pi)) / 2
+        left, right = 55 - int(lift * 30), 25 + int(lift * 30)
         
-        with canvas(oled) as draw:
-            # Title
-            draw.text((15, 10), "Color Symphony", font=self.font_large, fill="white")
-            
-            # Instructions
-            draw.text((20, 35), "Press button", font=self.font, fill="white")
-            draw.text((25, 48), f"to start{dots}", font=self.font, fill="white")
-            
-            # Draw music notes around the screen
-            note_positions = [(10, 55), (110, 55), (5, 25), (115, 25)]
-            for i, pos in enumerate(note_positions):
-                if int(time.time() * 2) % 4 == i:
-                    draw.text(pos, "♪", font=self.font, fill="white")
+        # Still on screen unless another frame went out since
+        key = (dot_count, left, right)
+        if self.idle_shown == (key, self.renderer.submitted):
+            return
+        background = self.frames.get(('idle', dot_count), lambda: self.render_idle(dot_count))
+        note = self.frames.get(('note',), self.render_note)
+        
+        def paint(buffer):
+            buffer.paste_pages(background)
+            buffer.paste_pages(note, 7, left, mode='or')
+            buffer.paste_pages(note, 113, right, mode='or')
+        self.renderer.submit(paint, pages=True)
+        self.idle_shown = (key, self.renderer.submitted)
+        
+    def play_frames(self, duration, paint):
+        """Run a framebuffer animation at FRAME_RATE on absolute deadlines
+
+        paint(buffer, t) draws the frame t of the way (0-1) through it.
+        Returns True as soon as the button is pressed.
+        """
+        count = max(1, int(duration * FRAME_RATE))
+        start = self.clock.now()
+        for i in range(count):
+            self.renderer.submit(lambda buffer, t=i / count: paint(buffer, t), pages=True)
+            if self.clock.wait(self.wake, start + (i + 1) / FRAME_RATE - self.clock.now()):
+                return True
+        return False
+        
+    def render_wipe_text(self, name, x):
+        """Render a pattern name on its own for the wipe transition"""
+        image, draw = self.new_frame()
+        self.text.draw(image, (x, 25), name, self.font)
+        return image
+        
+    def render_next_up(self, to_pattern):
+        """Render the "Next up" screen"""
+        image, draw = self.new_frame()
+        self.text.draw(image, (35, 20), "Next up:", self.font)
+        self.text.draw(image, (64 - len(to_pattern)*3, 35), to_pattern, self.font_large)
+        return image
         
     def display_transition(self, from_pattern, to_pattern):
         """Display transition animation between patterns"""
-        # Wipe transition
-        for x in range(0, 128, 8):
-            with canvas(oled) as draw:
-                # Show outgoing pattern name on left
-                if x < 64:
-                    draw.text((5, 25), from_pattern, font=self.font, fill="white")
-                
-                # Wipe effect
-                draw.rectangle((x, 0, x+8, 64), fill="white")
-                
-                # Show incoming pattern name on right
-                if x > 64:
-                    draw.text((70, 25), to_pattern, font=self.font, fill="white")
-            
-            time.sleep(0.02)
+        outgoing = self.frames.get(('wipe', from_pattern, 5), lambda: self.render_wipe_text(from_pattern, 5))
+        incoming = self.frames.get(('wipe', to_pattern, 70), lambda: self.render_wipe_text(to_pattern, 70))
+        
+        # Wipe transition: the outgoing name until the bar passes the
+        # middle, then the incoming one
+        def paint(buffer, t):
+            x = int(t * 128)
+            if x < 64:
+                buffer.paste_pages(outgoing)
+            elif x > 64:
+                buffer.paste_pages(incoming)
+            else:
+                buffer.clear()
+            buffer.rect(x, 0, x + 8, 63)
+        if self.play_frames(WIPE_TIME, paint):
+            return
         
         # Clear and show "Next up" message
-        with canvas(oled) as draw:
-            draw.text((35, 20), "Next up:", font=self.font, fill="white")
-            draw.text((64 - len(to_pattern)*3, 35), to_pattern, font=self.font_large, fill="white")
+        self.show_frame(('next_up', to_pattern), lambda: self.render_next_up(to_pattern))
         
-        time.sleep(0.5)
+        self.wait(0.5)
     
+    def render_complete(self):
+        """Render the pattern complete screen without sparkles"""
+        image, draw = self.new_frame()
+        self.text.draw(image, (25, 25), "Complete!", self.font_large)
+        return image
+        
     def display_pattern_complete(self):
         """Display pattern complete animation"""
-        # Sparkle effect
-        for _ in range(10):
-            with canvas(oled) as draw:
-                draw.text((25, 25), "Complete!", font=self.font_large, fill="white")
-                # Random sparkles
-                for _ in range(5):
-                    x = random.randint(0, 127)
-                    y = random.randint(0, 63)
-                    draw.point((x, y), fill="white")
-            time.sleep(0.05)
+        background = self.frames.get(('complete',), self.render_complete)
+        if self.sparkle_rng is None:
+            # NumPy only loads with the first sparkles, long after startup
+            import numpy as np
+            self.sparkle_rng = np.random.default_rng()
+        
+        # Fresh random sparkles every frame
+        def paint(buffer, t):
+            buffer.paste_pages(background)
+            buffer.sparkles(SPARKLES, self.sparkle_rng)
+        self.play_frames(SPARKLE_TIME, paint)
     
-    def play_pattern(self, pattern):
-        """Play a complete color and sound pattern"""
-        durations = pattern.get('durations', [0.3] * len(pattern['notes']))
+    def reload_patterns(self):
+        """Swap in edited pattern files; only called between patterns"""
+        if not super().reload_patterns():
+            return False
         
-        for i, (color, note, duration) in enumerate(zip(pattern['colors'], pattern['notes'], durations)):
-            self.display_pattern_info(pattern, i)
-            self.set_color(*color)
-            self.play_tone(NOTES[note], duration)
-            time.sleep(0.05)
-            
-        # Fade out
-        self.set_color(0, 0, 0)
+        # Cached screens show the old names and note counts
+        self.frames.clear()
+        return True
+        
+    def play_pattern(self, pattern, start=None):
+        """Play a complete color and sound pattern"""
+        self.timing = super().play_pattern(pattern, start)
         
         # Show completion animation
-        self.display_pattern_complete()
+        if not self.timing.cancelled:
+            self.display_pattern_complete()
+        return self.timing
+        
+    def render_welcome(self, i):
+        """Render one frame of the welcome loading animation"""
+        image, draw = self.new_frame()
+        self.text.draw(image, (20, 10), "Welcome to", self.font)
+        self.text.draw(image, (10, 25), "Color Symphony!", self.font_large)
+        
+        # Loading bar
+        bar_width = int((i / 19) * 100)
+        draw.rectangle((14, 50, 14 + bar_width, 55), fill="white")
+        draw.rectangle((14, 50, 114, 55), outline="white")
+        
+        # Rotating dots
+        angle = (i * 18) % 360
+        if angle < 90:
+            self.text.draw(image, (60, 58), "●", self.font)
+        elif angle < 180:
+            self.text.draw(image, (62, 58), "●", self.font)
+        elif angle < 270:
+            self.text.draw(image, (64, 58), "●", self.font)
+        else:
+            self.text.draw(image, (66, 58), "●", self.font)
+        return image
+        
+    def render_testing(self, label):
+        """Render the RGB test screen for one color"""
+        image, draw = self.new_frame()
+        self.text.draw(image, (45, 25), f"Testing", self.font)
+        self.text.draw(image, (45, 40), label, self.font_large)
+        return image
         
     def welcome_sequence(self):
-        """Play a welcome animation"""
+        """Play a welcome animation; a button press skips it"""
         # Loading animation
         for i in range(20):
-            with canvas(oled) as draw:
-                draw.text((20, 10), "Welcome to", font=self.font, fill="white")
-                draw.text((10, 25), "Color Symphony!", font=self.font_large, fill="white")
-                
-                # Loading bar
-                bar_width = int((i / 19) * 100)
-                draw.rectangle((14, 50, 14 + bar_width, 55), fill="white")
-                draw.rectangle((14, 50, 114, 55), outline="white")
-                
-                # Rotating dots
-                angle = (i * 18) % 360
-                if angle < 90:
-                    draw.text((60, 58), "●", font=self.font, fill="white")
-                elif angle < 180:
-                    draw.text((62, 58), "●", font=self.font, fill="white")
-                elif angle < 270:
-                    draw.text((64, 58), "●", font=self.font, fill="white")
-                else:
-                    draw.text((66, 58), "●", font=self.font, fill="white")
-            
-            time.sleep(0.05)
+            self.show_frame(('welcome', i), lambda i=i: self.render_welcome(i))
+            if self.wait(0.05):
+                return
         
         # Quick RGB test with notes
-        colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
-        notes = ['C', 'E', 'G']
-        labels = ['Red', 'Green', 'Blue']
-        
-        for color, note, label in zip(colors, notes, labels):
-            with canvas(oled) as draw:
-                draw.text((45, 25), f"Testing", font=self.font, fill="white")
-                draw.text((45, 40), label, font=self.font_large, fill="white")
-            
-            self.set_color(*color)
-            self.play_tone(NOTES[note], 0.2)
-            
-        self.set_color(0, 0, 0)
-        time.sleep(0.5)
+        self.rgb_test()
+        
+    def show_testing(self, label):
+        """Name the color under test on the OLED"""
+        self.show_frame(('testing', label), lambda label=label: self.render_testing(label))
+        
+    def idle_animation(self):
+        """Simple breathing LED while idle, with the idle screen animating along"""
+        # Wakes for each breathing step and each idle screen step; the LED
+        # and the screen are only written when they change
+        deadline = self.clock.now()
+        for index, hold in BREATH:
+            self.led.set_index(index, index, index)
+            deadline += hold
+            while True:
+                self.display_idle()
+                now = self.clock.now()
+                wake = min(deadline, (int(now * IDLE_RATE) + 1) / IDLE_RATE)
+                if self.wait(wake - now):
+                    return
+                if wake >= deadline:
+                    break
+        
+    def stop_playing(self):
+        """Long press: stop and go back to the idle screen"""
+        super().stop_playing()
+        self.display_idle()
+        
+    def power_down(self):
+        """Stop every PWM output and switch the panel off"""
+        super().power_down()
+        
+        # The panel keeps its RAM while off, so nothing needs redrawing. A
+        # wedged bus must not keep the show out of standby, so the wait for
+        # the last frame is bounded and the panel is switched off anyway
+        if not self.renderer.flush(FLUSH_TIMEOUT):
+            print("⚠️  OLED still drawing; switching it off anyway")
+        try:
+            self.oled.hide()
+        except OSError as error:
+            print(f"⚠️  OLED did not switch off ({error})")
+        
+    def power_up(self):
+        """Restart the LED outputs and switch the panel back on"""
+        super().power_up()
+        self.oled.show()
         
     def run(self):
         """Main program loop"""
+        print(f"⚡ Ready for input {self.time_to_interactive * 1000:.0f} ms after start")
         try:
             self.welcome_sequence()
-            time.sleep(1)
+            self.wait(1)
             self.display_idle()
+            self.last_activity = self.clock.now()
             
             while self.running:
-                if self.button_pressed:
-                    self.button_pressed = False
-                    
-                    # Get current and next pattern
-                    current_pattern = COLOR_PATTERNS[self.pattern_index]
-                    next_index = (self.pattern_index + 1) % len(COLOR_PATTERNS)
-                    next_pattern = COLOR_PATTERNS[next_index]
-                    
-                    # Play current pattern
-                    self.play_pattern(current_pattern)
-                    
-                    # Show transition animation
-                    self.display_transition(current_pattern['name'], next_pattern['name'])
-                    
-                    # Move to next pattern
-                    self.pattern_index = next_index
-                    
-                    # Show idle screen
-                    time.sleep(0.5)
-                    self.display_idle()
-                else:
-                    # Simple breathing LED while idle
-                    for i in range(50):
-                        brightness = i / 50.0
-                        self.set_color(brightness * 0.1, brightness * 0.1, brightness * 0.1)
-                        time.sleep(0.01)
-                    for i in range(50, 0, -1):
-                        brightness = i / 50.0
-                        self.set_color(brightness * 0.1, brightness * 0.1, brightness * 0.1)
-                        time.sleep(0.01)
+                gesture = self.next_gesture()
+                if gesture is None:
+                    # Idle animation, or standby after a long wait
+                    self.idle()
+                    continue
+                
+                # Long press stops
+                if gesture.kind == 'long_press':
+                    self.stop_playing()
+                    continue
+                
+                self.play_gesture(gesture)
+                
+                # Get current and next pattern; a remote start during the
+                # transition waits in the queue and picks its own pattern
+                played = self.pattern_index
+                current_pattern = self.patterns[played]
+                next_index = (played + 1) % len(self.patterns)
+                next_pattern = self.patterns[next_index]
+                
+                # Show transition animation
+                self.display_transition(current_pattern['name'], next_pattern['name'])
+                
+                # Move to next pattern
+                self.pattern_index = next_index
+                
+                # Show idle screen
+                self.wait(0.5)
+                self.display_idle()
+                self.last_activity = self.clock.now()
                     
         except KeyboardInterrupt:
             print("\n\nSymphony concludes...")
@@ -327,17 +403,21 @@ class ColorSymphonyOLED:
     def cleanup(self):
         """Clean up resources"""
         # Clear OLED
-        oled.clear()
-        
-        # Turn off LEDs
-        self.set_color(0, 0, 0)
-        self.red_pwm.stop()
-        self.green_pwm.stop()
-        self.blue_pwm.stop()
-        self.buzzer_pwm.stop()
-        GPIO.cleanup()
+        self.renderer.stop()
+        self.oled.clear()
+        stats = self.oled.stats()
+        print(f"OLED: {stats['frames']} frames, {stats['bytes_sent']} bytes sent "
+              f"({stats['saving']:.0%} saved over full frames), "
+              f"{self.renderer.dropped} frames dropped, {self.renderer.errors} transfer errors, "
+              f"{self.renderer.failures} frames failed")
+        latency = self.latency_stats()
+        if latency['count']:
+            print(f"Press-to-note latency: mean {latency['mean'] * 1000:.1f} ms, "
+                  f"max {latency['max'] * 1000:.1f} ms")
+        
+        # Turn off LEDs, buzzer and button
+        super().cleanup()
         print("Until next time!\n")
 
 if __name__ == "__main__":
-    symphony = ColorSymphonyOLED()
-    symphony.run()
\ No newline at end of file
+    main(ColorSymphonyOLED, "Color Symphony with OLED display")
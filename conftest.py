@@ -0,0 +1,21 @@
+# The modules live at the top of the repository; pytest puts this
+# directory on sys.path because this file is here.
+
+import shutil
+
+import pytest
+
+from pattern_store import PATTERN_DIR, PatternLibrary
+
+
+@pytest.fixture
+def pattern_dir(tmp_path):
+    """A copy of the shipped patterns, so caches and edits stay out of the tree"""
+    directory = tmp_path / 'patterns'
+    shutil.copytree(PATTERN_DIR, directory, ignore=shutil.ignore_patterns('.*'))
+    return directory
+
+
+@pytest.fixture
+def library(pattern_dir):
+    return PatternLibrary(str(pattern_dir))
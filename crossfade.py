@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+🌈 Color Symphony Crossfades
+Computes smooth color trajectories between the colors of a pattern in one
+NumPy batch, ready to be streamed to the LED by the scheduler.
+"""
+
+import colorsys
+import heapq
+
+import numpy as np
+
+from led_output import LUT_SIZE
+from scheduler import Event, NOTE_GAP, compile_pattern
+
+# LED frames per second while fading
+FRAME_RATE = 200
+
+CURVES = ('linear', 'ease', 'hsv')
+
+
+def hsv_to_rgb(h, s, v):
+    """Vectorized HSV to RGB for arrays of values in 0-1"""
+    i = np.floor(h * 6).astype(int) % 6
+    f = h * 6 - np.floor(h * 6)
+    p = v * (1 - s)
+    q = v * (1 - s * f)
+    t = v * (1 - s * (1 - f))
+    r = np.choose(i, [v, q, p, p, t, v])
+    g = np.choose(i, [t, v, v, q, p, p])
+    b = np.choose(i, [p, p, t, v, v, q])
+    return np.stack([r, g, b], axis=1)
+
+
+def hsv_keys(keys):
+    """HSV keypoints; grey keys borrow the hue of a neighbour"""
+    hsv = np.array([colorsys.rgb_to_hsv(*key) for key in keys])
+    for n in range(len(hsv)):
+        if hsv[n, 1] == 0:
+            colored = [m for m in (n - 1, n + 1) if 0 <= m < len(hsv) and hsv[m, 1] > 0]
+            if colored:
+                hsv[n, 0] = hsv[colored[0], 0]
+    return hsv
+
+
+def trajectory(colors, durations, gap=NOTE_GAP, rate=FRAME_RATE, curve='linear'):
+    """Frame times and LED table indices fading through every color
+
+    Each note's color is reached at its onset and blends into the next
+    one by the following onset; the last color fades to black.
+    """
+    if curve not in CURVES:
+        raise ValueError(f"unknown curve {curve!r}, expected one of {CURVES}")
+
+    n = len(colors)
+    starts = np.concatenate(([0.0], np.cumsum(np.asarray(durations[:n], dtype=float) + gap)))
+    keys = np.vstack([np.asarray(colors, dtype=float), np.zeros((1, 3))])
+
+    times = np.arange(int(starts[-1] * rate) + 1) / rate
+    segment = np.clip(np.searchsorted(starts, times, side='right') - 1, 0, n - 1)
+    u = np.clip((times - starts[segment]) / (starts[segment + 1] - starts[segment]), 0.0, 1.0)
+
+    if curve == 'ease':
+        u = u * u * (3 - 2 * u)
+
+    if curve == 'hsv':
+        hsv = hsv_keys(keys)
+        a, b = hsv[segment], hsv[segment + 1]
+        # Travel the short way around the hue circle
+        dh = (b[:, 0] - a[:, 0] + 0.5) % 1.0 - 0.5
+        rgb = hsv_to_rgb((a[:, 0] + dh * u) % 1.0,
+                         a[:, 1] + (b[:, 1] - a[:, 1]) * u,
+                         a[:, 2] + (b[:, 2] - a[:, 2]) * u)
+    else:
+        a, b = keys[segment], keys[segment + 1]
+        rgb = a + (b - a) * u[:, None]
+
+    indices = np.rint(np.clip(rgb, 0.0, 1.0) * (LUT_SIZE - 1)).astype(np.uint8)
+
+    # Always finish dark, exactly at the end of the pattern
+    times = np.append(times, starts[-1])
+    indices = np.vstack([indices, np.zeros((1, 3), dtype=np.uint8)])
+    return times, indices
+
+
+def compile_crossfade(pattern, notes, curve='linear', rate=FRAME_RATE, gap=NOTE_GAP, display=False):
+    """Timeline with LED fade frames in place of the hard color steps"""
+    durations = pattern.get('durations', [0.3] * len(pattern['notes']))
+    times, indices = trajectory(pattern['colors'], durations, gap, rate, curve)
+    events = compile_pattern(pattern, notes, gap, display)
+
+    # The closing black stays the pattern's own color event rather than a
+    # fade frame: late fade frames may be dropped, but never the LED going out
+    closing = events[-1]
+    fading = times < closing.at - 1e-9
+    times, indices = times[fading], indices[fading]
+
+    # Drop frames that repeat the previous one; the LED already shows them
+    keep = np.ones(len(indices), dtype=bool)
+    keep[1:] = np.any(indices[1:] != indices[:-1], axis=1)
+    frames = [Event(t, 'led', tuple(row))
+              for t, row in zip(times[keep].tolist(), indices[keep].tolist())]
+
+    others = [event for event in events[:-1] if event.kind != 'color'] + [closing]
+    return list(heapq.merge(frames, others, key=lambda event: event.at))
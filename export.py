@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+🎬 Color Symphony Export
+Plays a show on the simulated backend with a stepped virtual clock, far
+faster than real time, and turns what the hardware would have done into
+files: the buzzer as a square-wave WAV, the LED as a CSV track and PNG
+strips, and the OLED as a PNG sequence and animated GIFs. Everything is
+written while the show runs, a chunk at a time.
+"""
+
+import argparse
+import csv
+import glob
+import os
+import time
+import wave
+
+import numpy as np
+from PIL import Image
+
+from hal import DisplayRAM, SimBackend, VirtualClock
+from led_output import GAMMA
+
+DEFAULT_DIR = 'export'
+FORMATS = ('wav', 'csv', 'strip', 'png', 'gif')
+
+# Audio
+SAMPLE_RATE = 44100
+AMPLITUDE = 0.3
+CHUNK = 1 << 16
+
+# LED strip: pixels per second of show, one PNG per STRIP_SECONDS
+STRIP_RATE = 50
+STRIP_SECONDS = 60
+STRIP_HEIGHT = 24
+
+# OLED frames per second, and frames per GIF file
+FPS = 25
+GIF_FRAMES = 300
+
+
+def clear(pattern):
+    """Remove numbered files an earlier, longer export left behind
+
+    Only names this module writes are matched, so anything else in the
+    directory is left alone.
+    """
+    for name in glob.glob(pattern):
+        os.remove(name)
+
+
+class Track:
+    """One output; sees every backend event in time order"""
+
+    def advance(self, t):
+        """Write out everything up to time t with the current state"""
+
+    def handle(self, t, kind, args):
+        """Apply one backend event"""
+
+    def close(self, t):
+        self.advance(t)
+
+
+class AudioTrack(Track):
+    """The buzzer PWM as a square wave, synthesized between state changes"""
+
+    def __init__(self, path, pin, rate=SAMPLE_RATE, amplitude=AMPLITUDE):
+        self.pin = pin
+        self.rate = rate
+        self.amplitude = amplitude
+        self.frequency = 0.0
+        self.duty = 0.0
+        self.on = False
+        self.phase = 0.0
+        self.written = 0
+        self.wav = wave.open(path, 'wb')
+        self.wav.setnchannels(1)
+        self.wav.setsampwidth(2)
+        self.wav.setframerate(rate)
+
+    def advance(self, t):
+        end = int(round(t * self.rate))
+        while self.written < end:
+            count = min(CHUNK, end - self.written)
+            if self.on and self.frequency > 0:
+                # Phase carries over between chunks and frequency changes;
+                # the levels are offset so the wave averages to silence
+                phase = (self.phase + np.arange(count) * (self.frequency / self.rate)) % 1.0
+                high = self.amplitude * (1 - self.duty)
+                low = -self.amplitude * self.duty
+                samples = np.where(phase < self.duty, high, low)
+                self.phase = (self.phase + count * self.frequency / self.rate) % 1.0
+            else:
+                samples = np.zeros(count)
+            self.wav.writeframes((samples * 32767).astype('<i2').tobytes())
+            self.written += count
+
+    def handle(self, t, kind, args):
+        if not args or args[0] != self.pin:
+            return
+        if kind == 'frequency':
+            self.frequency = float(args[1])
+        elif kind == 'start':
+            self.on = True
+            self.duty = args[1] / 100.0
+        elif kind == 'duty':
+            self.duty = args[1] / 100.0
+        elif kind == 'stop':
+            self.on = False
+
+    def close(self, t):
+        super().close(t)
+        self.wav.close()
+
+
+class LedState:
+    """Duty cycles of the three LED pins"""
+
+    def __init__(self, pins):
+        self.pins = pins
+        self.duty = [0.0] * len(pins)
+
+    def update(self, kind, args):
+        """True when an LED pin changed"""
+        if kind not in ('duty', 'start') or not args or args[0] not in self.pins:
+            return False
+        self.duty[self.pins.index(args[0])] = float(args[1])
+        return True
+
+    def color(self):
+        """How the LED looks, as an sRGB-ish 8-bit color"""
+        return tuple(int(round((d / 100.0) ** (1 / GAMMA) * 255)) for d in self.duty)
+
+
+class LedCsvTrack(Track):
+    """One CSV row per LED change: time and the duty cycle of each pin"""
+
+    def __init__(self, path, pins):
+        self.state = LedState(pins)
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['time', 'red', 'green', 'blue'])
+
+    def handle(self, t, kind, args):
+        if self.state.update(kind, args):
+            self.writer.writerow([f"{t:.4f}", *self.state.duty])
+
+    def close(self, t):
+        self.file.close()
+
+
+class LedStripTrack(Track):
+    """The LED color over time as PNG strips, left to right"""
+
+    def __init__(self, prefix, pins, rate=STRIP_RATE, seconds=STRIP_SECONDS, height=STRIP_HEIGHT):
+        self.prefix = prefix
+        self.state = LedState(pins)
+        self.rate = rate
+        self.height = height
+        self.strip = np.zeros((rate * seconds, 3), dtype=np.uint8)
+        self.filled = 0
+        self.done = 0
+        self.files = 0
+        clear(f"{glob.escape(prefix)}_[0-9][0-9][0-9]*.png")
+
+    def advance(self, t):
+        end = int(t * self.rate)
+        color = self.state.color()
+        while self.done < end:
+            count = min(end - self.done, len(self.strip) - self.filled)
+            self.strip[self.filled:self.filled + count] = color
+            self.filled += count
+            self.done += count
+            if self.filled == len(self.strip):
+                self.save()
+
+    def handle(self, t, kind, args):
+        self.state.update(kind, args)
+
+    def save(self):
+        if not self.filled:
+            return
+        row = self.strip[:self.filled]
+        image = Image.fromarray(np.repeat(row[None, :, :], self.height, axis=0), 'RGB')
+        image.save(f"{self.prefix}_{self.files:03d}.png")
+        self.files += 1
+        self.filled = 0
+
+    def close(self, t):
+        super().close(t)
+        self.save()
+
+
+class OledTrack(Track):
+    """The OLED at a fixed frame rate, as PNG files and/or GIF segments
+
+    Display RAM is rebuilt from the recorded bus traffic by the same model
+    the simulated panel uses, so the frames are exactly what it shows.
+    """
+
+    def __init__(self, directory=None, gif_prefix=None, fps=FPS, width=128, height=64):
+        self.directory = directory
+        self.gif_prefix = gif_prefix
+        self.fps = fps
+        self.ram = DisplayRAM(width, height)
+        self.visible = True
+        self.frame = 0
+        self.gif_frames = []
+        self.gif_files = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            clear(os.path.join(glob.escape(directory), "frame_[0-9][0-9][0-9][0-9][0-9][0-9]*.png"))
+        if gif_prefix is not None:
+            clear(f"{glob.escape(gif_prefix)}_[0-9][0-9][0-9]*.gif")
+
+    def image(self):
+        width, height = self.ram.width, self.ram.height
+        if not self.visible:
+            return Image.new('L', (width, height))
+        # Every byte is a vertical run of 8 pixels, least significant on top
+        pages = np.frombuffer(b''.join(self.ram.ram), dtype=np.uint8).reshape(-1, 1, width)
+        bits = np.unpackbits(pages, axis=1, bitorder='little')
+        return Image.fromarray(bits.reshape(height, width) * 255)
+
+    def advance(self, t):
+        end = int(t * self.fps)
+        if self.frame >= end:
+            return
+        image = self.image()
+        while self.frame < end:
+            if self.directory is not None:
+                image.save(os.path.join(self.directory, f"frame_{self.frame:06d}.png"))
+            if self.gif_prefix is not None:
+                self.add_gif_frame(image)
+            self.frame += 1
+
+    def add_gif_frame(self, image):
+        # Repeated frames just lengthen the previous one
+        frame_ms = 1000 / self.fps
+        if self.gif_frames and self.gif_frames[-1][0].tobytes() == image.tobytes():
+            self.gif_frames[-1][1] += frame_ms
+            return
+        if len(self.gif_frames) == GIF_FRAMES:
+            self.save_gif()
+        self.gif_frames.append([image, frame_ms])
+
+    def save_gif(self):
+        if not self.gif_frames:
+            return
+        images = [image.convert('P') for image, _ in self.gif_frames]
+        images[0].save(f"{self.gif_prefix}_{self.gif_files:03d}.gif", save_all=True,
+                       append_images=images[1:], loop=0,
+                       duration=[round(ms) for _, ms in self.gif_frames])
+        self.gif_files += 1
+        self.gif_frames = []
+
+    def handle(self, t, kind, args):
+        if kind == 'oled_command':
+            self.ram.address(args[0])
+        elif kind == 'oled_data':
+            self.ram.write(args[0])
+        elif kind == 'oled_power':
+            self.visible = bool(args[0])
+
+    def close(self, t):
+        super().close(t)
+        if self.gif_prefix is not None:
+            self.save_gif()
+
+
+class Exporter:
+    """Backend listener that feeds every event to the tracks in order"""
+
+    def __init__(self, tracks):
+        self.tracks = tracks
+
+    def __call__(self, entry):
+        t, kind, args = entry
+        for track in self.tracks:
+            track.advance(t)
+            track.handle(t, kind, args)
+
+    def close(self, t):
+        for track in self.tracks:
+            track.close(t)
+
+
+def perform(show, patterns, idle_cycles):
+    """The show as a visitor sees it: welcome, every pattern, then idle"""
+    show.welcome_sequence()
+    for index, pattern in enumerate(patterns):
+        show.pattern_index = show.patterns.index(pattern)
+        show.play_pattern(pattern)
+        if hasattr(show, 'display_transition'):
+            next_pattern = patterns[(index + 1) % len(patterns)]
+            show.display_transition(pattern['name'], next_pattern['name'])
+    for _ in range(idle_cycles):
+        if hasattr(show, 'display_idle'):
+            show.display_idle()
+        show.idle_animation()
+    if hasattr(show, 'renderer'):
+        show.renderer.flush()
+
+
+def select_patterns(patterns, names):
+    """Patterns by name or 1-based number, in the order given"""
+    if not names:
+        return list(patterns)
+    selected = []
+    for name in names:
+        matches = [p for p in patterns if p['name'] == name]
+        if not matches and name.isdigit() and 0 < int(name) <= len(patterns):
+            matches = [patterns[int(name) - 1]]
+        if not matches:
+            raise SystemExit(f"no pattern {name!r}; have {', '.join(p['name'] for p in patterns)}")
+        selected.append(matches[0])
+    return selected
+
+
+def export(show_name='oled', directory=DEFAULT_DIR, formats=FORMATS, names=(), idle_cycles=1,
+           rate=SAMPLE_RATE, fps=FPS, library=None):
+    """Render a show to files; returns show and wall-clock seconds"""
+    if show_name == 'oled':
+        from color_symphony_oled import ColorSymphonyOLED as make_show
+    else:
+        from color_symphony import ColorSymphony as make_show
+    from show_base import RED_PIN, GREEN_PIN, BLUE_PIN, BUZZER_PIN
+
+    os.makedirs(directory, exist_ok=True)
+    path = lambda name: os.path.join(directory, name)
+    pins = [RED_PIN, GREEN_PIN, BLUE_PIN]
+
+    tracks = []
+    if 'wav' in formats:
+        tracks.append(AudioTrack(path('buzzer.wav'), BUZZER_PIN, rate))
+    if 'csv' in formats:
+        tracks.append(LedCsvTrack(path('led.csv'), pins))
+    if 'strip' in formats:
+        tracks.append(LedStripTrack(path('led_strip'), pins))
+    if show_name == 'oled' and ('png' in formats or 'gif' in formats):
+        tracks.append(OledTrack(path('frames') if 'png' in formats else None,
+                                path('oled') if 'gif' in formats else None, fps))
+
+    # Nothing is kept in the backend log; the tracks write as events arrive
+    backend = SimBackend(VirtualClock(), maxlen=0)
+    exporter = Exporter(tracks)
+    backend.listeners.append(exporter)
+
+    wall = time.perf_counter()
+    show = make_show(backend, library=library)
+    perform(show, select_patterns(show.patterns, names), idle_cycles)
+    end = backend.clock.now()
+    exporter.close(end)
+    backend.listeners.remove(exporter)
+    show.cleanup()
+    return end, time.perf_counter() - wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a Color Symphony show to audio and image files")
+    parser.add_argument('--show', choices=['basic', 'oled'], default='oled')
+    parser.add_argument('--output', default=DEFAULT_DIR, metavar='DIR',
+                        help=f"directory for the files (default: {DEFAULT_DIR})")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS),
+                        help="what to write (default: all)")
+    parser.add_argument('--patterns', nargs='+', default=(), metavar='NAME',
+                        help="patterns to play, by name or number (default: all, in order)")
+    parser.add_argument('--idle-cycles', type=int, default=1,
+                        help="idle animation cycles after the last pattern")
+    parser.add_argument('--rate', type=int, default=SAMPLE_RATE, help="audio sample rate")
+    parser.add_argument('--fps', type=int, default=FPS, help="OLED frames per second")
+    args = parser.parse_args()
+    if args.rate <= 0:
+        parser.error("--rate must be a positive number of samples per second")
+    if args.fps <= 0:
+        parser.error("--fps must be a positive number of frames per second")
+
+    show_time, wall = export(args.show, args.output, args.formats, args.patterns,
+                             args.idle_cycles, args.rate, args.fps)
+    print(f"🎬 {show_time:.1f} s of show exported to {args.output}/ in {wall:.2f} s "
+          f"({show_time / wall:.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
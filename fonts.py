@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+🔤 Color Symphony Fonts
+Loads the OLED fonts once, on a background thread, so startup does not
+wait for FreeType.
+"""
+
+import threading
+import time
+from functools import lru_cache
+
+from PIL import ImageFont
+
+FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+BOLD_FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf'
+
+
+@lru_cache(maxsize=None)
+def load_font(path, size):
+    """Load a TrueType font, falling back to PIL's built-in one"""
+    try:
+        return ImageFont.truetype(path, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+class FontLoader:
+    """Loads named fonts in the background; get() waits until they are in
+
+    The thread only runs once start() is called, so the then callback can
+    rely on the loader already being stored wherever it is kept.
+    """
+
+    def __init__(self, specs, then=None):
+        self.specs = specs
+        self.then = then
+        self.fonts = {}
+        self.ready = threading.Event()
+        self.load_time = None
+
+    def start(self):
+        threading.Thread(target=self.load, name='font-loader', daemon=True).start()
+
+    def load(self):
+        start = time.perf_counter()
+        try:
+            for name, (path, size) in self.specs.items():
+                self.fonts[name] = load_font(path, size)
+        finally:
+            self.load_time = time.perf_counter() - start
+            self.ready.set()
+        if self.then is not None:
+            self.then()
+
+    def get(self, name):
+        self.ready.wait()
+        return self.fonts[name]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+🖼️ Color Symphony Frame Cache
+Keeps pre-rendered OLED frames already packed into ssd1306 pages, so
+playback only pushes buffers instead of redrawing fonts and shapes, or
+even repacking them, every time.
+"""
+
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from oled_delta import pack_pages
+
+# Default memory cap: 256 full 128x64 frames
+DEFAULT_MAX_BYTES = 256 * 1024
+
+
+def pack_frame(image):
+    """A rendered 1-bit image in page order, padded with blank rows to whole pages"""
+    if image.mode != '1':
+        image = image.convert('1')
+    if image.height % 8:
+        padded = Image.new('1', (image.width, -(-image.height // 8) * 8))
+        padded.paste(image)
+        image = padded
+    return pack_pages(image, image.height // 8)
+
+
+def frame_size(pages):
+    """Memory used by a packed frame in bytes"""
+    return sum(map(len, pages))
+
+
+class FrameCache:
+    """LRU cache of rendered frames in page order with a memory cap
+
+    Renderers return 1-bit PIL images; they are packed once, on the way in.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.frames = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def get(self, key, render):
+        """Return the cached pages for key, rendering them on first use"""
+        with self.lock:
+            frame = self.frames.get(key)
+            if frame is not None:
+                self.frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        frame = pack_frame(render())
+        self.put(key, frame)
+        return frame
+
+    def put(self, key, frame):
+        """Store a frame's pages and evict least recently used ones over the cap"""
+        with self.lock:
+            if key in self.frames:
+                self.bytes -= frame_size(self.frames.pop(key))
+
+            self.frames[key] = frame
+            self.bytes += frame_size(frame)
+
+            while self.bytes > self.max_bytes and len(self.frames) > 1:
+                _, old = self.frames.popitem(last=False)
+                self.bytes -= frame_size(old)
+                self.evictions += 1
+
+    def warm(self, items):
+        """Pre-render (key, render) pairs that are not cached yet"""
+        for key, render in items:
+            if key not in self.frames:
+                self.put(key, pack_frame(render()))
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.bytes = 0
+
+    def stats(self):
+        return {
+            'frames': len(self.frames),
+            'bytes': self.bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
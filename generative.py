@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+♾️ Color Symphony Generative Patterns
+Endless patterns made up as they play: a random walk over the notes of a
+scale, colors gliding between the entries of a palette, and seeded
+variations of the fixed patterns. Generators yield one step at a time and
+a producer thread keeps a few phrases ready ahead of the scheduler, so a
+show can run for hours in constant memory without a generated note ever
+being late.
+
+    python3 generative.py walk --scale pentatonic --palette Ocean --simulate
+    python3 generative.py variations --pattern Sunrise --seed 7 --simulate
+"""
+
+import argparse
+import random
+import time
+from collections import deque, namedtuple
+from itertools import islice
+
+from producer import Producer
+from scheduler import Event, JitterStats, NOTE_GAP, percentile
+
+Step = namedtuple('Step', 'color note duration')
+
+# Scales as note names of the standard note table; None means every note
+SCALES = {
+    'major': None,
+    'pentatonic': ('C', 'D', 'E', 'G', 'A', 'C_HIGH'),
+    'triad': ('C', 'E', 'G', 'C_HIGH'),
+}
+
+# Note lengths a walk picks from, and how often
+DURATIONS = (0.15, 0.3, 0.45, 0.6)
+DURATION_WEIGHTS = (3, 4, 2, 1)
+
+# Largest leap of a walk, in scale steps
+MAX_LEAP = 2
+
+# Steps a color glide lasts
+GLIDE = (2, 5)
+
+# Steps per phrase, and phrases generated ahead of playback
+PHRASE = 8
+AHEAD = 4
+
+# Generation times kept for the summary
+TIMING_SAMPLES = 1000
+
+GENERATORS = ('walk', 'variations')
+
+
+def scale_notes(notes, scale=None):
+    """Note names in pitch order, only those of the scale if one is given"""
+    names = sorted(notes, key=notes.get)
+    if scale is not None:
+        names = [name for name in names if name in scale]
+    if not names:
+        raise ValueError("the scale has no notes in the note table")
+    return names
+
+
+def random_walk(names, rng, max_leap=MAX_LEAP):
+    """Notes stepping up and down the list, bouncing off both ends"""
+    index = len(names) // 2
+    last = len(names) - 1
+    while True:
+        yield names[index]
+        index += rng.randint(-max_leap, max_leap)
+        if index < 0:
+            index = -index
+        elif index > last:
+            index = 2 * last - index
+        index = min(max(index, 0), last)
+
+
+def palette_glide(palette, rng, glide=GLIDE):
+    """Colors moving in straight lines from one palette entry to another"""
+    current = rng.choice(palette)
+    while True:
+        target = rng.choice([color for color in palette if color != current] or palette)
+        steps = rng.randint(*glide)
+        for i in range(1, steps + 1):
+            t = i / steps
+            yield tuple(a + (b - a) * t for a, b in zip(current, target))
+        current = target
+
+
+def rhythm(rng, durations=DURATIONS, weights=DURATION_WEIGHTS):
+    while True:
+        yield rng.choices(durations, weights)[0]
+
+
+def walk(notes, palette, seed=None, scale=None):
+    """Random walk over a scale, colored by gliding through a palette"""
+    rng = random.Random(seed)
+    names = scale_notes(notes, scale)
+    for color, note, duration in zip(palette_glide(palette, rng), random_walk(names, rng), rhythm(rng)):
+        yield Step(color, note, duration)
+
+
+def variations(pattern, notes, seed=None):
+    """The pattern as written, then endless seeded variations of it
+
+    Each round moves the melody a scale step up or down, swaps two note
+    lengths and starts the colors at another point, always building on
+    the previous round, so it drifts but stays recognisable.
+    """
+    rng = random.Random(seed)
+    names = scale_notes(notes)
+    degrees = [names.index(note) for note in pattern['notes']]
+    colors = list(pattern['colors'])
+    durations = list(pattern['durations'])
+    while True:
+        for color, degree, duration in zip(colors, degrees, durations):
+            yield Step(color, names[degree], duration)
+
+        shift = rng.choice((-1, 1))
+        if all(0 <= degree + shift < len(names) for degree in degrees):
+            degrees = [degree + shift for degree in degrees]
+        i, j = rng.randrange(len(durations)), rng.randrange(len(durations))
+        durations[i], durations[j] = durations[j], durations[i]
+        turn = rng.randrange(len(colors))
+        colors = colors[turn:] + colors[:turn]
+
+
+def make_steps(kind, library, seed=None, scale=None, palette=None, pattern=None):
+    """Step generator of one kind, from the library's notes and patterns
+
+    Palettes and variations are taken from patterns by the start of
+    their name; without one the seed picks a pattern.
+    """
+    rng = random.Random(seed)
+
+    def choose(name):
+        if name is None:
+            return rng.choice(library.patterns)
+        for candidate in library.patterns:
+            if candidate['name'].lower().startswith(name.lower()):
+                return candidate
+        raise ValueError(f"no pattern named {name!r}")
+
+    if kind == 'walk':
+        source = choose(palette)
+        return walk(library.notes, source['colors'], seed, SCALES[scale or 'major']), \
+            f"Walk over {source['title']}"
+    if kind == 'variations':
+        source = choose(pattern)
+        return variations(source, library.notes, seed), f"Variations on {source['title']}"
+    raise ValueError(f"unknown generator {kind!r}")
+
+
+class Lookahead(Producer):
+    """Phrases of timeline events generated on a producer thread
+
+    At most ahead phrases wait in the bounded queue, so memory stays the
+    same however long the show runs.
+    """
+
+    def __init__(self, steps, notes, phrase=PHRASE, ahead=AHEAD, gap=NOTE_GAP):
+        super().__init__('generator', ahead)
+        self.steps = iter(steps)
+        self.notes = notes
+        self.phrase = phrase
+        self.gap = gap
+
+        # Timing, kept in constant memory too
+        self.costs = deque(maxlen=TIMING_SAMPLES)
+        self.generated = 0
+        self.slowest = 0.0
+        self.shortest = float('inf')
+
+    def produce(self):
+        while True:
+            events, t = self.next_phrase()
+            if events:
+                yield events, t
+            if len(events) < 3 * self.phrase:
+                return
+
+    def next_phrase(self):
+        """Up to phrase steps as events from the phrase start, and its length"""
+        events = []
+        t = 0.0
+        for _ in range(self.phrase):
+            started = time.perf_counter()
+            step = next(self.steps, None)
+            if step is None:
+                break
+            events.append(Event(t, 'color', tuple(step.color)))
+            events.append(Event(t, 'tone_on', (self.notes[step.note],)))
+            events.append(Event(t + step.duration, 'tone_off', ()))
+            cost = time.perf_counter() - started
+            self.costs.append(cost)
+            self.generated += 1
+            self.slowest = max(self.slowest, cost)
+            self.shortest = min(self.shortest, step.duration)
+            t += step.duration + self.gap
+        return events, t
+
+    def summary(self):
+        """Generation time per step against the shortest step played"""
+        values = sorted(self.costs)
+        p99 = percentile(values, 0.99)
+        return {
+            'steps': self.generated,
+            'p50_us': percentile(values, 0.50) * 1e6,
+            'p99_us': p99 * 1e6,
+            'max_us': self.slowest * 1e6,
+            'headroom': self.shortest / p99 if p99 and self.generated else float('inf'),
+            'underruns': self.underruns,
+        }
+
+
+def generation_report(summary):
+    return (f"{summary['steps']} steps generated in p50 {summary['p50_us']:.1f} µs, "
+            f"p99 {summary['p99_us']:.1f} µs, max {summary['max_us']:.1f} µs "
+            f"({summary['headroom']:.0f}x headroom on the shortest note), "
+            f"{summary['underruns']} underruns")
+
+
+def play(show, steps, title, phrase=PHRASE, ahead=AHEAD):
+    """Play generated steps until they run out or the button is pressed
+
+    Phrases follow each other on one absolute timeline, so the joins are
+    as tight as the notes inside a phrase. Returns the note lateness of
+    the last phrases and the generation summary.
+    """
+    lookahead = Lookahead(steps, show.notes, phrase, ahead).start()
+    onsets = deque(maxlen=TIMING_SAMPLES)
+    dropped = 0
+    start = None
+
+    print(f"\n♾️  {title}")
+    if getattr(show, 'renderer', None) is not None:
+        show.show_frame(('generative', title), lambda: render_title(show, title))
+    try:
+        for events, length in lookahead:
+            if start is None:
+                start = show.clock.now()
+            stats = show.scheduler.run(events, start=start, cancel=show.wake)
+            show.metrics.observe_run(stats)
+            onsets.extend(late for kind, late in stats.samples if kind == 'tone_on')
+            dropped += stats.dropped
+            if stats.cancelled:
+                break
+            start += length
+    except KeyboardInterrupt:
+        # The usual way out of an endless show; still report below
+        print()
+    finally:
+        lookahead.stop()
+        show.stop_tone()
+        show.set_color(0, 0, 0)
+
+    stats = JitterStats()
+    for late in onsets:
+        stats.add('tone_on', late)
+    stats.dropped = dropped
+    summary = lookahead.summary()
+    print(f"   ⏱️  Timing: {stats}")
+    print(f"   🎲 Generation: {generation_report(summary)}")
+    return stats, summary
+
+
+def render_title(show, title):
+    """OLED screen naming the generator while it plays"""
+    image, draw = show.new_frame()
+    show.text.draw(image, (10, 15), "Generative", show.font_large)
+    show.text.draw(image, (5, 40), title, show.font)
+    return image
+
+
+def benchmark(steps, notes, count):
+    """Generation cost per step over count steps, without playing them"""
+    lookahead = Lookahead(islice(steps, count), notes).start()
+    for _ in lookahead:
+        pass
+    summary = lookahead.summary()
+    # Nothing waits on playback here, so running dry says nothing
+    del summary['underruns']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play endless generated Color Symphony patterns")
+    parser.add_argument('generator', choices=GENERATORS)
+    parser.add_argument('--seed', type=int, help="same seed, same music (default: random)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='major',
+                        help="notes a walk may use (default major)")
+    parser.add_argument('--palette', metavar='PATTERN',
+                        help="pattern whose colors a walk glides through")
+    parser.add_argument('--pattern', metavar='NAME', help="pattern to vary")
+    parser.add_argument('--steps', type=int, help="stop after this many steps (default: never)")
+    parser.add_argument('--show', choices=['basic', 'oled'], default='basic')
+    parser.add_argument('--simulate', action='store_true',
+                        help="run without hardware on the simulated backend")
+    args = parser.parse_args()
+
+    from hal import SimBackend
+    from pattern_store import PatternLibrary
+    if args.show == 'oled':
+        from color_symphony_oled import ColorSymphonyOLED as Show
+    else:
+        from color_symphony import ColorSymphony as Show
+
+    show = Show(SimBackend() if args.simulate else None, library=PatternLibrary(), standby_after=None)
+    try:
+        steps, title = make_steps(args.generator, show.library, args.seed,
+                                  args.scale, args.palette, args.pattern)
+        if args.steps is not None:
+            steps = islice(steps, args.steps)
+        play(show, steps, title)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        show.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+🔌 Color Symphony Hardware Abstraction
+The show talks to its LEDs, buzzer, button and OLED through a backend.
+GPIOBackend drives the real Raspberry Pi; SimBackend records everything
+so the show can be profiled on any Linux box, optionally on a virtual
+clock that runs faster than real time.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+
+from scheduler import SystemClock
+
+# SSD1306 addressing commands (see oled_delta.py)
+COLUMNADDR = 0x21
+PAGEADDR = 0x22
+
+# How long a simulated press holds the button down
+CLICK_HOLD = 0.08
+
+
+class GPIOBackend:
+    """Real hardware: RPi.GPIO software PWM and a luma ssd1306 on I2C"""
+
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.clock = SystemClock()
+
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setwarnings(False)
+
+    def pwm(self, pin, frequency):
+        """Configure pin as an output and return a PWM channel on it"""
+        self.GPIO.setup(pin, self.GPIO.OUT)
+        return self.GPIO.PWM(pin, frequency)
+
+    def button_edges(self, pin, callback, bouncetime=None):
+        """Call callback(pin, pressed, time) on both edges of a pulled-up button
+
+        Debouncing is left to the caller unless a bouncetime (ms) is given.
+        """
+        self.GPIO.setup(pin, self.GPIO.IN, pull_up_down=self.GPIO.PUD_UP)
+
+        def edge(channel):
+            at = self.clock.now()
+            callback(channel, not self.GPIO.input(channel), at)
+
+        options = {} if bouncetime is None else {'bouncetime': bouncetime}
+        self.GPIO.add_event_detect(pin, self.GPIO.BOTH, callback=edge, **options)
+
+    def button_level(self, pin):
+        """True while a pulled-up button is held down"""
+        return not self.GPIO.input(pin)
+
+    def oled(self, port=1, address=0x3C):
+        """The ssd1306 display on the I2C bus, opened on first use"""
+        def open_device():
+            from luma.core.interface.serial import i2c
+            from luma.oled.device import ssd1306
+            return ssd1306(i2c(port=port, address=address))
+        return LazyDevice(open_device)
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+
+class LazyDevice:
+    """Stands in for a display and only builds it when first used
+
+    Geometry is known up front, so frames can be prepared before the bus
+    is even opened.
+    """
+
+    def __init__(self, factory, mode='1', width=128, height=64):
+        self.factory = factory
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+        self.device = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """The real device, built on the first call"""
+        if self.device is None:
+            with self.lock:
+                if self.device is None:
+                    self.device = self.factory()
+        return self.device
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class VirtualClock:
+    """Clock for simulations
+
+    With speed=None time only moves when the show sleeps or waits, so a
+    show runs as fast as the CPU allows. With a speed factor it follows
+    the real clock scaled by that factor.
+    """
+
+    def __init__(self, speed=None):
+        if speed is not None and not speed > 0:
+            raise ValueError(f"clock speed must be above 0, or None for a stepped clock; got {speed}")
+        self.speed = speed
+        self.realtime = speed is not None
+        self.offset = 0.0
+        self.real_start = time.monotonic()
+        self.lock = threading.Lock()
+        self.timers = []
+        self.timer_count = 0
+
+    def now(self):
+        if self.speed is None:
+            return self.offset
+        return (time.monotonic() - self.real_start) * self.speed
+
+    def call_at(self, when, callback):
+        """Run callback as a stepped clock passes when, on the thread moving it
+
+        Nothing else runs while a stepped clock waits, so this is how a
+        simulation presses the button at a set time and stays repeatable.
+        """
+        if self.speed is not None:
+            raise ValueError("call_at needs a stepped clock")
+        with self.lock:
+            self.timer_count += 1
+            heapq.heappush(self.timers, (when, self.timer_count, callback))
+
+    def advance(self, until, event=None):
+        """Step to until, running due timers on the way; stops once event is set"""
+        while True:
+            with self.lock:
+                if not self.timers or self.timers[0][0] > until:
+                    self.offset = max(self.offset, until)
+                    return
+                when, _, callback = heapq.heappop(self.timers)
+                self.offset = max(self.offset, when)
+            callback()
+            if event is not None and event.is_set():
+                return
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.speed is None:
+            self.advance(self.offset + seconds)
+        else:
+            time.sleep(seconds / self.speed)
+
+    def wait(self, event, timeout):
+        """Sleep up to timeout, waking early when event is set"""
+        if self.speed is not None:
+            return event.wait(max(0.0, timeout) / self.speed)
+        if event.is_set():
+            return True
+        if timeout > 0:
+            self.advance(self.offset + timeout, event)
+        return event.is_set()
+
+
+class SimPWM:
+    """Stand-in for RPi.GPIO.PWM that records every change"""
+
+    def __init__(self, backend, pin, frequency):
+        self.backend = backend
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = 0
+        self.running = False
+
+    def start(self, duty):
+        self.duty = duty
+        self.running = True
+        self.backend.record('start', self.pin, duty)
+
+    def stop(self):
+        self.running = False
+        self.backend.record('stop', self.pin)
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+        self.backend.record('duty', self.pin, duty)
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+        self.backend.record('frequency', self.pin, frequency)
+
+
+class DisplayRAM:
+    """Model of ssd1306 display RAM in horizontal addressing mode
+
+    Like the controller, data fills the window set by the last
+    COLUMNADDR/PAGEADDR page by page from where the previous data
+    stopped, wrapping back to the window's start.
+    """
+
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.height = height
+        self.pages = height // 8
+        self.ram = [bytearray(width) for _ in range(self.pages)]
+        self.window = (0, width - 1, 0, self.pages - 1)
+        self.cursor = (0, 0)
+
+    def address(self, cmd):
+        """Apply a command; only the addressing ones change the model"""
+        if len(cmd) == 6 and cmd[0] == COLUMNADDR and cmd[3] == PAGEADDR:
+            self.window = (cmd[1], cmd[2], cmd[4], cmd[5])
+            self.cursor = (cmd[1], cmd[4])
+
+    def write(self, data):
+        """Store data at the cursor, moving it on"""
+        c0, c1, p0, p1 = self.window
+        column, page = self.cursor
+        for value in data:
+            self.ram[page][column] = value
+            column += 1
+            if column > c1:
+                column = c0
+                page = p0 if page >= p1 else page + 1
+        self.cursor = (column, page)
+
+
+class SimDisplay(DisplayRAM):
+    """Stand-in for the luma ssd1306 that keeps a model of display RAM"""
+
+    def __init__(self, backend, width=128, height=64):
+        super().__init__(width, height)
+        self.backend = backend
+        self.mode = '1'
+        self.size = (width, height)
+        self.visible = True
+        self.bytes_written = 0
+
+    def preprocess(self, image):
+        return image
+
+    def command(self, *cmd):
+        self.address(cmd)
+        self.bytes_written += len(cmd)
+        self.backend.record('oled_command', bytes(cmd))
+
+    def data(self, data):
+        self.write(data)
+        self.bytes_written += len(data)
+        self.backend.record('oled_data', bytes(data))
+
+    def display(self, image):
+        """Full-frame write, like ssd1306.display()"""
+        from oled_delta import pack_pages
+        self.command(COLUMNADDR, 0, self.width - 1, PAGEADDR, 0, self.pages - 1)
+        self.data(b''.join(pack_pages(image, self.pages)))
+
+    def clear(self):
+        from PIL import Image
+        self.display(Image.new(self.mode, self.size))
+
+    def hide(self):
+        self.visible = False
+        self.backend.record('oled_power', 0)
+
+    def show(self):
+        self.visible = True
+        self.backend.record('oled_power', 1)
+
+    def screen(self):
+        """Current display RAM as a 1-bit PIL image"""
+        from PIL import Image
+        image = Image.new(self.mode, self.size)
+        pixels = image.load()
+        for page, row in enumerate(self.ram):
+            for x, byte in enumerate(row):
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        pixels[x, page * 8 + bit] = 1
+        return image
+
+
+class SimBackend:
+    """Simulated hardware that records every output with a timestamp"""
+
+    def __init__(self, clock=None, maxlen=None):
+        self.clock = clock or SystemClock()
+        self.log = deque(maxlen=maxlen)
+        self.listeners = []
+        self.pwms = {}
+        self.edge_buttons = {}
+        self.levels = {}
+        self.display = None
+
+    def record(self, kind, *args):
+        """Log one output event and pass it to any listeners"""
+        entry = (self.clock.now(), kind, args)
+        self.log.append(entry)
+        for listener in self.listeners:
+            listener(entry)
+
+    def pwm(self, pin, frequency):
+        channel = SimPWM(self, pin, frequency)
+        self.pwms[pin] = channel
+        return channel
+
+    def button_edges(self, pin, callback, bouncetime=None):
+        def edge(pin, pressed, at=None):
+            # The pin reads as whatever edge was sent last
+            self.levels[pin] = pressed
+            callback(pin, pressed, at)
+        self.edge_buttons[pin] = edge
+
+    def button_level(self, pin):
+        return self.levels.get(pin, False)
+
+    def press(self, pin=None, hold=CLICK_HOLD, at=None):
+        """Simulate a button held for hold seconds from at (default now)
+
+        On a clock that runs by itself the release edge follows from a
+        timer thread once hold has passed, as it would on the hardware. A
+        stepped clock cannot wait, so there it is sent straight away with
+        its own timestamp.
+        """
+        if pin is None:
+            pin = next(iter(self.edge_buttons))
+        at = self.clock.now() if at is None else at
+        self.record('press', pin, hold)
+        self.edge_buttons[pin](pin, True, at)
+        if not self.clock.realtime:
+            self.edge_buttons[pin](pin, False, at + hold)
+            return True
+
+        def release():
+            self.clock.sleep(at + hold - self.clock.now())
+            self.edge_buttons[pin](pin, False, at + hold)
+        threading.Thread(target=release, name='sim-release', daemon=True).start()
+        return True
+
+    def oled(self, port=1, address=0x3C):
+        self.display = SimDisplay(self)
+        return self.display
+
+    def cleanup(self):
+        self.record('cleanup')
+
+    def events(self, kind=None):
+        """Recorded (time, kind, args) entries, optionally of one kind"""
+        return [entry for entry in self.log if kind is None or entry[1] == kind]
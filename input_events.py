@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+🔘 Color Symphony Input Events
+Button edges go from the GPIO callback into a bounded queue with their
+timestamps once the pin has settled, and are turned into gestures: a click
+on every press, a double click when a second press follows quickly, and
+a long press when the button is held.
+"""
+
+import threading
+from collections import deque, namedtuple
+
+from metrics import ShowMetrics
+from scheduler import SystemClock, percentile
+
+# A level counts once the pin has not changed for this long
+DEBOUNCE = 0.02
+
+# Edges kept before the oldest is overwritten
+QUEUE_SIZE = 64
+
+# Second press within this long of the first makes a double click
+DOUBLE_CLICK = 0.3
+
+# Held at least this long makes a long press
+LONG_PRESS = 0.8
+
+Edge = namedtuple('Edge', 'at pin pressed')
+# A remote start also carries the pattern to play and when to start it
+Gesture = namedtuple('Gesture', 'kind at pin index start', defaults=(None, None))
+
+# Raw edges on one pin with less than the debounce time between them
+Burst = namedtuple('Burst', 'start last pressed edges')
+
+
+class EdgeQueue:
+    """Thread-safe ring buffer of debounced, timestamped button edges
+
+    The level a GPIO callback reports is read some time after the edge
+    and can itself be a bounce, so it is only a hint. Raw edges collect
+    in a burst per pin; once the pin has been quiet for the debounce time
+    it is read again (read(pin) gives True while pressed) and, if that
+    level differs from the last one queued, an edge is queued stamped
+    with the start of the burst.
+    """
+
+    def __init__(self, size=QUEUE_SIZE, debounce=DEBOUNCE, clock=None, read=None):
+        self.edges = deque(maxlen=size)
+        self.debounce = debounce
+        self.clock = clock or SystemClock()
+        self.read = read
+        self.condition = threading.Condition()
+        self.bursts = {}
+        self.levels = {}
+        self.closed = False
+
+        # Counters
+        self.accepted = 0
+        self.bounces = 0
+        self.overflows = 0
+        self.max_depth = 0
+
+    def put(self, pin, pressed, at):
+        """Note one raw edge; it is queued by get() once the pin settles"""
+        with self.condition:
+            burst = self.bursts.pop(pin, None)
+            if burst is not None and at - burst.last >= self.debounce:
+                # The pin held the burst's last level for the whole window
+                self.commit(pin, burst, burst.pressed)
+                burst = None
+            if burst is None:
+                self.bursts[pin] = Burst(at, at, pressed, 1)
+            else:
+                self.bursts[pin] = Burst(burst.start, at, pressed, burst.edges + 1)
+            self.condition.notify()
+
+    def commit(self, pin, burst, pressed):
+        """Queue a settled burst's level unless the pin ended where it was"""
+        if pressed == self.levels.get(pin, False):
+            self.bounces += burst.edges
+            return
+        self.bounces += burst.edges - 1
+        self.levels[pin] = pressed
+        if len(self.edges) == self.edges.maxlen:
+            self.overflows += 1
+        self.edges.append(Edge(burst.start, pin, pressed))
+        self.accepted += 1
+        self.max_depth = max(self.max_depth, len(self.edges))
+
+    def settle(self, now):
+        """Commit every burst the pin has been quiet after since the debounce time"""
+        for pin, burst in list(self.bursts.items()):
+            if now - burst.last >= self.debounce:
+                del self.bursts[pin]
+                self.commit(pin, burst, burst.pressed if self.read is None else self.read(pin))
+
+    def deadline(self):
+        """When the earliest burst settles, or None"""
+        return min((burst.last + self.debounce for burst in self.bursts.values()), default=None)
+
+    def get(self, timeout=None):
+        """Oldest settled edge, or None after timeout seconds or once closed"""
+        with self.condition:
+            end = None if timeout is None else self.clock.now() + timeout
+            while True:
+                now = self.clock.now()
+                self.settle(now)
+                if self.edges or self.closed or (end is not None and now >= end):
+                    break
+                waits = [t - now for t in (end, self.deadline()) if t is not None]
+                self.condition.wait(max(0.0, min(waits)) if waits else None)
+            return self.edges.popleft() if self.edges else None
+
+    def depth(self):
+        return len(self.edges)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class GestureRecognizer:
+    """Turns debounced edges into click, double_click and long_press
+
+    A click is reported as soon as the button goes down, so starting the
+    next pattern never waits for the double-click window; a double click
+    or long press then follows it as a separate gesture.
+    """
+
+    def __init__(self, double_click=DOUBLE_CLICK, long_press=LONG_PRESS):
+        self.double_click = double_click
+        self.long_press = long_press
+        self.down = {}
+        self.last_click = {}
+
+    def feed(self, edge):
+        """Gestures completed by this edge"""
+        pin = edge.pin
+        if edge.pressed:
+            self.down[pin] = edge.at
+            last = self.last_click.pop(pin, None)
+            if last is not None and edge.at - last <= self.double_click:
+                return [Gesture('double_click', edge.at, pin)]
+            self.last_click[pin] = edge.at
+            return [Gesture('click', edge.at, pin)]
+
+        down = self.down.pop(pin, None)
+        if down is not None and edge.at - down >= self.long_press:
+            self.last_click.pop(pin, None)
+            return [Gesture('long_press', down + self.long_press, pin)]
+        return []
+
+    def deadline(self):
+        """When the earliest held button becomes a long press, or None"""
+        return min((at + self.long_press for at in self.down.values()), default=None)
+
+    def poll(self, now):
+        """Long presses of buttons still held at now"""
+        gestures = []
+        for pin, at in list(self.down.items()):
+            if now - at >= self.long_press:
+                del self.down[pin]
+                self.last_click.pop(pin, None)
+                gestures.append(Gesture('long_press', at + self.long_press, pin))
+        return gestures
+
+
+class InputDispatcher:
+    """Feeds queued edges to the recognizer and gestures to a handler
+
+    Runs on its own thread on a real clock; on a stepped virtual clock
+    every edge is handled inline, like the render worker does.
+    """
+
+    def __init__(self, handler, clock, threaded=True, queue=None, recognizer=None, metrics=None,
+                 read=None):
+        self.handler = handler
+        self.clock = clock
+        self.threaded = threaded
+        self.queue = queue or EdgeQueue(clock=clock, read=read)
+        self.recognizer = recognizer or GestureRecognizer()
+        self.metrics = metrics or ShowMetrics()
+        self.latencies = deque(maxlen=100)
+        self.dispatched = 0
+        self.lock = threading.Lock()
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.loop, name='input', daemon=True)
+            self.thread.start()
+
+    def edge(self, pin, pressed, at=None):
+        """Backend edge callback: only timestamps and queues"""
+        self.queue.put(pin, pressed, self.clock.now() if at is None else at)
+        if not self.threaded:
+            self.pump()
+
+    def pump(self):
+        """Handle every settled edge and any long press that is due"""
+        while True:
+            edge = self.queue.get(0)
+            if edge is None:
+                break
+            self.process(edge)
+        self.process(None)
+
+    def loop(self):
+        while not self.queue.closed:
+            deadline = self.recognizer.deadline()
+            timeout = None if deadline is None else max(0.0, deadline - self.clock.now())
+            self.process(self.queue.get(timeout))
+
+    def process(self, edge):
+        with self.lock:
+            gestures = self.recognizer.feed(edge) if edge is not None else []
+            gestures += self.recognizer.poll(self.clock.now())
+        for gesture in gestures:
+            # How long the edge (or long-press moment) waited to be handled
+            latency = max(0.0, self.clock.now() - gesture.at)
+            self.latencies.append(latency)
+            self.metrics.input_dispatch.observe(latency)
+            self.dispatched += 1
+            self.handler(gesture)
+
+    def stop(self):
+        self.queue.close()
+        if self.thread is not None:
+            self.thread.join(1.0)
+
+    def stats(self):
+        values = sorted(self.latencies)
+        return {
+            'edges': self.queue.accepted,
+            'bounces': self.queue.bounces,
+            'overflows': self.queue.overflows,
+            'depth': self.queue.depth(),
+            'max_depth': self.queue.max_depth,
+            'gestures': self.dispatched,
+            'dispatch_p50': percentile(values, 0.50),
+            'dispatch_max': values[-1] if values else 0.0,
+        }
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+💡 Color Symphony LED Output
+Maps colors through a precomputed gamma table and skips PWM writes that
+would not change anything.
+"""
+
+from session_log import NullRecorder
+
+# Perceptual gamma of the RGB LED and resolution of the lookup table
+GAMMA = 2.2
+LUT_SIZE = 256
+
+
+def gamma_table(gamma=GAMMA, size=LUT_SIZE):
+    """Duty cycle (0-100) for each of size evenly spaced levels"""
+    top = size - 1
+    return tuple(round(100 * (i / top) ** gamma, 2) for i in range(size))
+
+
+def level_index(level, size=LUT_SIZE):
+    """Table index of a 0-1 level"""
+    if level <= 0:
+        return 0
+    if level >= 1:
+        return size - 1
+    return int(level * (size - 1) + 0.5)
+
+
+def breathing_curve(steps=50, peak=1.0, size=LUT_SIZE):
+    """Table indices for one fade in and out, computed once"""
+    rising = [level_index(i / steps * peak, size) for i in range(steps)]
+    falling = [level_index(i / steps * peak, size) for i in range(steps, 0, -1)]
+    return tuple(rising + falling)
+
+
+def breath(period, rate, peak=1.0, gamma=GAMMA, size=LUT_SIZE):
+    """One fade in and out over period seconds as (table index, hold) steps
+
+    The curve is sampled rate times a second, then any step that would
+    write the duty cycle already set is folded into the hold of the one
+    before it, so playing it back never makes a call that changes nothing.
+    """
+    table = gamma_table(gamma, size)
+    tick = 1 / rate
+    steps = []
+    for index in breathing_curve(max(1, round(period * rate / 2)), peak, size):
+        if steps and table[index] == table[steps[-1][0]]:
+            steps[-1][1] += tick
+        else:
+            steps.append([index, tick])
+    return tuple((index, hold) for index, hold in steps)
+
+
+class LedOutput:
+    """Gamma-corrected RGB output that only writes channels that changed
+
+    Every change that reaches the LED, whichever way it was set, goes to
+    the session recorder as the duty cycles now on the channels.
+    """
+
+    def __init__(self, channels, gamma=GAMMA, size=LUT_SIZE, recorder=None):
+        self.channels = channels
+        self.size = size
+        self.table = gamma_table(gamma, size)
+        self.recorder = recorder or NullRecorder()
+        self.last = [None] * len(channels)
+        self.writes = 0
+        self.skipped = 0
+
+    def set(self, *levels):
+        """Set every channel from a 0-1 level"""
+        size = self.size
+        self.set_index(*(level_index(level, size) for level in levels))
+
+    def set_index(self, *indices):
+        """Set every channel from a precomputed table index"""
+        table = self.table
+        last = self.last
+        writes = self.writes
+        for n, index in enumerate(indices):
+            duty = table[index]
+            if duty == last[n]:
+                self.skipped += 1
+                continue
+            self.channels[n].ChangeDutyCycle(duty)
+            last[n] = duty
+            self.writes += 1
+        if self.writes != writes and self.recorder.enabled:
+            self.recorder.color(*last)
+
+    def invalidate(self):
+        """Forget cached duty cycles, e.g. after the PWM was restarted"""
+        self.last = [None] * len(self.channels)
+
+    def stats(self):
+        return {'writes': self.writes, 'skipped': self.skipped}
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+📈 Color Symphony Metrics
+Histograms and counters for the show's hot paths, served over HTTP in
+Prometheus text format and optionally appended to a JSON lines file.
+A show without metrics gets no-op instruments, so the hooks cost a
+method call and nothing more.
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = 'colorsymphony'
+DEFAULT_PORT = 9105
+LOG_INTERVAL = 10.0
+
+# Bucket upper bounds in seconds
+LATENESS_BUCKETS = (0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+FRAME_BUCKETS = (0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+INPUT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram like a Prometheus client's"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self):
+        """(upper bound, count) pairs, ending with +Inf"""
+        with self.lock:
+            counts = list(self.counts)
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def lines(self):
+        for bound, total in self.cumulative():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            yield f'{self.name}_bucket{{le="{le}"}} {total}'
+        yield f"{self.name}_sum {self.sum!r}"
+        yield f"{self.name}_count {self.count}"
+
+    def value(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {('+Inf' if bound == float('inf') else repr(bound)): total
+                        for bound, total in self.cumulative()},
+        }
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.total += amount
+
+    def lines(self):
+        yield f"{self.name} {self.total}"
+
+    def value(self):
+        return self.total
+
+
+class Collected:
+    """A value read from existing show counters when the metrics are read"""
+
+    def __init__(self, name, kind, help, read):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.read = read
+
+    def lines(self):
+        yield f"{self.name} {self.read()}"
+
+    def value(self):
+        return self.read()
+
+
+class NullMetric:
+    """Stands in for every instrument when metrics are off"""
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+
+NULL = NullMetric()
+
+
+class Registry:
+    """Every metric of one process, rendered for Prometheus or as JSON"""
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def add(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, buckets):
+        return self.add(Histogram(f"{self.prefix}_{name}", help, buckets))
+
+    def counter(self, name, help):
+        return self.add(Counter(f"{self.prefix}_{name}", help))
+
+    def collect(self, name, kind, help, read):
+        return self.add(Collected(f"{self.prefix}_{name}", kind, help, read))
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self.metrics)
+        return {metric.name[len(self.prefix) + 1:]: metric.value() for metric in metrics}
+
+
+class ShowMetrics:
+    """The instruments the shows record into; no-ops without a registry"""
+
+    def __init__(self, registry=None):
+        self.registry = registry
+        self.exporters = []
+        if registry is None:
+            histogram = counter = lambda *args: NULL
+        else:
+            histogram, counter = registry.histogram, registry.counter
+
+        self.note_lateness = histogram(
+            'note_lateness_seconds', "How late each note started", LATENESS_BUCKETS)
+        self.event_lateness = histogram(
+            'event_lateness_seconds', "How late each timeline event fired", LATENESS_BUCKETS)
+        self.input_latency = histogram(
+            'input_latency_seconds', "Button press to first note of the pattern", INPUT_BUCKETS)
+        self.frame_render = histogram(
+            'frame_render_seconds', "Time to paint one OLED frame", FRAME_BUCKETS)
+        self.frame_transfer = histogram(
+            'frame_transfer_seconds', "Time to send one OLED frame over I2C", FRAME_BUCKETS)
+        self.input_dispatch = histogram(
+            'input_dispatch_seconds', "Button edge to gesture handler", LATENESS_BUCKETS)
+        self.wake_latency = histogram(
+            'wake_latency_seconds', "Button press to outputs back on after standby", INPUT_BUCKETS)
+        self.presses = counter('button_presses_total', "Button presses")
+        self.standbys = counter('standby_total', "Times the show powered down")
+        self.patterns = counter('patterns_played_total', "Patterns started")
+        self.skipped = counter('patterns_skipped_total', "Patterns cut short by a press")
+        self.dropped_events = counter('events_dropped_total', "Late cosmetic events skipped")
+        self.buzzer_writes = counter('buzzer_pwm_writes_total', "Buzzer PWM writes")
+
+    @property
+    def enabled(self):
+        return self.registry is not None
+
+    def observe_run(self, stats):
+        """Record one scheduler run after it finished, off the timing path"""
+        if not self.enabled:
+            return
+        self.patterns.inc()
+        if stats.cancelled:
+            self.skipped.inc()
+        self.dropped_events.inc(stats.dropped)
+        for kind, lateness in stats.samples:
+            self.event_lateness.observe(lateness)
+            if kind == 'tone_on':
+                self.note_lateness.observe(lateness)
+
+    def watch(self, show):
+        """Export the counters the show already keeps, read on demand"""
+        if not self.enabled:
+            return
+        collect = self.registry.collect
+        collect('led_pwm_writes_total', 'counter', "LED PWM writes",
+                lambda: show.led.writes)
+        collect('led_pwm_writes_skipped_total', 'counter', "LED writes skipped as unchanged",
+                lambda: show.led.skipped)
+        inputs = getattr(show, 'inputs', None)
+        if inputs is not None:
+            collect('input_queue_depth', 'gauge', "Button edges waiting to be handled",
+                    inputs.queue.depth)
+            collect('input_bounces_total', 'counter', "Button edges dropped as bounce",
+                    lambda: inputs.queue.bounces)
+            collect('input_overflows_total', 'counter', "Button edges lost to a full queue",
+                    lambda: inputs.queue.overflows)
+        renderer = getattr(show, 'renderer', None)
+        if renderer is not None:
+            collect('frames_rendered_total', 'counter', "OLED frames drawn",
+                    lambda: renderer.rendered)
+            collect('frames_dropped_total', 'counter', "OLED frames replaced before drawing",
+                    lambda: renderer.dropped)
+            collect('frame_errors_total', 'counter', "OLED frames lost to a failed transfer",
+                    lambda: renderer.errors)
+            collect('frame_failures_total', 'counter', "OLED frames lost to an error drawing them",
+                    lambda: renderer.failures)
+        oled = getattr(show, 'oled', None)
+        if oled is not None:
+            collect('oled_bytes_sent_total', 'counter', "Bytes sent to the OLED",
+                    lambda: oled.bytes_sent)
+        frames = getattr(show, 'frames', None)
+        if frames is not None:
+            collect('frame_cache_hits_total', 'counter', "Frame cache hits",
+                    lambda: frames.hits)
+            collect('frame_cache_misses_total', 'counter', "Frame cache misses",
+                    lambda: frames.misses)
+
+    @classmethod
+    def from_options(cls, port=None, log=None, interval=LOG_INTERVAL):
+        """Enabled metrics with the requested exporters, or None"""
+        if port is None and log is None:
+            return None
+        metrics = cls(Registry())
+        if port is not None:
+            metrics.exporters.append(MetricsServer(metrics.registry, port))
+        if log is not None:
+            metrics.exporters.append(MetricsLog(metrics.registry, log, interval))
+        return metrics
+
+    def close(self):
+        """Stop the exporters; the JSON log gets a final line"""
+        for exporter in self.exporters:
+            exporter.close()
+
+
+class MetricsServer:
+    """Serves /metrics on a local port from a background thread"""
+
+    def __init__(self, registry, port=DEFAULT_PORT, host='127.0.0.1'):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsLog:
+    """Appends a JSON snapshot of every metric to a file at an interval"""
+
+    def __init__(self, registry, path, interval=LOG_INTERVAL):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        threading.Thread(target=self.loop, name='metrics-log', daemon=True).start()
+
+    def loop(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        line = json.dumps({'time': time.time(), **self.registry.snapshot()})
+        with open(self.path, 'a') as f:
+            f.write(line + "\n")
+
+    def close(self):
+        self.stopped.set()
+        self.write()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+📟 Color Symphony Delta Display
+Wraps the ssd1306 device, remembers the last frame sent and only pushes
+the page/column windows that changed over I2C.
+"""
+
+from PIL import Image
+
+# SSD1306 addressing commands
+COLUMNADDR = 0x21
+PAGEADDR = 0x22
+
+# Bytes spent on the column/page address commands for one window
+WINDOW_COMMAND_BYTES = 6
+
+
+def pack_pages(image, pages):
+    """Pack a 1-bit image into ssd1306 page order, one bytes object per page"""
+    # Rotated clockwise, every row holds one display column from the bottom
+    # pixel up, so each byte is a vertical 8-pixel run with the top as LSB
+    data = image.transpose(Image.Transpose.ROTATE_270).tobytes()
+    return [data[pages - 1 - page::pages] for page in range(pages)]
+
+
+def changed_span(old, new):
+    """First and last differing column of two page rows, or None"""
+    if old == new:
+        return None
+    first = 0
+    while old[first] == new[first]:
+        first += 1
+    last = len(new) - 1
+    while old[last] == new[last]:
+        last -= 1
+    return first, last
+
+
+def merge_windows(spans):
+    """Group changed pages into rectangular windows when that saves bytes"""
+    windows = []
+    for page, (first, last) in spans:
+        if windows:
+            p0, p1, c0, c1 = windows[-1]
+            if p1 == page - 1:
+                merged_cols = max(c1, last) - min(c0, first) + 1
+                merged = merged_cols * (page - p0 + 1)
+                separate = (c1 - c0 + 1) * (p1 - p0 + 1) + (last - first + 1) + WINDOW_COMMAND_BYTES
+                if merged <= separate:
+                    windows[-1] = (p0, page, min(c0, first), max(c1, last))
+                    continue
+        windows.append((page, page, first, last))
+    return windows
+
+
+class DeltaDisplay:
+    """ssd1306 wrapper that only sends changed regions of each frame"""
+
+    def __init__(self, device):
+        self.device = device
+        self.mode = device.mode
+        self.size = device.size
+        self.width = device.width
+        self.height = device.height
+        self.pages = device.height // 8
+        self.colstart = None
+        self.last_pages = None
+
+        # Traffic counters
+        self.frames = 0
+        self.skipped_frames = 0
+        self.bytes_sent = 0
+        self.last_frame_bytes = 0
+        self.full_frame_bytes = self.width * self.pages + WINDOW_COMMAND_BYTES
+
+    def __getattr__(self, name):
+        return getattr(self.device, name)
+
+    def display(self, image):
+        """Send only the parts of image that differ from the last frame"""
+        image = self.device.preprocess(image)
+        if image.mode != '1':
+            image = image.convert('1')
+        self.display_pages(pack_pages(image, self.pages))
+
+    def display_pages(self, new_pages):
+        """Send only the changed parts of a frame already in page order
+
+        Each window is one command and one data() write, so the serial
+        interface can send it in a single bulk transfer.
+        """
+        if self.colstart is None:
+            self.colstart = getattr(self.device, '_colstart', 0)
+
+        if self.last_pages is None:
+            windows = [(0, self.pages - 1, 0, self.width - 1)]
+        else:
+            spans = []
+            for page in range(self.pages):
+                span = changed_span(self.last_pages[page], new_pages[page])
+                if span is not None:
+                    spans.append((page, span))
+            windows = merge_windows(spans)
+
+        sent = 0
+        for p0, p1, c0, c1 in windows:
+            self.device.command(
+                COLUMNADDR, self.colstart + c0, self.colstart + c1,
+                PAGEADDR, p0, p1)
+            data = b''.join(new_pages[page][c0:c1 + 1] for page in range(p0, p1 + 1))
+            self.device.data(list(data))
+            sent += WINDOW_COMMAND_BYTES + len(data)
+
+        self.last_pages = new_pages
+        self.frames += 1
+        if not windows:
+            self.skipped_frames += 1
+        self.bytes_sent += sent
+        self.last_frame_bytes = sent
+
+    def clear(self):
+        """Blank the panel and forget the previous frame"""
+        self.device.clear()
+        self.last_pages = [bytes(self.width)] * self.pages
+
+    def invalidate(self):
+        """Force the next frame to be sent in full"""
+        self.last_pages = None
+
+    def stats(self):
+        full = self.frames * self.full_frame_bytes
+        return {
+            'frames': self.frames,
+            'skipped_frames': self.skipped_frames,
+            'bytes_sent': self.bytes_sent,
+            'bytes_full_frames': full,
+            'saving': 1 - self.bytes_sent / full if full else 0.0,
+        }
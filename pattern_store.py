@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+🎼 Color Symphony Pattern Store
+Loads the note table and color patterns from a directory of JSON or TOML
+files, validates them once and keeps a packed binary copy on disk, so
+later starts skip parsing. Edited files are picked up by reload().
+"""
+
+import hashlib
+import json
+import os
+import struct
+import time
+from array import array
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 reads JSON only
+    tomllib = None
+
+PATTERN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns')
+NOTES_NAME = 'notes'
+EXTENSIONS = ('.json', '.toml')
+
+# Compiled library, machine-local and in native byte order
+CACHE_DIR = '.cache'
+CACHE_FILE = 'patterns.bin'
+MAGIC = b'CSPT'
+VERSION = 1
+HEADER = struct.Struct('=4sH20sHH')   # magic, version, source key, notes, patterns
+LENGTH = struct.Struct('=H')
+
+# Same default as compile_pattern when a pattern has no durations
+DEFAULT_DURATION = 0.3
+
+
+class PatternError(ValueError):
+    """A pattern file that cannot be used"""
+
+
+def source_files(directory):
+    """Pattern and note files in load order"""
+    return sorted(name for name in os.listdir(directory)
+                  if name.endswith(EXTENSIONS) and not name.startswith('.'))
+
+
+def signature(directory, files):
+    """Key of the current sources, from names, sizes and mtimes"""
+    digest = hashlib.sha1()
+    for name in files:
+        stat = os.stat(os.path.join(directory, name))
+        digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+    return digest.digest()
+
+
+def read_source(path):
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise PatternError(f"{path}: TOML needs Python 3.11 or newer")
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def validate_notes(data, source):
+    if not isinstance(data, dict) or not data:
+        raise PatternError(f"{source}: expected a table of note frequencies")
+    for name, frequency in data.items():
+        if isinstance(frequency, bool) or not isinstance(frequency, int) or not 0 < frequency < 65536:
+            raise PatternError(f"{source}: note {name!r} needs a frequency in Hz, got {frequency!r}")
+    return dict(data)
+
+
+def validate_pattern(data, notes, source):
+    """Check one pattern and return it in the shape the shows use"""
+    if not isinstance(data, dict):
+        raise PatternError(f"{source}: expected a table")
+    name = data.get('name')
+    if not isinstance(name, str) or not name:
+        raise PatternError(f"{source}: missing 'name'")
+
+    steps = data.get('notes')
+    if not isinstance(steps, list) or not steps:
+        raise PatternError(f"{source}: 'notes' must be a non-empty list")
+    for note in steps:
+        if not isinstance(note, str) or note not in notes:
+            raise PatternError(f"{source}: unknown note {note!r}")
+
+    colors = data.get('colors')
+    if not isinstance(colors, list) or len(colors) != len(steps):
+        raise PatternError(f"{source}: need one color per note")
+    for color in colors:
+        if (not isinstance(color, list) or len(color) != 3
+                or not all(isinstance(c, (int, float)) and not isinstance(c, bool) and 0 <= c <= 1
+                           for c in color)):
+            raise PatternError(f"{source}: color {color!r} is not three levels between 0 and 1")
+
+    durations = data.get('durations', [DEFAULT_DURATION] * len(steps))
+    if not isinstance(durations, list) or len(durations) != len(steps):
+        raise PatternError(f"{source}: need one duration per note")
+    for duration in durations:
+        if isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration <= 0:
+            raise PatternError(f"{source}: duration {duration!r} must be a positive number of seconds")
+
+    return {
+        'name': name,
+        'title': str(data.get('title', name)),
+        'icon': str(data.get('icon', '')),
+        'message': str(data.get('message', '')),
+        'colors': [tuple(float(c) for c in color) for color in colors],
+        'notes': list(steps),
+        'durations': [float(d) for d in durations],
+    }
+
+
+def parse_directory(directory, files):
+    """Read and validate every file; returns (notes, patterns)"""
+    notes = None
+    sources = []
+    for name in files:
+        path = os.path.join(directory, name)
+        try:
+            data = read_source(path)
+        except (OSError, ValueError) as error:
+            raise PatternError(f"{name}: {error}") from error
+        if os.path.splitext(name)[0] == NOTES_NAME:
+            notes = validate_notes(data, name)
+        else:
+            sources.append((name, data))
+
+    if notes is None:
+        raise PatternError(f"{directory}: no {NOTES_NAME}.json or {NOTES_NAME}.toml")
+    if not sources:
+        raise PatternError(f"{directory}: no pattern files")
+
+    patterns = []
+    names = set()
+    for name, data in sources:
+        pattern = validate_pattern(data, notes, name)
+        if pattern['name'] in names:
+            raise PatternError(f"{name}: pattern name {pattern['name']!r} is used twice")
+        names.add(pattern['name'])
+        patterns.append(pattern)
+    return notes, patterns
+
+
+def pack_string(text):
+    data = text.encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+def pack_library(key, notes, patterns):
+    """Packed binary form: per pattern, arrays of colors, note indices and durations"""
+    note_index = {name: i for i, name in enumerate(notes)}
+    parts = [HEADER.pack(MAGIC, VERSION, key, len(notes), len(patterns))]
+    for name, frequency in notes.items():
+        parts.append(pack_string(name))
+        parts.append(LENGTH.pack(frequency))
+    for pattern in patterns:
+        for field in ('name', 'title', 'icon', 'message'):
+            parts.append(pack_string(pattern[field]))
+        parts.append(LENGTH.pack(len(pattern['notes'])))
+        parts.append(array('d', [c for color in pattern['colors'] for c in color]).tobytes())
+        parts.append(array('H', [note_index[note] for note in pattern['notes']]).tobytes())
+        parts.append(array('d', pattern['durations']).tobytes())
+    return b''.join(parts)
+
+
+def unpack_library(data):
+    """(key, notes, patterns) from pack_library() output"""
+    view = memoryview(data)
+    magic, version, key, note_count, pattern_count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a pattern cache of this version")
+    offset = HEADER.size
+
+    def take(size):
+        nonlocal offset
+        chunk = view[offset:offset + size]
+        if len(chunk) != size:
+            raise ValueError("truncated pattern cache")
+        offset += size
+        return chunk
+
+    def take_string():
+        size, = LENGTH.unpack(take(LENGTH.size))
+        return str(take(size), 'utf-8')
+
+    def take_array(typecode, count):
+        values = array(typecode)
+        values.frombytes(take(values.itemsize * count))
+        return values
+
+    notes = {}
+    for _ in range(note_count):
+        name = take_string()
+        notes[name] = LENGTH.unpack(take(LENGTH.size))[0]
+    names = list(notes)
+
+    patterns = []
+    for _ in range(pattern_count):
+        pattern = {field: take_string() for field in ('name', 'title', 'icon', 'message')}
+        steps = LENGTH.unpack(take(LENGTH.size))[0]
+        levels = take_array('d', 3 * steps)
+        pattern['colors'] = [tuple(levels[i:i + 3]) for i in range(0, len(levels), 3)]
+        pattern['notes'] = [names[i] for i in take_array('H', steps)]
+        pattern['durations'] = take_array('d', steps).tolist()
+        patterns.append(pattern)
+    return bytes(key), notes, patterns
+
+
+class PatternLibrary:
+    """The note table and patterns of one directory, reloadable while running"""
+
+    def __init__(self, directory=PATTERN_DIR, cache=True):
+        self.directory = directory
+        self.cache_path = os.path.join(directory, CACHE_DIR, CACHE_FILE) if cache else None
+        self.key = None
+        self.notes = {}
+        self.patterns = []
+        self.generation = 0
+        self.loaded_from = None
+        self.load_time = 0.0
+        self.load()
+
+    def load(self):
+        """Load from the cache if it matches the sources, else parse them"""
+        start = time.perf_counter()
+        files = source_files(self.directory)
+        key = signature(self.directory, files)
+
+        cached = self.read_cache(key)
+        if cached is not None:
+            self.notes, self.patterns = cached
+            self.loaded_from = 'cache'
+        else:
+            # Remember the key first so a broken file is reported once
+            self.key = key
+            notes, patterns = parse_directory(self.directory, files)
+            self.notes, self.patterns = notes, patterns
+            self.loaded_from = 'files'
+            self.write_cache(key)
+
+        self.key = key
+        self.generation += 1
+        self.load_time = time.perf_counter() - start
+
+    def read_cache(self, key):
+        if self.cache_path is None:
+            return None
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached_key, notes, patterns = unpack_library(f.read())
+        except (OSError, ValueError, struct.error, IndexError, UnicodeDecodeError):
+            return None
+        if cached_key != key:
+            return None
+        return notes, patterns
+
+    def write_cache(self, key):
+        if self.cache_path is None:
+            return
+        try:
+            data = pack_library(key, self.notes, self.patterns)
+        except struct.error:
+            # A text or pattern too long for the packed lengths just means
+            # parsing every start
+            return
+        temporary = self.cache_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, self.cache_path)
+        except OSError:
+            # So does a read-only pattern directory
+            pass
+
+    def changed(self):
+        """Whether any source file was added, removed or edited since loading"""
+        try:
+            return signature(self.directory, source_files(self.directory)) != self.key
+        except OSError:
+            return False
+
+    def reload(self):
+        """Load edited files if there are any; True when the patterns changed
+
+        Cheap enough to poll between patterns: it only stats the sources.
+        A broken edit keeps the current patterns.
+        """
+        if not self.changed():
+            return False
+        try:
+            self.load()
+        except (OSError, PatternError) as error:
+            print(f"⚠️  Keeping current patterns: {error}")
+            return False
+        return True
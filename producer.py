@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+🏭 Color Symphony Producer
+A producer thread that keeps a few items ready ahead of the consumer in a
+bounded queue, shared by the generative patterns and the audio analysis.
+However the producer ends, the consumer hears about it: the stream ends
+when it runs out, and whatever it raised is raised again on the consumer's
+side instead of leaving it waiting forever.
+"""
+
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Ends the stream with what the producer raised
+Failure = namedtuple('Failure', 'error')
+
+
+class Producer(ABC):
+    """Items from produce() on their own thread, in order, by iterating
+
+    At most ahead items wait in the queue, so memory stays the same
+    however long the stream is. Subclasses implement produce().
+    """
+
+    def __init__(self, name, ahead):
+        self.queue = queue.Queue(maxsize=ahead)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.underruns = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    @abstractmethod
+    def produce(self):
+        """Yield the items, in order"""
+
+    def run(self):
+        end = None
+        try:
+            for item in self.produce():
+                if not self.put(item):
+                    return
+        except Exception as error:
+            end = Failure(error)
+        finally:
+            self.put(end)
+
+    def put(self, item):
+        """Wait for room in the queue; False once the consumer is gone"""
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __iter__(self):
+        while True:
+            if self.queue.empty() and self.thread.is_alive():
+                self.underruns += 1
+            item = self.queue.get()
+            if item is None:
+                return
+            if isinstance(item, Failure):
+                raise item.error
+            yield item
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join(1.0)
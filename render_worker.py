@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+🧵 Color Symphony Render Worker
+Draws and transfers OLED frames on a background thread so the LED and
+buzzer timing never waits on the I2C bus. A failed transfer (a loose cable
+or a brownout on the bus) is counted and the next frame goes out in full;
+so is a frame that raised anything else while being drawn. Either way the
+worker keeps running.
+"""
+
+import threading
+import time
+
+from PIL import Image
+
+from metrics import ShowMetrics
+from session_log import NullRecorder
+
+# Frames per second of framebuffer animations; kept here, away from NumPy,
+# so the shows can pace them without loading it at startup
+FRAME_RATE = 40
+
+
+def frame_kind(frame, pages):
+    """What a submitted frame is, for error messages"""
+    kind = 'framebuffer frame' if pages else 'image frame'
+    if callable(frame):
+        kind += f" from {getattr(frame, '__qualname__', type(frame).__name__)}"
+    return kind
+
+
+class RenderWorker:
+    """Display thread fed by a latest-frame-wins slot"""
+
+    def __init__(self, device, threaded=True, metrics=None, recorder=None):
+        self.device = device
+        self.threaded = threaded
+        self.metrics = metrics or ShowMetrics()
+        self.recorder = recorder or NullRecorder()
+        self.buffer = Image.new(device.mode, device.size)
+        self.framebuffer = None
+
+        # A single pending slot: newer frames replace ones not yet drawn
+        self.pending = None
+        self.busy = False
+        self.condition = threading.Condition()
+        self.running = True
+
+        # Counters
+        self.submitted = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.failures = 0
+        self.failed_kinds = set()
+        self.last_error = None
+        self.render_time = 0.0
+
+        # Without a thread (virtual clock runs) every frame is drawn inline
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self.loop, name='oled-render', daemon=True)
+            self.thread.start()
+
+    def submit(self, frame, pages=False, packed=False):
+        """Queue a frame: a ready image or a callable that paints a buffer
+
+        With pages=True the callable paints a NumPy Framebuffer instead,
+        which goes to the display already packed, skipping PIL. With
+        packed=True it takes no buffer and returns pages packed already,
+        such as a cached frame, which go out as they are.
+        """
+        pages = pages or packed
+        if not self.threaded:
+            self.submitted += 1
+            self.draw((frame, pages, packed))
+            return
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (frame, pages, packed)
+            self.submitted += 1
+            self.condition.notify_all()
+
+    def loop(self):
+        """Worker thread: paint the latest frame and transfer it"""
+        while True:
+            with self.condition:
+                while self.pending is None and self.running:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                frame = self.pending
+                self.pending = None
+                self.busy = True
+
+            try:
+                self.draw(frame)
+            finally:
+                with self.condition:
+                    self.busy = False
+                    self.condition.notify_all()
+
+    def draw(self, frame):
+        """Paint a frame and transfer it"""
+        frame, pages, packed = frame
+        start = time.perf_counter()
+        try:
+            if packed:
+                buffer = frame()
+            elif pages:
+                if self.framebuffer is None:
+                    # Only frames rasterized here need NumPy
+                    from framebuffer import Framebuffer
+                    self.framebuffer = Framebuffer(*self.device.size)
+                buffer = self.framebuffer
+                frame(buffer)
+            else:
+                buffer = self.buffer
+                if callable(frame):
+                    frame(buffer)
+                else:
+                    buffer.paste(frame)
+        except Exception as error:
+            # A bug in a frame builder costs that frame, not the display
+            self.failed(frame, pages, error)
+            return
+        painted = time.perf_counter()
+
+        try:
+            if pages:
+                self.device.display_pages(buffer if packed else buffer.pack())
+            else:
+                self.device.display(buffer)
+        except OSError as error:
+            # The panel may hold part of the frame, so the next one goes in full
+            self.errors += 1
+            self.last_error = error
+            self.invalidate()
+            if self.errors == 1:
+                print(f"⚠️  OLED transfer failed ({error}); still trying")
+            return
+        except Exception as error:
+            self.invalidate()
+            self.failed(frame, pages, error)
+            return
+        done = time.perf_counter()
+
+        self.rendered += 1
+        self.render_time += done - start
+        self.metrics.frame_render.observe(painted - start)
+        self.metrics.frame_transfer.observe(done - painted)
+        if self.recorder.enabled:
+            self.recorder.frame(self.device.last_pages)
+
+    def invalidate(self):
+        """Make the next frame go out in full"""
+        invalidate = getattr(self.device, 'invalidate', None)
+        if invalidate is not None:
+            invalidate()
+
+    def failed(self, frame, pages, error):
+        """Count a frame that raised; each kind of frame is reported once"""
+        self.failures += 1
+        self.last_error = error
+        kind = frame_kind(frame, pages)
+        if kind not in self.failed_kinds:
+            self.failed_kinds.add(kind)
+            print(f"⚠️  OLED {kind} failed ({type(error).__name__}: {error}); skipping it")
+
+    def flush(self, timeout=None):
+        """Wait until every submitted frame was drawn or dropped"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.pending is None and not self.busy, timeout)
+
+    def stop(self, timeout=1.0):
+        """Finish the pending frame and stop the worker thread"""
+        self.flush(timeout)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'submitted': self.submitted,
+            'rendered': self.rendered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'failures': self.failures,
+            'mean_render_time': self.render_time / self.rendered if self.rendered else 0.0,
+        }
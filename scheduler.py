@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+⏱️ Color Symphony Scheduler
+Turns patterns into timelines with absolute deadlines on the monotonic clock,
+so rendering and PWM overhead never pile up into rhythm drift.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+# Gap of silence between two notes (seconds)
+NOTE_GAP = 0.05
+
+# Final busy-wait window before a deadline (seconds)
+SPIN_WINDOW = 0.001
+
+# Events that may be skipped when running this late (seconds)
+MAX_LATENESS = 0.05
+
+# Cosmetic events: dropped when hopelessly late and never busy-waited for
+COSMETIC = ('display', 'led')
+
+# One timeline entry: offset from pattern start, handler name and its arguments
+Event = namedtuple('Event', ['at', 'kind', 'args'])
+
+
+class SystemClock:
+    """Monotonic wall clock used on the real device"""
+
+    realtime = True
+
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, timeout):
+        """Sleep up to timeout, waking early when event is set"""
+        return event.wait(max(0.0, timeout))
+
+
+def compile_pattern(pattern, notes, gap=NOTE_GAP, display=False):
+    """Compile a pattern into a sorted list of timeline events"""
+    durations = pattern.get('durations', [0.3] * len(pattern['notes']))
+    events = []
+    t = 0.0
+
+    for i, (color, note, duration) in enumerate(zip(pattern['colors'], pattern['notes'], durations)):
+        # Light and sound go first, the display is the least time-critical
+        events.append(Event(t, 'color', tuple(color)))
+        events.append(Event(t, 'tone_on', (notes[note],)))
+        if display:
+            events.append(Event(t, 'display', (pattern, i)))
+        events.append(Event(t + duration, 'tone_off', ()))
+        t += duration + gap
+
+    # Fade out
+    events.append(Event(t, 'color', (0, 0, 0)))
+    return events
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class JitterStats:
+    """Per-event lateness collected during one timeline run"""
+
+    def __init__(self):
+        self.samples = []
+        self.dropped = 0
+        self.first_fire = None
+        self.cancelled = False
+
+    def add(self, kind, lateness):
+        self.samples.append((kind, lateness))
+
+    def drop(self, kind, lateness):
+        self.dropped += 1
+
+    def summary(self, kind=None):
+        """Lateness statistics in seconds, optionally for one event kind"""
+        values = sorted(late for k, late in self.samples if kind is None or k == kind)
+        if not values:
+            return {'count': 0, 'dropped': self.dropped, 'mean': 0.0,
+                    'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'count': len(values),
+            'dropped': self.dropped,
+            'mean': sum(values) / len(values),
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'p99': percentile(values, 0.99),
+            'max': values[-1],
+        }
+
+    def __str__(self):
+        s = self.summary()
+        return (f"{s['count']} events, mean {s['mean'] * 1000:.2f} ms, "
+                f"p95 {s['p95'] * 1000:.2f} ms, max {s['max'] * 1000:.2f} ms, "
+                f"{s['dropped']} dropped")
+
+
+class Scheduler:
+    """Fires timeline events at absolute deadlines"""
+
+    def __init__(self, handlers, clock=None, spin=SPIN_WINDOW,
+                 max_lateness=MAX_LATENESS, droppable=COSMETIC, coarse=COSMETIC):
+        self.handlers = handlers
+        self.clock = clock or SystemClock()
+        self.spin = spin
+        self.max_lateness = max_lateness
+        self.droppable = set(droppable)
+        self.coarse = set(coarse)
+        self.last_stats = JitterStats()
+
+    def wait_until(self, deadline, cancel=None, spin=None):
+        """Sleep until just before the deadline, then spin the rest
+
+        Returns False as soon as the cancel event is set.
+        """
+        if spin is None:
+            spin = self.spin
+        # A stepped (virtual) clock lands on the deadline, no spinning needed
+        if not self.clock.realtime:
+            spin = 0.0
+        remaining = deadline - self.clock.now()
+        if remaining > spin:
+            if cancel is None:
+                self.clock.sleep(remaining - spin)
+            elif self.clock.wait(cancel, remaining - spin):
+                return False
+        while spin and self.clock.now() < deadline:
+            if cancel is not None and cancel.is_set():
+                return False
+        return cancel is None or not cancel.is_set()
+
+    def run(self, events, start=None, cancel=None):
+        """Play a timeline; deadlines are relative to start (default: now)
+
+        Setting the cancel event stops the run between events.
+        """
+        stats = JitterStats()
+        self.last_stats = stats
+        if start is None:
+            start = self.clock.now()
+
+        for event in events:
+            deadline = start + event.at
+            spin = 0.0 if event.kind in self.coarse else self.spin
+            if not self.wait_until(deadline, cancel, spin):
+                stats.cancelled = True
+                break
+
+            # Every deadline is absolute, so lateness never accumulates;
+            # events that are hopelessly late and cosmetic are skipped
+            lateness = self.clock.now() - deadline
+            if lateness > self.max_lateness and event.kind in self.droppable:
+                stats.drop(event.kind, lateness)
+                continue
+
+            if stats.first_fire is None:
+                stats.first_fire = deadline + lateness
+            self.handlers[event.kind](*event.args)
+            stats.add(event.kind, lateness)
+
+        return stats
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+📼 Color Symphony Session Log
+Records what a show did into a compact binary log: every button edge,
+pattern start, LED change, tone and OLED frame hash, with its monotonic
+timestamp, in fixed-size records. Files rotate at a size limit, so disk
+use stays bounded on a unit left running in the field.
+
+The replay tool feeds the recorded button edges into a fresh show on the
+simulated backend and diffs what it does against the recording, which
+turns a real session into a regression test:
+
+    python3 color_symphony.py --record session.bin
+    python3 session_log.py replay session.bin
+    python3 session_log.py dump session.bin
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import namedtuple
+from itertools import groupby
+
+from scheduler import percentile
+
+MAGIC = b'CSRC'
+VERSION = 2
+
+# magic, version, record size, part, show, fade, pattern library key,
+# session start (monotonic) and session start (wall clock)
+HEADER = struct.Struct('<4sHHHBB20sdd')
+
+# time, kind, integer value, three float values
+RECORD = struct.Struct('<dB3xI3f')
+
+# Record kinds
+EDGE = 1      # value: pin << 1 | pressed
+PATTERN = 2   # value: pattern index
+COLOR = 3     # floats: red, green, blue duty cycles now on the LED
+TONE = 4      # floats: frequency, 0 when silenced
+FRAME = 5     # value: CRC-32 of the frame in page order
+END = 6       # the show shut down cleanly
+
+KIND_NAMES = {EDGE: 'edge', PATTERN: 'pattern', COLOR: 'color', TONE: 'tone', FRAME: 'frame', END: 'end'}
+SHOWS = ('basic', 'oled')
+FADES = (None, 'linear', 'ease', 'hsv')
+
+# Rotate at this size, keeping this many older files
+MAX_BYTES = 1 << 20
+KEEP = 4
+
+# Replay: seconds to keep running after the last record of a session that
+# never shut down cleanly, and the default timing difference that fails a
+# replay
+TAIL = 3.0
+TOLERANCE = 0.010
+
+Header = namedtuple('Header', 'part show fade key origin wall')
+Record = namedtuple('Record', 'at kind value floats')
+
+
+class NullRecorder:
+    """Stands in for the recorder when a show is not recorded"""
+
+    enabled = False
+
+    def start(self, show):
+        pass
+
+    def edge(self, pin, pressed, at):
+        pass
+
+    def pattern(self, index):
+        pass
+
+    def color(self, r, g, b):
+        pass
+
+    def tone(self, frequency):
+        pass
+
+    def frame(self, pages):
+        pass
+
+    def close(self):
+        pass
+
+
+class SessionRecorder(NullRecorder):
+    """Appends fixed-size records to path, rotating to path.1 ... path.KEEP"""
+
+    enabled = True
+
+    def __init__(self, path, max_bytes=MAX_BYTES, keep=KEEP):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.file = None
+        self.header = None
+        self.clock = None
+        self.size = 0
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def start(self, show):
+        """Begin a session for show; the previous session's files move aside"""
+        self.clock = show.clock
+        self.header = Header(
+            part=0,
+            show=SHOWS.index('oled' if hasattr(show, 'oled') else 'basic'),
+            fade=FADES.index(show.fade),
+            key=show.library.key or bytes(20),
+            origin=self.clock.now(),
+            wall=time.time(),
+        )
+        with self.lock:
+            self.open(rotate=os.path.exists(self.path))
+
+    def open(self, rotate):
+        if self.file is not None:
+            self.file.close()
+        if rotate:
+            for part in range(self.keep - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{part}"):
+                    os.replace(f"{self.path}.{part}", f"{self.path}.{part + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        # Unbuffered, so a unit that loses power keeps all but the last record
+        self.file = open(self.path, 'ab', buffering=0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, *self.header))
+        self.size = HEADER.size
+
+    def write(self, kind, value=0, a=0.0, b=0.0, c=0.0, at=None):
+        if self.file is None:
+            return
+        data = RECORD.pack(self.clock.now() if at is None else at, kind, value, a, b, c)
+        with self.lock:
+            if self.file is None:
+                return
+            if self.size + len(data) > self.max_bytes:
+                self.header = self.header._replace(part=self.header.part + 1)
+                self.open(rotate=True)
+            self.file.write(data)
+            self.size += len(data)
+            self.records += 1
+
+    def edge(self, pin, pressed, at):
+        # Edges carry the time the backend saw them, not the time logged
+        self.write(EDGE, pin << 1 | bool(pressed), at=at)
+
+    def pattern(self, index):
+        self.write(PATTERN, index)
+
+    def color(self, r, g, b):
+        self.write(COLOR, 0, r, g, b)
+
+    def tone(self, frequency):
+        self.write(TONE, 0, frequency)
+
+    def frame(self, pages):
+        self.write(FRAME, zlib.crc32(b''.join(pages)))
+
+    def close(self):
+        self.write(END)
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_file(path):
+    """(Header, records) of one log file; a torn last record is ignored"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: too short for a session log")
+    magic, version, size, *fields = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path}: not a session log of this version")
+    body = memoryview(data)[HEADER.size:]
+    body = body[:len(body) - len(body) % RECORD.size]
+    records = [Record(at, kind, value, floats)
+               for at, kind, value, *floats in RECORD.iter_unpack(body)]
+    return Header(*fields), records
+
+
+def read_session(path):
+    """Header and every record of the session path belongs to, in order
+
+    Older parts of a long session are in path.1, path.2 and so on, as far
+    as rotation kept them.
+    """
+    header, records = read_file(path)
+    parts = [(header, records)]
+    for part in range(1, KEEP + 1):
+        older = f"{path}.{part}"
+        if not os.path.exists(older):
+            break
+        older_header, older_records = read_file(older)
+        if older_header.origin != header.origin or older_header.wall != header.wall:
+            break
+        parts.append((older_header, older_records))
+    parts.reverse()
+    first = parts[0][0]
+    return first, [record for _, part_records in parts for record in part_records]
+
+
+def segments(header, records):
+    """Outputs split at pattern starts: [(start record or None, outputs, end)]
+
+    Times, the end included, are made relative to the segment start, or
+    to the session start before the first pattern. A segment ends where
+    the next pattern starts, the last one with the last record.
+    """
+    result = [(None, [], 0.0)]
+    for record in records:
+        start, outputs, _ = result[-1]
+        origin = header.origin if start is None else start.at
+        if record.kind == PATTERN:
+            result[-1] = (start, outputs, record.at - origin)
+            result.append((record, [], 0.0))
+        else:
+            if record.kind in (COLOR, TONE, FRAME):
+                outputs.append(record._replace(at=record.at - origin))
+            result[-1] = (start, outputs, record.at - origin)
+    return result
+
+
+def same_output(a, b):
+    if a.kind != b.kind or a.value != b.value:
+        return False
+    return all(abs(x - y) < 1e-4 for x, y in zip(a.floats, b.floats))
+
+
+def last_color(outputs):
+    """The last LED change among outputs, or None"""
+    colors = [record for record in outputs if record.kind == COLOR]
+    return colors[-1] if colors else None
+
+
+def compare(recorded, replayed, tolerance=TOLERANCE):
+    """Diff two sessions: pattern order, tones, settled LED colors and timing
+
+    Tones must match exactly and land within tolerance of the recorded
+    time from their pattern start. LED changes are mostly crossfade
+    frames, which the scheduler drops when it runs late, so only the
+    color the LED settled on at the end of each segment has to match.
+    Where a press or the shut down cut a pattern or the idle breathing
+    short, a step may fire in one run and not the other; outputs within
+    tolerance of the segment end are allowed to differ. OLED frames are
+    only counted, since frames can be dropped under load and sparkles are
+    random. A session that never shut down is compared up to its last
+    record.
+    """
+    (header, records), (replay_header, replay_records) = recorded, replayed
+    problems = []
+    if records and not any(r.kind == END for r in records):
+        # The recording was cut off; so is the comparison
+        last = records[-1].at - header.origin + tolerance
+        replay_records = [r for r in replay_records if r.at - replay_header.origin <= last]
+    starts = ([r for r in records if r.kind == PATTERN], [r for r in replay_records if r.kind == PATTERN])
+    if [r.value for r in starts[0]] != [r.value for r in starts[1]]:
+        problems.append(f"pattern order differs: recorded {[r.value for r in starts[0]]}, "
+                        f"replayed {[r.value for r in starts[1]]}")
+
+    # Pattern starts against the session start: press-to-pattern latency
+    start_drift = sorted(abs((b.at - replay_header.origin) - (a.at - header.origin))
+                         for a, b in zip(*starts))
+
+    drift = []
+    outputs = frames = identical_frames = 0
+    for number, ((start, ours, our_end), (_, theirs, their_end)) in enumerate(
+            zip(segments(header, records), segments(replay_header, replay_records))):
+        where = "before the first pattern" if start is None else f"in pattern start {number} (#{start.value})"
+        ours_tones = [r for r in ours if r.kind == TONE]
+        theirs_tones = [r for r in theirs if r.kind == TONE]
+        matched = 0
+        for a, b in zip(ours_tones, theirs_tones):
+            if not same_output(a, b):
+                break
+            drift.append((abs(b.at - a.at), where, matched))
+            matched += 1
+        # Whatever differs must be right at the end of the segment
+        early = ([r for r in ours_tones[matched:] if r.at < our_end - tolerance] +
+                 [r for r in theirs_tones[matched:] if r.at < their_end - tolerance])
+        if early and matched < min(len(ours_tones), len(theirs_tones)):
+            problems.append(f"{where}: tone {matched} was {describe(ours_tones[matched])}, "
+                            f"replay gave {describe(theirs_tones[matched])}")
+        elif early:
+            problems.append(f"{where}: {len(ours_tones)} tones recorded, {len(theirs_tones)} replayed")
+
+        # The color the LED was left on, unless the segment was cut short
+        # right after it changed
+        ours_led, theirs_led = last_color(ours), last_color(theirs)
+        settled = all(led is None or led.at < until - tolerance
+                      for led, until in ((ours_led, our_end), (theirs_led, their_end)))
+        if settled and (ours_led is None) != (theirs_led is None):
+            problems.append(f"{where}: the LED only changed in the "
+                            f"{'replay' if ours_led is None else 'recording'}")
+        elif settled and ours_led is not None and not same_output(ours_led, theirs_led):
+            problems.append(f"{where}: the LED settled on {describe(ours_led)}, "
+                            f"replay left it on {describe(theirs_led)}")
+
+        outputs += sum(1 for r in ours if r.kind != FRAME)
+        ours_frames = [r.value for r in ours if r.kind == FRAME]
+        theirs_frames = [r.value for r in theirs if r.kind == FRAME]
+        frames += len(ours_frames)
+        identical_frames += len(set(ours_frames) & set(theirs_frames))
+
+    values = sorted(d for d, _, _ in drift)
+    worst = max(drift, default=None)
+    if worst is not None and worst[0] > tolerance:
+        problems.append(f"{worst[1]}: tone {worst[2]} is {worst[0] * 1000:.2f} ms off the recording")
+    if start_drift and start_drift[-1] > tolerance:
+        problems.append(f"a pattern started {start_drift[-1] * 1000:.2f} ms off the recording")
+
+    return {
+        'patterns': (len(starts[0]), len(starts[1])),
+        'outputs': outputs,
+        'timing_p50': percentile(values, 0.50),
+        'timing_p95': percentile(values, 0.95),
+        'timing_max': values[-1] if values else 0.0,
+        'start_max': start_drift[-1] if start_drift else 0.0,
+        'frames': (frames, sum(1 for r in replay_records if r.kind == FRAME), identical_frames),
+        'problems': problems,
+    }
+
+
+def describe(record):
+    if record.kind == COLOR:
+        return "led ({:.2f}%, {:.2f}%, {:.2f}%)".format(*record.floats)
+    if record.kind == TONE:
+        return f"tone {record.floats[0]:.0f} Hz" if record.floats[0] else "silence"
+    if record.kind == EDGE:
+        return f"pin {record.value >> 1} {'down' if record.value & 1 else 'up'}"
+    if record.kind == PATTERN:
+        return f"pattern #{record.value}"
+    if record.kind == END:
+        return "shut down"
+    return f"frame {record.value:08x}"
+
+
+def replay(path, speed=1.0, patterns=None, tail=TAIL, verbose=False):
+    """Run the recorded button edges through a fresh simulated show
+
+    The edges are fed in against the show's clock at a real-time speed,
+    or, with speed=None, on a stepped clock that delivers them at their
+    exact times, so nothing runs late and the replay is repeatable.
+    Returns the recorded and replayed (header, records) pairs.
+    """
+    from hal import SimBackend, VirtualClock
+
+    if speed is not None and not speed > 0:
+        raise ValueError(f"replay speed must be above 0, got {speed}")
+    from pattern_store import PatternLibrary, PATTERN_DIR
+
+    header, records = read_session(path)
+    if header.part:
+        print(f"⚠️  The session start was rotated away; replaying from part {header.part}")
+    library = PatternLibrary(patterns or PATTERN_DIR)
+    if library.key != header.key:
+        print("⚠️  The pattern files differ from the recorded session's")
+    if SHOWS[header.show] == 'oled':
+        from color_symphony_oled import ColorSymphonyOLED as Show
+    else:
+        from color_symphony import ColorSymphony as Show
+
+    # Edges go in the order they were recorded. A simulated press stamps
+    # its release ahead of time and sends it straight after the press;
+    # such an edge is later than the record after it, and goes along with
+    # the edge before it.
+    edges = []
+    arrival = header.origin
+    for index, record in enumerate(records):
+        if record.kind == EDGE:
+            following = records[index + 1:index + 2]
+            if not (edges and following and record.at > following[0].at):
+                arrival = record.at
+            edges.append((arrival - header.origin, record.at - header.origin,
+                          record.value >> 1, bool(record.value & 1)))
+    ends = [record.at for record in records if record.kind == END]
+    if ends:
+        end = ends[-1] - header.origin
+    else:
+        end = max([record.at for record in records] + [header.origin]) - header.origin + tail
+
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'replay.bin')
+        backend = SimBackend(VirtualClock(speed) if speed != 1 else None, maxlen=0)
+        recorder = SessionRecorder(output, max_bytes=1 << 62)
+        quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            show = Show(backend, fade=FADES[header.fade], library=library,
+                        standby_after=None, recorder=recorder)
+            origin = recorder.header.origin
+
+            def send(batch):
+                # Edges that arrived together are queued together
+                with show.inputs.queue.condition:
+                    for _, at, pin, pressed in batch:
+                        callback = backend.edge_buttons.get(pin)
+                        if callback is not None:
+                            callback(pin, pressed, origin + at)
+
+            def stop():
+                show.running = False
+                show.wake.set()
+
+            batches = [(arrival, list(batch)) for arrival, batch in groupby(edges, key=lambda edge: edge[0])]
+            if backend.clock.realtime:
+                def feed():
+                    for arrival, batch in batches:
+                        backend.clock.sleep(origin + arrival - backend.clock.now())
+                        send(batch)
+                    backend.clock.sleep(origin + end - backend.clock.now())
+                    stop()
+
+                threading.Thread(target=feed, name='replay', daemon=True).start()
+            else:
+                for arrival, batch in batches:
+                    backend.clock.call_at(origin + arrival, lambda batch=batch: send(batch))
+                backend.clock.call_at(origin + end, stop)
+            show.run()
+        return (header, records), read_file(output)
+
+
+def print_records(path):
+    header, records = read_session(path)
+    print(f"{SHOWS[header.show]} show, fade {FADES[header.fade]}, started "
+          f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header.wall))}, {len(records)} records")
+    for record in records:
+        print(f"{record.at - header.origin:10.4f}  {KIND_NAMES.get(record.kind, record.kind):8s} {describe(record)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded Color Symphony session")
+    parser.add_argument('command', choices=['replay', 'dump'])
+    parser.add_argument('log', help="session log written with --record")
+    parser.add_argument('--patterns', metavar='DIR', help="pattern directory the session used")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="replay clock speed; 0 steps the clock, which is fastest "
+                             "and reproducible, otherwise timing is only comparable at 1")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE * 1000, metavar='MS',
+                        help=f"timing difference that fails the replay (default {TOLERANCE * 1000:.0f} ms)")
+    parser.add_argument('--verbose', action='store_true', help="show the replayed show's output")
+    args = parser.parse_args()
+    if not args.speed >= 0:
+        parser.error("--speed must be 0 or above")
+
+    if args.command == 'dump':
+        print_records(args.log)
+        return
+
+    speed = args.speed if args.speed > 0 else None
+    recorded, replayed = replay(args.log, speed, args.patterns, verbose=args.verbose)
+    result = compare(recorded, replayed, args.tolerance / 1000)
+    frames, replayed_frames, identical = result['frames']
+    print(f"📼 Patterns: {result['patterns'][0]} recorded, {result['patterns'][1]} replayed")
+    print(f"   Outputs: {result['outputs']} LED and tone changes, tone timing against the recording "
+          f"p50 {result['timing_p50'] * 1000:.2f} ms, p95 {result['timing_p95'] * 1000:.2f} ms, "
+          f"max {result['timing_max'] * 1000:.2f} ms; pattern starts max {result['start_max'] * 1000:.2f} ms")
+    print(f"   Frames: {frames} recorded, {replayed_frames} replayed, {identical} identical")
+    for problem in result['problems']:
+        print(f"   ❌ {problem}")
+    if result['problems']:
+        sys.exit(1)
+    print("   ✅ Replay matches the recording")
+
+
+if __name__ == "__main__":
+    main()
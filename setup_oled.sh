@@ -10,7 +10,7 @@ sudo raspi-config nonint do_i2c 0
 # Install required packages
 echo "Installing system packages..."
 sudo apt-get update
-sudo apt-get install -y python3-pip python3-dev python3-pil i2c-tools libopenjp2-7
+sudo apt-get install -y python3-pip python3-dev python3-pil python3-numpy i2c-tools libopenjp2-7
 
 # Install Python libraries for luma.oled
 echo "Installing Python libraries..."
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+🎼 Color Symphony Show Base
+What the basic and the OLED show have in common: the button and its
+gestures, LED and buzzer output, pattern playback, standby, sync, metrics
+and the session log, plus the command line both scripts share. Each show
+adds its own screen (or none) and its own main loop on top.
+"""
+
+import time
+
+# Reference point for the time-to-interactive measurement, taken before the
+# other imports so their cost counts towards it
+STARTED = time.monotonic()
+
+import argparse  # noqa: E402
+import sys  # noqa: E402
+import threading  # noqa: E402
+from abc import ABC, abstractmethod  # noqa: E402
+from collections import deque  # noqa: E402
+from scheduler import Scheduler, compile_pattern  # noqa: E402
+from pattern_store import PatternLibrary, PATTERN_DIR  # noqa: E402
+from sync import SyncLeader, SyncFollower, DEFAULT_PORT  # noqa: E402
+from metrics import ShowMetrics, DEFAULT_PORT as METRICS_PORT  # noqa: E402
+from session_log import SessionRecorder, NullRecorder  # noqa: E402
+from input_events import InputDispatcher, Gesture, DOUBLE_CLICK, LONG_PRESS  # noqa: E402
+from hal import GPIOBackend, SimBackend  # noqa: E402
+from sysfs_pwm import SysfsPWMBackend, parse_channel  # noqa: E402
+from led_output import LedOutput  # noqa: E402
+
+# GPIO Pin Definitions (matching your module's R, G, B pins)
+RED_PIN = 17      # Connected to R pin
+GREEN_PIN = 27    # Connected to G pin
+BLUE_PIN = 22     # Connected to B pin
+BUZZER_PIN = 18   # Buzzer
+BUTTON_PIN = 23   # Push Button
+
+# Seconds without a press before the show powers down
+STANDBY_AFTER = 300
+
+# The RGB test at startup: colors, their notes and their names
+TEST_COLORS = [(1, 0, 0), (0, 1, 0), (0, 0, 1)]
+TEST_NOTES = ['C', 'E', 'G']
+TEST_LABELS = ['Red', 'Green', 'Blue']
+
+
+class ShowBase(ABC):
+    """Button, LED, buzzer and pattern playback shared by both shows
+
+    Subclasses set up their display in setup_display(), add scheduler
+    handlers in handlers() and build run() from the pieces here.
+    """
+
+    # Compile display events into the pattern timelines
+    DISPLAY = False
+
+    def __init__(self, backend=None, fade=None, library=None, sync=None, metrics=None,
+                 standby_after=STANDBY_AFTER, recorder=None):
+        # Real GPIO by default; pass a SimBackend to run off-device
+        self.backend = backend or GPIOBackend()
+        self.clock = self.backend.clock
+
+        # Hard color steps by default, or a crossfade curve: linear, ease, hsv
+        self.fade = fade
+
+        self.pattern_index = 0
+        self.running = True
+
+        # Gestures waiting for the main loop; every wait in the show
+        # wakes as soon as one arrives
+        self.gestures = deque(maxlen=16)
+        self.wake = threading.Event()
+        self.input_latencies = deque(maxlen=100)
+
+        # Standby after this many idle seconds (None: never)
+        self.standby_after = standby_after
+        self.last_activity = self.clock.now()
+        self.wake_latencies = deque(maxlen=100)
+
+        # Histograms and counters; no-ops unless metrics are exported
+        self.metrics = metrics or ShowMetrics()
+
+        # Session log of inputs and outputs; a no-op unless recording
+        self.recorder = recorder or NullRecorder()
+
+        # The button is armed first, everything slow happens after
+        self.setup_gpio()
+        self.time_to_interactive = time.monotonic() - STARTED
+
+        # Notes and patterns come from the pattern files
+        self.library = library or PatternLibrary()
+        self.setup_display()
+
+        # Compile every pattern into a timeline once
+        self.timelines = {}
+        for pattern in self.patterns:
+            self.timeline(pattern)
+        self.scheduler = Scheduler(self.handlers(), clock=self.clock)
+
+        # Leader or follower in a synchronized multi-unit show
+        self.sync = sync
+        if sync is not None:
+            sync.start(self)
+        self.metrics.watch(self)
+        self.recorder.start(self)
+
+    def setup_gpio(self):
+        """Initialize all GPIO pins"""
+        # Setup LED pins as PWM outputs with 1000Hz frequency
+        self.red_pwm = self.backend.pwm(RED_PIN, 1000)
+        self.green_pwm = self.backend.pwm(GREEN_PIN, 1000)
+        self.blue_pwm = self.backend.pwm(BLUE_PIN, 1000)
+
+        # Start PWM with 0% duty cycle (off)
+        self.red_pwm.start(0)
+        self.green_pwm.start(0)
+        self.blue_pwm.start(0)
+
+        # Gamma-corrected output that skips unchanged channels
+        self.led = LedOutput((self.red_pwm, self.green_pwm, self.blue_pwm), recorder=self.recorder)
+
+        # Setup buzzer as PWM for different tones
+        self.buzzer_pwm = self.backend.pwm(BUZZER_PIN, 1000)
+        self.buzzer_pwm.start(0)  # Start with 0% duty cycle
+
+        # Button edges are queued with timestamps and turned into gestures
+        self.inputs = InputDispatcher(self.on_gesture, self.clock, threaded=self.clock.realtime,
+                                      metrics=self.metrics, read=self.backend.button_level)
+        self.backend.button_edges(BUTTON_PIN, self.edge)
+
+    def setup_display(self):
+        """Set up whatever the show draws on; nothing by default"""
+
+    def handlers(self):
+        """Scheduler handlers for the timeline event kinds"""
+        return {
+            'color': self.set_color,
+            'tone_on': self.start_tone,
+            'tone_off': self.stop_tone,
+            'led': self.led.set_index,
+        }
+
+    def edge(self, pin, pressed, at=None):
+        """Backend edge callback: logged for replay, then queued"""
+        at = self.clock.now() if at is None else at
+        self.recorder.edge(pin, pressed, at)
+        self.inputs.edge(pin, pressed, at)
+
+    def on_gesture(self, gesture):
+        """Queue a click, double click or long press for the main loop"""
+        if gesture.kind != 'long_press':
+            self.metrics.presses.inc()
+        self.gestures.append(gesture)
+        self.wake.set()
+
+    def next_gesture(self):
+        """Oldest queued gesture, or None; wake stays set while more wait"""
+        if not self.inputs.threaded:
+            # On a stepped clock only this settles the last edge of a press
+            self.inputs.pump()
+        try:
+            gesture = self.gestures.popleft()
+        except IndexError:
+            return None
+        self.wake.clear()
+        if self.gestures:
+            self.wake.set()
+        return gesture
+
+    def remote_start(self, index, name, start):
+        """Play a pattern the sync leader started, at start on our clock"""
+        # Runs on the sync thread: the pattern travels with the gesture and
+        # only the main loop ever changes pattern_index
+        names = [pattern['name'] for pattern in self.patterns]
+        index = names.index(name) if name in names else index % len(self.patterns)
+        self.gestures.append(Gesture('remote', None, None, index, start))
+        self.wake.set()
+
+    def wait(self, seconds):
+        """Sleep that returns early (True) when the button is pressed"""
+        return self.clock.wait(self.wake, seconds)
+
+    def set_color(self, r, g, b):
+        """Set RGB LED color (values 0-1)"""
+        self.led.set(r, g, b)
+
+    def start_tone(self, frequency):
+        """Start a tone on the passive buzzer without blocking"""
+        if frequency > 0:
+            self.buzzer_pwm.ChangeFrequency(frequency)
+            self.buzzer_pwm.start(10)  # Lower duty cycle for passive buzzer
+            self.metrics.buzzer_writes.inc(2)
+            self.recorder.tone(frequency)
+
+    def stop_tone(self):
+        """Silence the buzzer"""
+        self.buzzer_pwm.stop()
+        self.metrics.buzzer_writes.inc()
+        self.recorder.tone(0)
+
+    def play_tone(self, frequency, duration):
+        """Play a tone on the passive buzzer"""
+        if frequency > 0:
+            self.start_tone(frequency)
+            self.clock.sleep(duration)
+            self.stop_tone()
+        else:
+            self.clock.sleep(duration)
+
+    @property
+    def patterns(self):
+        return self.library.patterns
+
+    @property
+    def notes(self):
+        return self.library.notes
+
+    def reload_patterns(self):
+        """Swap in edited pattern files; only called between patterns"""
+        if not self.library.reload():
+            return False
+        self.timelines.clear()
+        for pattern in self.patterns:
+            self.timeline(pattern)
+        self.pattern_index %= len(self.patterns)
+        print(f"🔄 Loaded {len(self.patterns)} patterns")
+        return True
+
+    def timeline(self, pattern):
+        """Compiled (and cached) timeline of a pattern in the current mode"""
+        key = (pattern['name'], self.fade)
+        if key not in self.timelines:
+            if self.fade:
+                # NumPy is only needed when fading
+                from crossfade import compile_crossfade
+                self.timelines[key] = compile_crossfade(pattern, self.notes, self.fade, display=self.DISPLAY)
+            else:
+                self.timelines[key] = compile_pattern(pattern, self.notes, display=self.DISPLAY)
+        return self.timelines[key]
+
+    def play_pattern(self, pattern, start=None):
+        """Play a complete color and sound pattern"""
+        # Every note fires at an absolute deadline, including the fade out
+        # A button press cancels the pattern so the next one starts right away
+        timeline = self.timeline(pattern)
+        self.recorder.pattern(self.pattern_index)
+        stats = self.scheduler.run(timeline, start=start, cancel=self.wake)
+        self.metrics.observe_run(stats)
+
+        if stats.cancelled:
+            self.stop_tone()
+            self.set_color(0, 0, 0)
+        return stats
+
+    def play_gesture(self, gesture):
+        """Play the pattern a click, double click or remote start asks for
+
+        Afterwards pattern_index is the pattern that was played.
+        """
+        # Double click goes back; its first click already moved on one
+        if gesture.kind == 'double_click':
+            self.pattern_index = (self.pattern_index - 2) % len(self.patterns)
+        elif gesture.index is not None:
+            self.pattern_index = gesture.index % len(self.patterns)
+        start = gesture.start
+
+        # Play current pattern, on every unit when leading
+        pattern = self.patterns[self.pattern_index]
+        if start is None and self.sync is not None:
+            start = self.sync.announce(self.pattern_index, pattern['name'])
+        stats = self.play_pattern(pattern, start)
+        self.record_latency(gesture.at, stats)
+        if self.sync is not None:
+            self.sync.report(stats, start)
+        return stats
+
+    def stop_playing(self):
+        """Long press: the pattern its click started is already cut short"""
+        self.stop_tone()
+        self.set_color(0, 0, 0)
+
+    def show_testing(self, label):
+        """Show which color the RGB test is on; nothing by default"""
+
+    def rgb_test(self):
+        """Quick RGB test with ascending notes; a button press skips the rest"""
+        for color, note, label in zip(TEST_COLORS, TEST_NOTES, TEST_LABELS):
+            self.show_testing(label)
+            self.set_color(*color)
+            self.start_tone(self.notes[note])
+            pressed = self.wait(0.2)
+            self.stop_tone()
+            if pressed:
+                break
+
+        self.set_color(0, 0, 0)
+        self.wait(0.5)
+
+    def idle(self):
+        """Stand by once idle long enough, otherwise one round of idle animation"""
+        if (self.standby_after is not None
+                and self.clock.now() - self.last_activity >= self.standby_after):
+            self.standby()
+            return
+        # Edited patterns are swapped in between patterns
+        self.reload_patterns()
+        self.idle_animation()
+
+    @abstractmethod
+    def idle_animation(self):
+        """One round of the show's own idle look; returns early on a press"""
+
+    def record_latency(self, press_time, stats):
+        """Remember how long a press took to turn into the first note; returns it"""
+        if press_time is None or stats.first_fire is None:
+            return None
+        latency = stats.first_fire - press_time
+        self.input_latencies.append(latency)
+        self.metrics.input_latency.observe(latency)
+        return latency
+
+    def latency_stats(self):
+        """Press-to-first-note latency summary in seconds"""
+        values = sorted(self.input_latencies)
+        if not values:
+            return {'count': 0, 'mean': 0.0, 'max': 0.0}
+        return {'count': len(values), 'mean': sum(values) / len(values), 'max': values[-1]}
+
+    def power_down(self):
+        """Stop every PWM output"""
+        for pwm in (self.red_pwm, self.green_pwm, self.blue_pwm, self.buzzer_pwm):
+            pwm.stop()
+
+    def power_up(self):
+        """Restart the LED outputs; the buzzer starts with the next tone"""
+        for pwm in (self.red_pwm, self.green_pwm, self.blue_pwm):
+            pwm.start(0)
+        self.led.invalidate()
+
+    def standby(self):
+        """Power down until the button is pressed; returns the wake-up latency
+
+        The PWM threads are stopped and the main thread blocks on the wake
+        event, so nothing runs until the button edge arrives.
+        """
+        print("💤 Standby")
+        self.metrics.standbys.inc()
+        self.power_down()
+
+        self.wake.wait()
+
+        self.power_up()
+
+        # Measured from the button edge to outputs being back on
+        woke = self.clock.now()
+        self.last_activity = woke
+        pressed = self.gestures[0].at if self.gestures else None
+        if pressed is None:
+            return None
+        latency = woke - pressed
+        self.wake_latencies.append(latency)
+        self.metrics.wake_latency.observe(latency)
+        print(f"☀️  Awake in {latency * 1000:.2f} ms")
+        return latency
+
+    def cleanup(self):
+        """Turn everything off and print the input, standby and sync summaries"""
+        self.set_color(0, 0, 0)
+        self.red_pwm.stop()
+        self.green_pwm.stop()
+        self.blue_pwm.stop()
+        self.buzzer_pwm.stop()
+        self.inputs.stop()
+        inputs = self.inputs.stats()
+        print(f"🔘 Input: {inputs['gestures']} gestures, {inputs['bounces']} bounces filtered, "
+              f"queue depth max {inputs['max_depth']}, "
+              f"dispatch max {inputs['dispatch_max'] * 1000:.2f} ms")
+        if self.wake_latencies:
+            print(f"💤 Standby: woke {len(self.wake_latencies)} times, "
+                  f"max {max(self.wake_latencies) * 1000:.2f} ms to wake")
+        self.recorder.close()
+        self.metrics.close()
+        if self.sync is not None:
+            self.sync.close()
+            print(f"🔗 Sync: {self.sync.summary()}")
+        self.backend.cleanup()
+
+
+def press_on_enter(backend):
+    """Simulated button: Enter clicks, d + Enter double clicks, l + Enter long presses"""
+    for line in sys.stdin:
+        command = line.strip().lower()
+        if command == 'l':
+            backend.press(BUTTON_PIN, hold=LONG_PRESS + 0.1)
+        elif command == 'd':
+            backend.press(BUTTON_PIN)
+            backend.clock.sleep(DOUBLE_CLICK / 2)
+            backend.press(BUTTON_PIN)
+        else:
+            backend.press(BUTTON_PIN)
+
+
+def pwm_channel(spec):
+    """argparse type for one --hw-pwm mapping"""
+    try:
+        return parse_channel(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def leader_address(spec):
+    """argparse type for --follow: (host, port) from HOST or HOST:PORT"""
+    host, colon, port = spec.partition(':')
+    if not host:
+        raise argparse.ArgumentTypeError(f"{spec!r} has no host")
+    if not colon:
+        return host, DEFAULT_PORT
+    try:
+        number = int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"port {port!r} in {spec!r} is not a number")
+    if not 1 <= number <= 65535:
+        raise argparse.ArgumentTypeError(f"port {number} in {spec!r} is not between 1 and 65535")
+    return host, number
+
+
+def main(show_class, description):
+    """Command line of both shows: parse the options, build the show, run it"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--simulate', action='store_true',
+                        help="run without hardware; Enter clicks the button, "
+                             "d double clicks (back), l long presses (stop)")
+    parser.add_argument('--hw-pwm', nargs='*', type=pwm_channel, metavar='PIN=CHIP:CHANNEL',
+                        help="drive these pins with kernel hardware PWM via sysfs "
+                             "(default mapping: GPIO 18 on pwmchip0 channel 2)")
+    parser.add_argument('--fade', choices=['linear', 'ease', 'hsv'],
+                        help="crossfade smoothly between pattern colors")
+    parser.add_argument('--patterns', default=PATTERN_DIR, metavar='DIR',
+                        help="directory of pattern files, reloaded when edited")
+    parser.add_argument('--lead', type=int, nargs='?', const=DEFAULT_PORT, metavar='PORT',
+                        help="lead a synchronized show: every press plays on all followers")
+    parser.add_argument('--follow', type=leader_address, metavar='HOST[:PORT]',
+                        help="follow the leader at HOST and play what it plays")
+    parser.add_argument('--metrics-port', type=int, nargs='?', const=METRICS_PORT, metavar='PORT',
+                        help=f"serve Prometheus metrics on localhost (default port {METRICS_PORT})")
+    parser.add_argument('--metrics-log', metavar='FILE',
+                        help="append a JSON line of every metric to FILE every few seconds")
+    parser.add_argument('--standby-after', type=float, default=STANDBY_AFTER, metavar='SECONDS',
+                        help=f"power down after this long idle, 0 to never (default {STANDBY_AFTER:.0f})")
+    parser.add_argument('--record', metavar='FILE',
+                        help="log inputs and outputs to FILE for session_log.py replay")
+    args = parser.parse_args()
+    if args.hw_pwm and len(dict(args.hw_pwm)) < len(args.hw_pwm):
+        parser.error("--hw-pwm maps a pin more than once")
+    if not args.standby_after >= 0:
+        parser.error("--standby-after must be 0 (never) or above")
+
+    sync = None
+    if args.lead is not None:
+        sync = SyncLeader(args.lead)
+    elif args.follow:
+        sync = SyncFollower(*args.follow)
+
+    backend = None
+    if args.simulate:
+        backend = SimBackend()
+        threading.Thread(target=press_on_enter, args=(backend,), daemon=True).start()
+    elif args.hw_pwm is not None:
+        backend = SysfsPWMBackend(dict(args.hw_pwm) or None)
+
+    show = show_class(backend, fade=args.fade, library=PatternLibrary(args.patterns), sync=sync,
+                      metrics=ShowMetrics.from_options(args.metrics_port, args.metrics_log),
+                      standby_after=args.standby_after or None,
+                      recorder=SessionRecorder(args.record) if args.record else None)
+    show.run()
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+🔗 Color Symphony Sync
+Plays one show on several units at once. The leader sends every pattern
+start over UDP with a start time a little in the future; followers keep
+an NTP-style estimate of the leader's clock and schedule the same
+pattern at that instant on their own clock.
+
+    python3 sync.py --demo 3     # leader plus 3 simulated followers on localhost
+"""
+
+import argparse
+import json
+import math
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from scheduler import SystemClock, percentile
+
+DEFAULT_PORT = 5005
+
+# How far ahead of now a pattern start is announced; covers the network
+# delay and the followers waking up
+LEAD = 0.25
+
+# Followers ping the leader this often, and faster until they have samples
+PING_INTERVAL = 1.0
+FAST_PING_INTERVAL = 0.05
+
+# Offset samples kept; the one with the lowest round trip is trusted
+SAMPLES = 8
+
+# A follower that has not pinged for this long no longer gets commands
+FOLLOWER_TIMEOUT = 5.0
+
+PACKET_SIZE = 2048
+
+# Fields each message type must carry, and what they must be; anything
+# else on the port is dropped before it reaches a handler
+NUMBER = (int, float)
+FIELDS = {
+    'ping': {'t0': NUMBER},
+    'pong': {'t0': NUMBER, 't1': NUMBER, 't2': NUMBER},
+    'play': {'seq': int, 'index': int, 'start': NUMBER},
+    'report': {'seq': int, 'node': str, 'lateness': NUMBER, 'uncertainty': NUMBER,
+               'offset_spread': NUMBER},
+}
+
+
+def well_formed(message):
+    """Whether a decoded packet is a message we know, with usable fields"""
+    if not isinstance(message, dict):
+        return False
+    fields = FIELDS.get(message.get('type'))
+    if fields is None:
+        return False
+    for name, kinds in fields.items():
+        value = message.get(name)
+        if isinstance(value, bool) or not isinstance(value, kinds):
+            return False
+        if isinstance(value, float) and not math.isfinite(value):
+            return False
+    return True
+
+
+def estimate(t0, t1, t2, t3):
+    """NTP offset and round-trip delay from one ping/pong exchange
+
+    t0 and t3 are the follower's send and receive times, t1 and t2 the
+    leader's receive and send times. The offset is leader minus follower.
+    """
+    offset = ((t1 - t0) + (t2 - t3)) / 2
+    delay = (t3 - t0) - (t2 - t1)
+    return offset, delay
+
+
+class SyncStats:
+    """What each unit can tell about how well it kept to the shared start
+
+    No unit can see another's clock, so there is no direct measure of how
+    far apart they played. Each one knows how late its own first event was
+    on its own clock, and a follower also knows how well it knows the
+    leader's clock: half the shortest round trip bounds the offset error,
+    and the spread of the offsets it measured shows how steady that is.
+    """
+
+    def __init__(self, maxlen=200):
+        self.lateness = {}
+        self.clocks = {}
+        self.maxlen = maxlen
+
+    def add(self, node, lateness, uncertainty=None, offset_spread=None):
+        self.lateness.setdefault(node, deque(maxlen=self.maxlen)).append(lateness)
+        if uncertainty is not None:
+            self.clocks[node] = (uncertainty, offset_spread)
+
+    def summary(self, node=None):
+        """Start lateness and clock offset quality in seconds, for one node or all of them"""
+        if node is None:
+            values = [v for lateness in self.lateness.values() for v in lateness]
+            clocks = list(self.clocks.values())
+        else:
+            values = list(self.lateness.get(node, ()))
+            clocks = [self.clocks[node]] if node in self.clocks else []
+        magnitudes = sorted(abs(v) for v in values)
+        # The worst unit's offset, for the whole show
+        summary = {
+            'uncertainty': max((u for u, _ in clocks), default=None),
+            'offset_spread': max((s for _, s in clocks), default=None),
+        }
+        if not magnitudes:
+            return dict(summary, count=0, mean=0.0, p50=0.0, p95=0.0, max=0.0)
+        return dict(summary, **{
+            'count': len(magnitudes),
+            'mean': sum(values) / len(values),
+            'p50': percentile(magnitudes, 0.50),
+            'p95': percentile(magnitudes, 0.95),
+            'max': magnitudes[-1],
+        })
+
+    def __str__(self):
+        lines = []
+        for node in sorted(self.lateness):
+            s = self.summary(node)
+            line = (f"{node}: {s['count']} starts, late by mean {s['mean'] * 1000:+.2f} ms, "
+                    f"p95 {s['p95'] * 1000:.2f} ms, max {s['max'] * 1000:.2f} ms")
+            if s['uncertainty'] is not None:
+                line += (f"; leader clock known to ±{s['uncertainty'] * 1000:.3f} ms, "
+                         f"offset spread {s['offset_spread'] * 1000:.3f} ms")
+            lines.append(line)
+        return "\n".join(lines) or "no starts"
+
+
+class SyncNode:
+    """UDP socket plus a receive thread shared by leader and follower"""
+
+    def __init__(self, address, clock=None):
+        self.clock = clock or SystemClock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(address)
+        self.show = None
+        self.running = True
+        self.thread = None
+        # Packets that were not a message we understand
+        self.rejected = 0
+
+    def start(self, show):
+        """Attach to a show and start listening"""
+        self.show = show
+        self.thread = threading.Thread(target=self.listen, name=type(self).__name__, daemon=True)
+        self.thread.start()
+
+    def send(self, message, address):
+        try:
+            self.sock.sendto(json.dumps(message).encode(), address)
+        except OSError:
+            pass
+
+    def listen(self):
+        while self.running:
+            try:
+                data, address = self.sock.recvfrom(PACKET_SIZE)
+            except OSError:
+                # Closed, or an ICMP error from an earlier send
+                if not self.running:
+                    break
+                continue
+            received = self.clock.now()
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if not well_formed(message):
+                self.rejected += 1
+                continue
+            # One odd packet must not take the receive thread down with it
+            try:
+                self.handle(message, address, received)
+            except (KeyError, TypeError, ValueError):
+                self.rejected += 1
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+
+
+class SyncLeader(SyncNode):
+    """Answers pings and announces pattern starts to every follower"""
+
+    def __init__(self, port=DEFAULT_PORT, lead=LEAD, clock=None, name='leader'):
+        super().__init__(('', port), clock)
+        self.lead = lead
+        self.name = name
+        self.followers = {}
+        self.seq = 0
+        self.stats = SyncStats()
+        self.lock = threading.Lock()
+
+    def handle(self, message, address, received):
+        kind = message.get('type')
+        if kind == 'ping':
+            with self.lock:
+                self.followers[address] = received
+            self.send({'type': 'pong', 'id': message.get('id'), 't0': message['t0'],
+                       't1': received, 't2': self.clock.now()}, address)
+        elif kind == 'report':
+            self.stats.add(message['node'], message['lateness'],
+                           message['uncertainty'], message['offset_spread'])
+
+    def announce(self, index, name):
+        """Tell the followers to play a pattern; returns the shared start time
+
+        Without a live follower there is nobody to wait for, so the
+        pattern plays right away and the start is None.
+        """
+        now = self.clock.now()
+        with self.lock:
+            followers = [address for address, seen in self.followers.items()
+                         if now - seen < FOLLOWER_TIMEOUT]
+            if not followers:
+                return None
+            self.seq += 1
+        start = now + self.lead
+        message = {'type': 'play', 'seq': self.seq, 'index': index, 'name': name, 'start': start}
+        for address in followers:
+            self.send(message, address)
+        return start
+
+    def report(self, stats, start):
+        """Record how late the leader itself started"""
+        if start is not None and stats.first_fire is not None:
+            self.stats.add(self.name, stats.first_fire - start)
+
+    def summary(self):
+        return f"start lateness and clock offset per unit\n{self.stats}"
+
+
+class SyncFollower(SyncNode):
+    """Tracks the leader's clock and plays whatever it announces"""
+
+    def __init__(self, leader, port=DEFAULT_PORT, clock=None, name=None):
+        super().__init__(('', 0), clock)
+        self.leader = (leader, port)
+        self.name = name or f"{socket.gethostname()}:{self.sock.getsockname()[1]}"
+        self.samples = deque(maxlen=SAMPLES)
+        self.offset = None
+        self.delay = None
+        # Spread of the offsets measured over the kept samples
+        self.offset_spread = None
+        self.ping_id = 0
+        # Local start time -> sequence number of the announcement
+        self.pending = {}
+
+    def start(self, show):
+        super().start(show)
+        threading.Thread(target=self.ping_loop, name='sync-ping', daemon=True).start()
+
+    def ping_loop(self):
+        while self.running:
+            self.ping_id += 1
+            self.send({'type': 'ping', 'id': self.ping_id, 't0': self.clock.now()}, self.leader)
+            interval = FAST_PING_INTERVAL if len(self.samples) < SAMPLES else PING_INTERVAL
+            time.sleep(interval)
+
+    def handle(self, message, address, received):
+        kind = message.get('type')
+        if kind == 'pong':
+            self.samples.append(estimate(message['t0'], message['t1'], message['t2'], received))
+            # The exchange with the shortest round trip has the least
+            # queueing in it, so its offset is the most trustworthy
+            self.offset, self.delay = min(self.samples, key=lambda sample: sample[1])
+            offsets = [offset for offset, _ in self.samples]
+            self.offset_spread = max(offsets) - min(offsets)
+        elif kind == 'play' and self.offset is not None:
+            start = message['start'] - self.offset
+            self.pending[start] = message['seq']
+            self.show.remote_start(message['index'], message.get('name'), start)
+
+    def announce(self, index, name):
+        """A local press is not shared; it just plays here right away"""
+        return None
+
+    def report(self, stats, start):
+        """Send the leader how late we started and how well we know its clock"""
+        seq = self.pending.pop(start, None)
+        # Announcements overtaken by a newer one are never played
+        for older in [s for s in self.pending if start is not None and s < start]:
+            del self.pending[older]
+        if seq is None or stats.first_fire is None:
+            return
+        self.send({'type': 'report', 'node': self.name, 'seq': seq,
+                   'lateness': stats.first_fire - start,
+                   'uncertainty': self.delay / 2, 'offset_spread': self.offset_spread}, self.leader)
+
+    def summary(self):
+        if self.offset is None:
+            return "no offset estimate yet"
+        return (f"offset {self.offset * 1000:+.3f} ms, round trip {self.delay * 1000:.3f} ms "
+                f"(uncertainty ±{self.delay * 500:.3f} ms), offset spread {self.offset_spread * 1000:.3f} ms "
+                f"over {len(self.samples)} samples")
+
+
+def demo_follower(port):
+    """One simulated follower process for the localhost demo"""
+    import color_symphony
+    from hal import SimBackend
+
+    show = color_symphony.ColorSymphony(SimBackend(maxlen=1000), sync=SyncFollower('127.0.0.1', port))
+    show.run()
+
+
+def demo(followers, patterns, port, lead):
+    """Leader plus simulated followers on localhost, printing how well they kept time"""
+    import color_symphony
+    from hal import SimBackend
+
+    processes = [subprocess.Popen([sys.executable, __file__, '--follower', str(port)],
+                                  stdout=subprocess.DEVNULL)
+                 for _ in range(followers)]
+    try:
+        leader = SyncLeader(port, lead)
+        backend = SimBackend(maxlen=1000)
+        show = color_symphony.ColorSymphony(backend, sync=leader)
+        # Wait for every follower to ping, then let the offsets settle
+        deadline = time.monotonic() + 15
+        while len(leader.followers) < followers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(3)
+        for _ in range(patterns):
+            pattern = show.patterns[show.pattern_index]
+            start = leader.announce(show.pattern_index, pattern['name'])
+            leader.report(show.play_pattern(pattern, start), start)
+            show.pattern_index = (show.pattern_index + 1) % len(show.patterns)
+        # Let the last reports arrive
+        time.sleep(0.5)
+        show.cleanup()
+        overall = leader.stats.summary()
+        line = (f"All units over {patterns} patterns: started late by p95 {overall['p95'] * 1000:.2f} ms, "
+                f"max {overall['max'] * 1000:.2f} ms")
+        if overall['uncertainty'] is not None:
+            line += (f"; leader clock known to ±{overall['uncertainty'] * 1000:.3f} ms, "
+                     f"offset spread up to {overall['offset_spread'] * 1000:.3f} ms")
+        print(line)
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronized Color Symphony demo on localhost")
+    parser.add_argument('--demo', type=int, default=2, metavar='N',
+                        help="number of simulated follower processes")
+    parser.add_argument('--patterns', type=int, default=3,
+                        help="patterns to play")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--lead', type=float, default=LEAD,
+                        help="seconds between announcing a pattern and playing it")
+    parser.add_argument('--follower', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.follower is not None:
+        demo_follower(args.follower)
+    else:
+        demo(args.demo, args.patterns, args.port, args.lead)
+
+
+if __name__ == "__main__":
+    main()
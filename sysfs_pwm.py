@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+⚙️ Color Symphony Hardware PWM
+Drives kernel PWM channels through /sys/class/pwm instead of RPi.GPIO's
+software PWM threads. The attribute files stay open and every write
+reuses the same file descriptor.
+
+The pin must be muxed to its PWM function, e.g. in /boot/firmware/config.txt:
+    dtoverlay=pwm,pin=18,func=2
+"""
+
+import os
+import time
+
+from hal import GPIOBackend
+
+PWM_ROOT = '/sys/class/pwm'
+
+# BCM pin -> (pwmchip number, channel). GPIO 18 is channel 2 of the RP1
+# PWM block on a Raspberry Pi 5; on a Pi 4 it is pwmchip0 channel 0.
+DEFAULT_CHANNELS = {18: (0, 2)}
+
+# How long to wait for udev to create a freshly exported channel
+EXPORT_TIMEOUT = 1.0
+
+
+def parse_channel(spec):
+    """Parse one PIN=CHIP:CHANNEL string into (pin, (chip, channel))"""
+    try:
+        pin, target = spec.split('=')
+        chip, channel = target.split(':')
+        pin, chip, channel = int(pin), int(chip), int(channel)
+    except ValueError:
+        raise ValueError(f"bad PWM mapping {spec!r}, expected PIN=CHIP:CHANNEL") from None
+    if min(pin, chip, channel) < 0:
+        raise ValueError(f"bad PWM mapping {spec!r}, numbers cannot be negative")
+    return pin, (chip, channel)
+
+
+class SysfsPWM:
+    """RPi.GPIO.PWM-compatible channel backed by the kernel PWM sysfs
+
+    With truncate, every write also cuts the file to the new value, for a
+    tree of regular files standing in for sysfs: those keep stale
+    trailing bytes after a shorter write.
+    """
+
+    def __init__(self, chip, channel, frequency, root=PWM_ROOT, truncate=False):
+        chip_dir = os.path.join(root, f'pwmchip{chip}')
+        self.path = os.path.join(chip_dir, f'pwm{channel}')
+        if not os.path.isdir(self.path):
+            with open(os.path.join(chip_dir, 'export'), 'w') as f:
+                f.write(str(channel))
+            deadline = time.monotonic() + EXPORT_TIMEOUT
+            while not os.path.isdir(self.path):
+                if time.monotonic() > deadline:
+                    raise OSError(f"{self.path} did not appear after export")
+                time.sleep(0.01)
+
+        self.truncate = truncate
+        self.fds = {}
+        self.written = {}
+        self.writes = 0
+        self.duty = 0
+        self.period = 0
+        try:
+            for name in ('period', 'duty_cycle', 'enable'):
+                self.fds[name] = os.open(os.path.join(self.path, name), os.O_WRONLY)
+            self.write('enable', 0)
+            self.write('duty_cycle', 0)
+            self.set_period(frequency)
+        except OSError:
+            # Whoever falls back to software PWM must not inherit open files
+            self.close_files()
+            raise
+
+    def write(self, name, value):
+        """Write one attribute, skipping values that are already set"""
+        if self.written.get(name) == value:
+            return
+        fd = self.fds[name]
+        data = b'%d' % value
+        os.pwrite(fd, data, 0)
+        if self.truncate:
+            os.ftruncate(fd, len(data))
+        self.written[name] = value
+        self.writes += 1
+
+    def duty_ns(self, period):
+        return int(period * self.duty / 100)
+
+    def set_period(self, frequency):
+        period = int(1e9 / frequency)
+        duty = self.duty_ns(period)
+        # The kernel rejects a duty cycle longer than the period, so the
+        # order of the two writes depends on which way the period moves
+        if period < self.period:
+            self.write('duty_cycle', duty)
+            self.write('period', period)
+        else:
+            self.write('period', period)
+            self.write('duty_cycle', duty)
+        self.period = period
+
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+        self.write('enable', 1)
+
+    def stop(self):
+        self.write('enable', 0)
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+        self.write('duty_cycle', self.duty_ns(self.period))
+
+    def ChangeFrequency(self, frequency):
+        self.set_period(frequency)
+
+    def close(self):
+        self.stop()
+        self.close_files()
+
+    def close_files(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+
+class SysfsPWMBackend(GPIOBackend):
+    """GPIO backend whose mapped pins use kernel hardware PWM
+
+    Pins without a mapping, or whose channel cannot be opened, fall back
+    to RPi.GPIO software PWM.
+    """
+
+    def __init__(self, channels=None, root=PWM_ROOT, truncate=False):
+        super().__init__()
+        self.channels = DEFAULT_CHANNELS if channels is None else channels
+        self.root = root
+        self.truncate = truncate
+        self.hardware = []
+
+    def pwm(self, pin, frequency):
+        if pin in self.channels:
+            chip, channel = self.channels[pin]
+            try:
+                pwm = SysfsPWM(chip, channel, frequency, self.root, self.truncate)
+                self.hardware.append(pwm)
+                return pwm
+            except OSError as e:
+                print(f"⚠️  Hardware PWM for GPIO {pin} unavailable ({e}), using software PWM")
+        return super().pwm(pin, frequency)
+
+    def cleanup(self):
+        for pwm in self.hardware:
+            pwm.close()
+        self.hardware = []
+        super().cleanup()
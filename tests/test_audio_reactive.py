@@ -0,0 +1,111 @@
+import wave
+
+import numpy as np
+import pytest
+
+from audio_reactive import BLOCK, AnalysisPipeline, Analyzer, WavFile
+
+RATE = 22050
+
+
+def write_wav(path, samples, width):
+    """Full-scale float samples (frames x channels) as 8 or 16-bit PCM"""
+    if width == 1:
+        data = np.round(samples * 127 + 128).astype(np.uint8)
+    else:
+        data = np.round(samples * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(width)
+        f.setframerate(RATE)
+        f.writeframes(data.tobytes())
+
+
+def sine(frequency, seconds=0.5, amplitude=0.5):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+@pytest.mark.parametrize('width', [1, 2])
+@pytest.mark.parametrize('channels', [1, 2])
+def test_pcm_files_are_read_as_mono_blocks_at_full_scale(tmp_path, width, channels):
+    left = sine(440, 0.1)
+    right = -left if channels == 2 else None
+    samples = np.stack([left, right] if channels == 2 else [left], axis=1)
+    samples[:, 0] += 0.25
+    path = tmp_path / 'test.wav'
+    write_wav(path, samples, width)
+
+    wav = WavFile(str(path))
+    assert (wav.channels, wav.rate, wav.frames) == (channels, RATE, len(left))
+    assert wav.duration == pytest.approx(0.1, abs=1 / RATE)
+
+    blocks = list(wav.blocks(1000))
+    assert [index for index, _ in blocks] == list(range(3))
+    assert all(len(block) == 1000 for _, block in blocks)
+    mono = np.concatenate([block for _, block in blocks])
+    expected = samples.mean(axis=1)
+    tolerance = 1 / 64 if width == 1 else 1e-4
+    assert np.abs(mono[:len(expected)] - expected).max() < tolerance
+    # The last block is padded with silence
+    assert not mono[len(expected):].any()
+
+
+def test_unknown_chunks_are_skipped_and_bad_files_rejected(tmp_path):
+    path = tmp_path / 'test.wav'
+    write_wav(path, sine(440, 0.01)[:, None], 2)
+    data = path.read_bytes()
+    # An odd-sized chunk before the audio data is padded to an even length
+    extra = b'LIST' + (3).to_bytes(4, 'little') + b'abc\0'
+    index = data.index(b'data')
+    path.write_bytes(data[:index] + extra + data[index:])
+    assert WavFile(str(path)).frames == int(RATE * 0.01)
+
+    (tmp_path / 'bad.wav').write_bytes(b'RIFF\0\0\0\0AVI ')
+    with pytest.raises(ValueError, match="not a WAV file"):
+        WavFile(str(tmp_path / 'bad.wav'))
+
+
+def analyze(library, samples):
+    analyzer = Analyzer(RATE, BLOCK, library.notes)
+    return analyzer.analyze(0, samples[:BLOCK].astype(np.float32))
+
+
+@pytest.mark.parametrize('note', ['C', 'E', 'A', 'C_HIGH'])
+def test_a_sine_plays_its_nearest_note(library, note):
+    frequency = library.notes[note]
+    frame = analyze(library, sine(frequency * 1.01))
+    assert (frame.note, frame.frequency) == (note, frequency)
+
+
+@pytest.mark.parametrize('frequency, note', [(130.5, 'C'), (164.5, 'E'), (880, 'A'), (1047, 'C')])
+def test_a_pitch_outside_the_table_folds_into_its_octave(library, frequency, note):
+    assert analyze(library, sine(frequency)).note == note
+
+
+@pytest.mark.parametrize('frequency, channel', [(110, 0), (700, 1), (4000, 2)])
+def test_band_energy_lights_its_own_color(library, frequency, channel):
+    frame = analyze(library, sine(frequency))
+    assert np.argmax(frame.color) == channel
+    assert frame.color[channel] == pytest.approx(1.0)
+    assert max(level for i, level in enumerate(frame.color) if i != channel) < 0.1
+    assert 0 < frame.level <= 1 and len(frame.spectrum) == Analyzer(RATE, BLOCK, library.notes).meter.shape[0]
+
+
+def test_silence_is_dark_and_plays_no_note(library):
+    frame = analyze(library, sine(440, amplitude=0.001))
+    assert frame.color == (0.0, 0.0, 0.0) and frame.note is None and frame.frequency == 0
+    assert not np.any(frame.spectrum)
+
+
+def test_the_pipeline_analyzes_every_block_in_order(tmp_path, library):
+    path = tmp_path / 'test.wav'
+    write_wav(path, np.concatenate([sine(261, 0.2), sine(392, 0.2)])[:, None], 2)
+    wav = WavFile(str(path))
+    pipeline = AnalysisPipeline(wav, Analyzer(RATE, BLOCK, library.notes), ahead=2).start()
+    frames = list(pipeline)
+    pipeline.stop()
+    assert [frame.index for frame in frames] == list(range(len(frames)))
+    assert len(frames) == -(-wav.frames // BLOCK)
+    assert frames[0].note == 'C' and frames[-2].note == 'G'
+    assert pipeline.summary()['blocks'] == len(frames)
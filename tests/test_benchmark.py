@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmark import make_clock
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('speed', ['-1', '-0.5', 'nan'])
+def test_a_negative_speed_is_a_usage_error(speed):
+    with pytest.raises(ValueError, match="0 or above"):
+        make_clock(float(speed))
+    result = subprocess.run([sys.executable, 'benchmark.py', '--speed', speed, '--output', os.devnull],
+                            cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert '--speed must be 0' in result.stderr
+
+
+def test_speed_zero_runs_on_a_stepped_clock():
+    assert not make_clock(0).realtime
+    assert make_clock(1).realtime
@@ -0,0 +1,30 @@
+import pytest
+
+from crossfade import CURVES, compile_crossfade
+from hal import VirtualClock
+from scheduler import Scheduler
+
+
+@pytest.mark.parametrize('curve', CURVES)
+def test_crossfade_ends_on_a_color_event(library, curve):
+    for pattern in library.patterns:
+        timeline = compile_crossfade(pattern, library.notes, curve)
+        assert timeline[-1].kind == 'color'
+        assert timeline[-1].args == (0, 0, 0)
+        assert [event.kind for event in timeline].count('color') == 1
+
+
+def test_led_goes_dark_even_when_every_fade_frame_is_dropped(library):
+    outputs = []
+    scheduler = Scheduler({
+        'color': lambda *rgb: outputs.append(('color', rgb)),
+        'led': lambda *indices: outputs.append(('led', indices)),
+        'tone_on': lambda frequency: None,
+        'tone_off': lambda: None,
+    }, clock=VirtualClock())
+
+    # Starting well in the past makes every event hopelessly late
+    timeline = compile_crossfade(library.patterns[0], library.notes, 'linear')
+    stats = scheduler.run(timeline, start=-100.0)
+    assert stats.dropped == sum(1 for event in timeline if event.kind == 'led')
+    assert outputs == [('color', (0, 0, 0))]
@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+from export import Exporter, OledTrack, export
+from hal import COLUMNADDR, PAGEADDR, SimBackend, VirtualClock
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_export_replaces_frames_from_an_earlier_longer_run(tmp_path, library):
+    frames = tmp_path / 'frames'
+    frames.mkdir()
+    stale = ['frames/frame_999999.png', 'led_strip_099.png', 'oled_099.gif']
+    for name in stale + ['notes.txt']:
+        (tmp_path / name).write_bytes(b'old')
+
+    export('oled', str(tmp_path), names=['1'], idle_cycles=0, fps=5, library=library)
+
+    for name in stale:
+        assert not (tmp_path / name).exists()
+    assert (tmp_path / 'notes.txt').read_bytes() == b'old'
+    written = sorted(os.listdir(frames))
+    assert written[0] == 'frame_000000.png'
+    assert written[-1] == f"frame_{len(written) - 1:06d}.png"
+    assert (tmp_path / 'led_strip_000.png').exists() and (tmp_path / 'oled_000.gif').exists()
+
+
+def test_exported_frames_match_the_simulated_panel_after_partial_writes():
+    backend = SimBackend(VirtualClock(), maxlen=0)
+    track = OledTrack()
+    backend.listeners.append(Exporter([track]))
+    display = backend.oled()
+
+    # A full frame, then a window written in two short pieces that wrap
+    # across its pages and leave the rest of it as it was
+    image = Image.new('1', display.size)
+    ImageDraw.Draw(image).rectangle((20, 10, 60, 40), fill=1)
+    display.display(image)
+    display.command(COLUMNADDR, 30, 39, PAGEADDR, 1, 3)
+    display.data(bytes(range(1, 13)))
+    display.data(b'\xff' * 5)
+
+    assert track.image().convert('1').tobytes() == display.screen().tobytes()
+
+
+@pytest.mark.parametrize('option, value', [('--fps', '0'), ('--fps', '-5'), ('--rate', '0'), ('--rate', '-44100')])
+def test_rates_that_are_not_positive_are_usage_errors(tmp_path, option, value):
+    result = subprocess.run([sys.executable, 'export.py', '--output', str(tmp_path), option, value],
+                            cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert f"{option} must be a positive number" in result.stderr
+    assert os.listdir(tmp_path) == []
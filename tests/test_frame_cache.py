@@ -0,0 +1,57 @@
+from PIL import Image, ImageDraw
+
+from frame_cache import FrameCache, frame_size, pack_frame
+from framebuffer import Framebuffer
+from oled_delta import pack_pages
+
+FULL = 128 * 64 // 8
+
+
+def frame(n, size=(128, 64)):
+    image = Image.new('1', size)
+    ImageDraw.Draw(image).rectangle((n, 0, n + 3, size[1] - 1), fill=1)
+    return image
+
+
+def test_frames_are_stored_packed_and_counted_at_their_real_size():
+    cache = FrameCache()
+    pages = cache.get('a', lambda: frame(1))
+    assert pages == pack_pages(frame(1), 8)
+    assert frame_size(pages) == FULL
+    assert cache.stats()['bytes'] == FULL
+
+
+def test_a_hit_moves_the_frame_to_the_back_of_the_eviction_order():
+    cache = FrameCache(max_bytes=3 * FULL)
+    for key in 'abc':
+        cache.get(key, lambda key=key: frame(ord(key) - 90))
+    cache.get('a', lambda: frame(0))
+    cache.get('d', lambda: frame(20))
+
+    assert 'b' not in cache and 'a' in cache
+    assert list(cache.frames) == ['c', 'a', 'd']
+    assert cache.stats() == {'frames': 3, 'bytes': 3 * FULL, 'hits': 1, 'misses': 4, 'evictions': 1}
+
+
+def test_the_cap_evicts_until_the_frames_fit():
+    cache = FrameCache(max_bytes=int(2.5 * FULL))
+    for n in range(10):
+        cache.put(n, pack_frame(frame(n)))
+        assert cache.bytes <= cache.max_bytes
+    assert list(cache.frames) == [8, 9]
+    assert cache.evictions == 8
+
+    # Replacing a frame does not count it twice
+    cache.put(9, pack_frame(frame(30)))
+    assert cache.bytes == 2 * FULL
+
+
+def test_a_sprite_is_padded_to_whole_pages_and_pastes_the_same():
+    sprite = frame(2, size=(8, 14))
+    pages = pack_frame(sprite)
+    assert len(pages) == 2 and frame_size(pages) == 16
+
+    from_pages, from_image = Framebuffer(), Framebuffer()
+    from_pages.paste_pages(pages, 30, 20, mode='or')
+    from_image.paste(sprite, 30, 20, mode='or')
+    assert (from_pages.pixels == from_image.pixels).all()
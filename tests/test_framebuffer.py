@@ -0,0 +1,88 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from framebuffer import Framebuffer, unpack_pages
+from oled_delta import pack_pages
+
+
+def pil(draw_calls):
+    image = Image.new('1', (128, 64))
+    draw = ImageDraw.Draw(image)
+    for call in draw_calls:
+        call(draw)
+    return np.asarray(image, dtype=bool)
+
+
+def test_pack_matches_the_pil_page_packing():
+    rng = np.random.default_rng(5)
+    buffer = Framebuffer()
+    buffer.pixels[:] = rng.random((64, 128)) < 0.3
+    image = Image.fromarray(buffer.pixels.astype(np.uint8) * 255).convert('1')
+    assert buffer.pack() == pack_pages(image, 8)
+    assert (unpack_pages(buffer.pack()) == buffer.pixels).all()
+
+
+def test_rect_matches_pil_and_clips_at_every_edge():
+    boxes = [(10, 5, 30, 20), (-5, -5, 10, 10), (120, 50, 140, 70), (-10, 30, 200, 40), (50, 70, 60, 80)]
+    for fill in (True, False):
+        buffer = Framebuffer()
+        for box in boxes:
+            buffer.rect(*box, fill=fill)
+        expected = pil([lambda d, b=box: d.rectangle(b, fill=1 if fill else None, outline=1)
+                        for box in boxes])
+        assert (buffer.pixels == expected).all(), fill
+
+
+def test_bars_clip_levels_and_the_frame_edges():
+    buffer = Framebuffer()
+    buffer.bars(-4, [1.0, 0.5, 2.0, -1.0], width=3, gap=1, top=0, bottom=9)
+    # The first bar is wholly off the left edge, levels are clamped to 0-1
+    assert buffer.pixels[5:10, 0:3].all() and buffer.pixels[0:10, 0:3].sum() == 3 * 5
+    assert not buffer.pixels[:, 3].any()
+    assert buffer.pixels[0:10, 4:7].all()
+    assert not buffer.pixels[:, 7:].any()
+
+    buffer.clear()
+    buffer.bars(126, [1.0, 1.0], width=3, gap=1, bottom=63)
+    assert buffer.pixels[:, 126:].all() and not buffer.pixels[:, :126].any()
+
+    buffer.clear()
+    buffer.bars(200, [1.0], width=3)
+    assert not buffer.pixels.any()
+
+    buffer.clear()
+    buffer.bars(0, [1.0, 1.0], width=2, gap=0, bottom=9, thickness=1)
+    assert buffer.pixels[0, 0:4].all() and buffer.pixels.sum() == 4
+
+
+def test_meter_fills_to_the_level_inside_its_outline():
+    buffer = Framebuffer()
+    buffer.meter(0, 52, 95, 61, 0.5)
+    inner = int(round(0.5 * (95 - 3)))
+    assert buffer.pixels[56, 2:2 + inner].all() and not buffer.pixels[56, 2 + inner:94].any()
+
+    for level in (-1.0, 0.0):
+        buffer.clear()
+        buffer.meter(0, 52, 95, 61, level)
+        assert not buffer.pixels[54:60, 2:94].any()
+    buffer.clear()
+    buffer.meter(0, 52, 95, 61, 5.0)
+    assert buffer.pixels[54:60, 2:94].all()
+
+
+def test_sprite_clips_and_combines():
+    bits = np.ones((4, 6), dtype=bool)
+    buffer = Framebuffer()
+    buffer.sprite(bits, -2, -1)
+    assert buffer.pixels[0:3, 0:4].all() and buffer.pixels.sum() == 12
+
+    buffer.sprite(bits, 125, 62)
+    assert buffer.pixels[62:64, 125:128].all() and buffer.pixels.sum() == 12 + 6
+
+    buffer.sprite(bits, 300, 300)
+    assert buffer.pixels.sum() == 18
+
+    buffer.sprite(bits, -2, -1, mode='xor')
+    assert buffer.pixels.sum() == 6
+    buffer.sprite(np.zeros((64, 128), dtype=bool), mode='copy')
+    assert not buffer.pixels.any()
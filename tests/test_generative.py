@@ -0,0 +1,35 @@
+from itertools import islice
+
+import pytest
+
+from generative import SCALES, make_steps, variations, walk
+
+STEPS = 500
+
+
+@pytest.mark.parametrize('kind', ['walk', 'variations'])
+def test_the_same_seed_gives_the_same_steps(library, kind):
+    first, _ = make_steps(kind, library, seed=7)
+    second, _ = make_steps(kind, library, seed=7)
+    other, _ = make_steps(kind, library, seed=8)
+    steps = list(islice(first, STEPS))
+    assert steps == list(islice(second, STEPS))
+    assert steps != list(islice(other, STEPS))
+
+
+@pytest.mark.parametrize('scale', sorted(SCALES))
+def test_a_walk_never_leaves_its_scale(library, scale):
+    allowed = set(SCALES[scale] or library.notes)
+    palette = library.patterns[0]['colors']
+    for seed in range(5):
+        notes = {step.note for step in islice(walk(library.notes, palette, seed, SCALES[scale]), STEPS)}
+        assert notes <= allowed
+    # Over that many steps a walk reaches every note of a small scale
+    if SCALES[scale] is not None:
+        assert notes == allowed
+
+
+def test_variations_keep_to_the_note_table(library):
+    for pattern in library.patterns:
+        for step in islice(variations(pattern, library.notes, seed=3), STEPS):
+            assert step.note in library.notes
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+from PIL import Image, ImageDraw
+
+from hal import COLUMNADDR, PAGEADDR, LazyDevice, SimBackend, VirtualClock
+
+
+def test_a_stepped_clock_only_moves_when_slept():
+    clock = VirtualClock()
+    assert not clock.realtime
+    start = clock.now()
+    time.sleep(0.01)
+    assert clock.now() == start
+    clock.sleep(1.5)
+    clock.sleep(-1.0)
+    assert clock.now() == start + 1.5
+
+    event = threading.Event()
+    assert not clock.wait(event, 0.25)
+    assert clock.now() == start + 1.75
+    event.set()
+    assert clock.wait(event, 10.0)
+    assert clock.now() == start + 1.75
+
+
+def test_a_stepped_clock_runs_timers_as_it_passes_them():
+    clock = VirtualClock()
+    fired = []
+    event = threading.Event()
+    clock.call_at(2.0, lambda: fired.append(('late', clock.now())))
+    clock.call_at(0.5, lambda: fired.append(('early', clock.now())))
+    clock.call_at(1.0, event.set)
+    clock.sleep(0.75)
+    assert fired == [('early', 0.5)] and clock.now() == 0.75
+
+    # A timer that sets the event ends the wait at its own time
+    assert clock.wait(event, 5.0)
+    assert clock.now() == 1.0 and len(fired) == 1
+    clock.sleep(5.0)
+    assert fired[-1] == ('late', 2.0) and clock.now() == 6.0
+
+    with pytest.raises(ValueError, match="stepped"):
+        VirtualClock(10).call_at(1.0, event.set)
+
+
+def test_a_scaled_clock_runs_faster_than_real_time():
+    clock = VirtualClock(50)
+    assert clock.realtime
+    real = time.monotonic()
+    start = clock.now()
+    clock.sleep(1.0)
+    assert time.monotonic() - real < 0.5
+    assert clock.now() - start == pytest.approx(1.0, abs=0.5)
+
+
+def test_a_scaled_wait_wakes_early_on_the_event():
+    clock = VirtualClock(10)
+    event = threading.Event()
+    threading.Timer(0.02, event.set).start()
+    real = time.monotonic()
+    assert clock.wait(event, 60.0)
+    assert time.monotonic() - real < 1.0
+
+
+@pytest.mark.parametrize('speed', [0, -1, 0.0])
+def test_a_clock_that_would_not_move_is_rejected(speed):
+    with pytest.raises(ValueError, match="above 0"):
+        VirtualClock(speed)
+
+
+def test_a_lazy_device_is_built_once_on_first_use():
+    built = []
+
+    class Device:
+        contrast = 7
+
+    def factory():
+        built.append(threading.current_thread().name)
+        time.sleep(0.01)
+        return Device()
+
+    device = LazyDevice(factory, width=128, height=32)
+    assert (device.mode, device.size, device.height) == ('1', (128, 32), 32)
+    assert built == []
+
+    threads = [threading.Thread(target=device.get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert device.contrast == 7
+    assert len(built) == 1
+
+
+def test_display_data_fills_the_addressed_window():
+    display = SimBackend().oled()
+    display.command(COLUMNADDR, 10, 13, PAGEADDR, 2, 3)
+    display.data(bytes([1, 2, 3, 4, 5, 6]))
+    assert display.ram[2][9:15] == bytearray([0, 1, 2, 3, 4, 0])
+    assert display.ram[3][9:15] == bytearray([0, 5, 6, 0, 0, 0])
+
+    # The next data carries on where the last stopped, then wraps
+    display.data(bytes([7, 8, 9]))
+    assert display.ram[3][10:14] == bytearray([5, 6, 7, 8])
+    assert display.ram[2][10] == 9
+    assert sum(map(sum, display.ram)) == sum(range(2, 10))
+    assert display.bytes_written == 6 + 6 + 3
+
+
+def test_a_full_frame_reads_back_from_the_ram():
+    display = SimBackend().oled()
+    image = Image.new('1', display.size)
+    ImageDraw.Draw(image).ellipse((20, 5, 100, 60), outline=1)
+    display.display(image)
+    assert display.screen().tobytes() == image.tobytes()
+
+    display.command(COLUMNADDR, 0, 127, PAGEADDR, 0, 0)
+    display.data(bytes(128))
+    expected = image.copy()
+    expected.paste(0, (0, 0, 128, 8))
+    assert display.screen().tobytes() == expected.tobytes()
@@ -0,0 +1,83 @@
+import time
+
+from hal import VirtualClock
+from input_events import InputDispatcher
+from scheduler import SystemClock
+
+PIN = 17
+
+
+class Button:
+    """A pin whose callback may have read the level wrong"""
+
+    def __init__(self, clock=None, threaded=False):
+        self.clock = clock or VirtualClock()
+        self.level = False
+        self.gestures = []
+        self.inputs = InputDispatcher(self.gestures.append, self.clock, threaded=threaded,
+                                      read=lambda pin: self.level)
+
+    def edge(self, at, reported, level=None):
+        """An edge at time at whose callback saw reported; the pin is really at level"""
+        self.clock.sleep(at - self.clock.now())
+        self.level = reported if level is None else level
+        self.inputs.edge(PIN, reported, at)
+
+    def run_until(self, t):
+        self.clock.sleep(t - self.clock.now())
+        self.inputs.pump()
+        return [(gesture.kind, round(gesture.at, 3)) for gesture in self.gestures]
+
+
+def test_a_bounce_read_on_the_press_does_not_lose_the_click():
+    button = Button()
+    button.edge(0.0, False, level=True)
+    button.edge(0.002, True)
+    button.edge(0.3, False)
+    assert button.run_until(1.0) == [('click', 0.0)]
+
+
+def test_a_tap_shorter_than_the_debounce_time_is_ignored_and_does_not_stick():
+    button = Button()
+    button.edge(0.0, True)
+    button.edge(0.01, False)
+    assert button.run_until(0.5) == []
+
+    button.edge(1.0, True)
+    button.edge(1.08, False)
+    button.edge(1.2, True)
+    button.edge(1.28, False)
+    assert button.run_until(3.0) == [('click', 1.0), ('double_click', 1.2)]
+
+
+def test_contact_bounce_on_both_edges_makes_one_click():
+    button = Button()
+    for at, pressed in [(0.0, True), (0.003, False), (0.006, True),
+                        (0.5, False), (0.502, True), (0.504, False)]:
+        button.edge(at, pressed)
+    assert button.run_until(2.0) == [('click', 0.0)]
+    assert button.inputs.queue.bounces == 4
+    assert button.inputs.queue.accepted == 2
+
+
+def test_a_held_button_still_becomes_a_long_press():
+    button = Button()
+    button.edge(0.0, True)
+    button.edge(0.002, False, level=True)
+    assert button.run_until(0.5) == [('click', 0.0)]
+    button.edge(1.0, False)
+    assert button.run_until(2.0) == [('click', 0.0), ('long_press', 0.8)]
+
+
+def test_the_input_thread_settles_an_edge_without_another_one_arriving():
+    button = Button(SystemClock(), threaded=True)
+    now = button.clock.now()
+    button.edge(now, True)
+    time.sleep(0.05)
+    button.edge(now + 0.05, False)
+    deadline = time.monotonic() + 2.0
+    while button.inputs.queue.accepted < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    button.inputs.stop()
+    assert [gesture.kind for gesture in button.gestures] == ['click']
+    assert button.inputs.queue.accepted == 2
@@ -0,0 +1,31 @@
+import pytest
+
+from led_output import LedOutput, breath, gamma_table, level_index
+
+
+class CountingPWM:
+    def __init__(self):
+        self.writes = 0
+
+    def ChangeDutyCycle(self, duty):
+        self.writes += 1
+
+
+@pytest.mark.parametrize('period, rate, peak', [(2.0, 25, 0.58), (1.0, 40, 0.35)])
+def test_breath_keeps_its_length_and_peak_and_only_changes(period, rate, peak):
+    steps = breath(period, rate, peak=peak)
+    table = gamma_table()
+    assert sum(hold for _, hold in steps) == pytest.approx(period)
+    assert max(index for index, _ in steps) == level_index(peak)
+    duties = [table[index] for index, _ in steps]
+    assert all(a != b for a, b in zip(duties, duties[1:]))
+
+
+def test_playing_a_breath_writes_every_step():
+    pwms = [CountingPWM() for _ in range(3)]
+    led = LedOutput(pwms)
+    steps = breath(1.0, 40, peak=0.35)
+    for index, _ in steps:
+        led.set_index(index, index, index)
+    assert led.skipped == 0
+    assert led.writes == 3 * len(steps)
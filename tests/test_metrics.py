@@ -0,0 +1,99 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from metrics import NULL, MetricsLog, MetricsServer, Registry, ShowMetrics
+from scheduler import JitterStats
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = Registry('test')
+    histogram = registry.histogram('wait_seconds', "Waits", (0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [(0.1, 2), (0.5, 4), (1.0, 4), (float('inf'), 5)]
+    assert registry.render() == (
+        '# HELP test_wait_seconds Waits\n'
+        '# TYPE test_wait_seconds histogram\n'
+        'test_wait_seconds_bucket{le="0.1"} 2\n'
+        'test_wait_seconds_bucket{le="0.5"} 4\n'
+        'test_wait_seconds_bucket{le="1.0"} 4\n'
+        'test_wait_seconds_bucket{le="+Inf"} 5\n'
+        'test_wait_seconds_sum 2.95\n'
+        'test_wait_seconds_count 5\n')
+
+
+def test_counters_and_collected_values_render_and_snapshot():
+    registry = Registry('test')
+    presses = registry.counter('presses_total', "Presses")
+    depth = [3]
+    registry.collect('queue_depth', 'gauge', "Depth", lambda: depth[0])
+    presses.inc()
+    presses.inc(2)
+    depth[0] = 7
+
+    lines = registry.render().splitlines()
+    assert lines == ['# HELP test_presses_total Presses', '# TYPE test_presses_total counter',
+                     'test_presses_total 3',
+                     '# HELP test_queue_depth Depth', '# TYPE test_queue_depth gauge',
+                     'test_queue_depth 7']
+    assert registry.snapshot() == {'presses_total': 3, 'queue_depth': 7}
+
+
+def run_stats():
+    stats = JitterStats()
+    stats.add('tone_on', 0.0003)
+    stats.add('color', 0.004)
+    stats.drop('display', 0.08)
+    stats.cancelled = True
+    return stats
+
+
+def test_a_run_is_recorded_into_the_show_instruments():
+    metrics = ShowMetrics(Registry())
+    metrics.observe_run(run_stats())
+    snapshot = metrics.registry.snapshot()
+    assert snapshot['patterns_played_total'] == 1 and snapshot['patterns_skipped_total'] == 1
+    assert snapshot['events_dropped_total'] == 1
+    assert snapshot['event_lateness_seconds']['count'] == 2
+    assert snapshot['note_lateness_seconds']['count'] == 1
+    assert snapshot['note_lateness_seconds']['buckets']['0.0005'] == 1
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = ShowMetrics()
+    assert not metrics.enabled
+    assert metrics.note_lateness is NULL and metrics.presses is NULL
+    metrics.presses.inc()
+    metrics.frame_render.observe(0.01)
+    metrics.observe_run(run_stats())
+    metrics.watch(object())
+    assert ShowMetrics.from_options() is None
+
+
+def test_the_server_serves_the_registry_over_http():
+    registry = Registry('test')
+    registry.counter('presses_total', "Presses").inc(4)
+    server = MetricsServer(registry, port=0)
+    port = server.server.server_address[1]
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert response.read().decode() == registry.render()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other", timeout=2)
+        assert error.value.code == 404
+    finally:
+        server.close()
+
+
+def test_the_log_writes_a_final_snapshot_on_close(tmp_path):
+    registry = Registry('test')
+    registry.counter('presses_total', "Presses").inc()
+    path = tmp_path / 'metrics.jsonl'
+    MetricsLog(registry, str(path), interval=60).close()
+    line = json.loads(path.read_text())
+    assert line['presses_total'] == 1 and 'time' in line
@@ -0,0 +1,84 @@
+import random
+
+from PIL import Image, ImageDraw
+
+from hal import SimBackend
+from oled_delta import WINDOW_COMMAND_BYTES, DeltaDisplay, changed_span, merge_windows, pack_pages
+
+
+def setup():
+    sim = SimBackend(maxlen=0).oled()
+    return sim, DeltaDisplay(sim)
+
+
+def ram(sim):
+    return [bytes(page) for page in sim.ram]
+
+
+def test_random_frames_reach_the_panel_bit_exactly():
+    rng = random.Random(3)
+    sim, oled = setup()
+    image = Image.new('1', (128, 64))
+    for n in range(300):
+        if n % 50 == 0:
+            # Now and then a frame of noise, changing nearly every page
+            image = Image.frombytes('1', (128, 64), rng.randbytes(128 * 64 // 8))
+        else:
+            image = image.copy()
+            draw = ImageDraw.Draw(image)
+            for _ in range(rng.randint(0, 3)):
+                x, y = rng.randrange(128), rng.randrange(64)
+                draw.rectangle((x, y, x + rng.randrange(20), y + rng.randrange(12)), fill=rng.randint(0, 1))
+        before = sim.bytes_written
+        oled.display(image)
+        assert ram(sim) == pack_pages(image, 8)
+        assert sim.bytes_written - before == oled.last_frame_bytes
+    assert sim.screen().tobytes() == image.tobytes()
+    assert oled.bytes_sent < oled.frames * oled.full_frame_bytes
+
+
+def test_changed_span_and_window_merging():
+    assert changed_span(bytes(8), bytes(8)) is None
+    assert changed_span(bytes(8), bytes([0, 0, 1, 0, 0, 2, 0, 0])) == (2, 5)
+
+    # Two stacked spans cost 11 * 2 = 22 bytes as one window against
+    # 11 + 7 + 6 for the second window's commands, so they merge
+    assert merge_windows([(0, (10, 20)), (1, (12, 18))]) == [(0, 1, 10, 20)]
+    # Far apart columns would send 111 * 2 bytes merged, so they stay apart
+    assert merge_windows([(0, (0, 10)), (1, (100, 110))]) == [(0, 0, 0, 10), (1, 1, 100, 110)]
+    # Pages that do not touch never merge
+    assert merge_windows([(0, (0, 3)), (2, (0, 3))]) == [(0, 0, 0, 3), (2, 2, 0, 3)]
+
+
+def test_only_the_changed_window_is_sent():
+    sim, oled = setup()
+    image = Image.new('1', (128, 64))
+    oled.display(image)
+    assert oled.last_frame_bytes == oled.full_frame_bytes
+
+    ImageDraw.Draw(image).rectangle((10, 8, 20, 23), fill=1)
+    oled.display(image)
+    assert oled.last_frame_bytes == WINDOW_COMMAND_BYTES + 11 * 2
+
+    oled.display(image)
+    assert oled.last_frame_bytes == 0
+    assert oled.skipped_frames == 1
+
+
+def test_clear_and_invalidate():
+    sim, oled = setup()
+    image = Image.new('1', (128, 64))
+    ImageDraw.Draw(image).rectangle((0, 0, 127, 7), fill=1)
+    oled.display(image)
+
+    # After clear() the panel is blank and only the new content goes out
+    oled.clear()
+    assert ram(sim) == [bytes(128)] * 8
+    oled.display(image)
+    assert oled.last_frame_bytes == WINDOW_COMMAND_BYTES + 128
+    assert ram(sim) == pack_pages(image, 8)
+
+    # After invalidate() the next frame goes out in full, even unchanged
+    oled.invalidate()
+    oled.display(image)
+    assert oled.last_frame_bytes == oled.full_frame_bytes
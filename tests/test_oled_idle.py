@@ -0,0 +1,29 @@
+import contextlib
+import io
+
+from color_symphony_oled import IDLE_RATE, ColorSymphonyOLED
+from hal import SimBackend, VirtualClock
+from show_base import RED_PIN
+
+
+def test_an_idle_show_only_sends_the_screen_when_it_changes(library):
+    backend = SimBackend(VirtualClock(), maxlen=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        show = ColorSymphonyOLED(backend, library=library, standby_after=None)
+        show.fonts.get('font')
+        show.idle_animation()
+        start = backend.clock.now()
+        frames = show.renderer.submitted
+        while backend.clock.now() < start + 2:
+            show.idle_animation()
+        seconds = backend.clock.now() - start
+        show.cleanup()
+
+    # The screen changes twice a second, and only those frames reach the bus
+    assert show.renderer.submitted - frames <= seconds * IDLE_RATE + 1
+    end = start + 2
+    # A frame may go out as several region writes, all at one time
+    transfers = {at for at, kind, _ in backend.events('oled_data') if start <= at < end}
+    assert 2 * IDLE_RATE - 1 <= len(transfers) <= 2 * IDLE_RATE + 1
+    led_writes = [at for at, kind, args in backend.events('duty') if args[0] == RED_PIN and start <= at < end]
+    assert len(led_writes) <= 2 * 25
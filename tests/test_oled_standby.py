@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import color_symphony_oled
+from color_symphony_oled import ColorSymphonyOLED
+from hal import SimBackend
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_standby_switches_the_panel_off_when_a_frame_is_stuck(monkeypatch, library):
+    monkeypatch.setattr(color_symphony_oled, 'FLUSH_TIMEOUT', 0.1)
+    backend = SimBackend(maxlen=None)
+    show = ColorSymphonyOLED(backend, library=library, standby_after=None)
+    show.renderer.flush(2.0)
+
+    # A transfer that never finishes
+    stuck = threading.Event()
+
+    def paint(buffer):
+        stuck.wait(5.0)
+    show.renderer.submit(paint, pages=True)
+    started = time.monotonic()
+    show.power_down()
+    assert time.monotonic() - started < 1.0
+    assert backend.events('oled_power')[-1][2] == (0,)
+    assert not backend.display.visible
+
+    stuck.set()
+    show.cleanup()
+
+
+def test_the_oled_show_starts_without_loading_numpy():
+    check = "import sys, color_symphony_oled; print('numpy' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', check], cwd=REPO, capture_output=True, text=True)
+    assert result.stdout.strip() == 'False', result.stderr
@@ -0,0 +1,122 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from pattern_store import (CACHE_DIR, CACHE_FILE, PatternError, PatternLibrary, pack_library,
+                           unpack_library, validate_notes, validate_pattern)
+
+NOTES = {'C': 261, 'G': 392}
+PATTERN = {'name': 'Test', 'colors': [[1, 0, 0], [0, 0.5, 1]], 'notes': ['C', 'G'],
+           'durations': [0.2, 0.4]}
+
+
+def touch(path, later=1):
+    """Move a file's mtime forward without changing its contents"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + later * 1_000_000_000))
+
+
+@pytest.mark.parametrize('frequency', [True, 0, 65536, 261.5, '261', None])
+def test_note_frequencies_must_be_whole_hertz(frequency):
+    with pytest.raises(PatternError, match="needs a frequency"):
+        validate_notes({'C': frequency}, 'notes.json')
+
+
+@pytest.mark.parametrize('change, message', [
+    ({'name': ''}, "missing 'name'"),
+    ({'notes': []}, "non-empty list"),
+    ({'notes': ['C', 'X']}, "unknown note 'X'"),
+    ({'notes': ['C', ['G']]}, r"unknown note \['G'\]"),
+    ({'colors': [[1, 0, 0]]}, "one color per note"),
+    ({'colors': [[1, 0, 0], [0, 2, 0]]}, "three levels"),
+    ({'colors': [[1, 0, 0], [0, 0]]}, "three levels"),
+    ({'colors': [[True, 0, 0], [0, 0, 1]]}, "three levels"),
+    ({'durations': [0.2]}, "one duration per note"),
+    ({'durations': [0.2, 0]}, "positive number"),
+    ({'durations': [0.2, True]}, "positive number"),
+])
+def test_invalid_patterns_are_rejected(change, message):
+    with pytest.raises(PatternError, match=message):
+        validate_pattern(dict(PATTERN, **change), NOTES, 'test.json')
+
+
+def test_missing_fields_get_defaults():
+    pattern = validate_pattern({'name': 'Bare', 'colors': [[1, 1, 1]], 'notes': ['C']}, NOTES, 'bare.json')
+    assert pattern['title'] == 'Bare' and pattern['message'] == ''
+    assert pattern['colors'] == [(1.0, 1.0, 1.0)] and pattern['durations'] == [0.3]
+
+
+def test_packed_library_round_trips():
+    pattern = validate_pattern(dict(PATTERN, icon='🌅', message='ünïcode'), NOTES, 'test.json')
+    key = bytes(range(20))
+    assert unpack_library(pack_library(key, NOTES, [pattern])) == (key, NOTES, [pattern])
+    with pytest.raises(ValueError):
+        unpack_library(pack_library(key, NOTES, [pattern])[:-1])
+
+
+def test_a_library_too_big_to_pack_loads_without_a_cache(pattern_dir):
+    (pattern_dir / '07-long.json').write_text(json.dumps(dict(PATTERN, message='x' * 70000)))
+    library = PatternLibrary(str(pattern_dir))
+    assert library.patterns[-1]['message'] == 'x' * 70000
+    assert not (pattern_dir / CACHE_DIR / CACHE_FILE).exists()
+    assert PatternLibrary(str(pattern_dir)).loaded_from == 'files'
+
+
+def test_a_second_load_comes_from_the_cache(pattern_dir):
+    first = PatternLibrary(str(pattern_dir))
+    assert first.loaded_from == 'files'
+    assert (pattern_dir / CACHE_DIR / CACHE_FILE).exists()
+
+    second = PatternLibrary(str(pattern_dir))
+    assert second.loaded_from == 'cache'
+    assert (second.key, second.notes, second.patterns) == (first.key, first.notes, first.patterns)
+    assert PatternLibrary(str(pattern_dir), cache=False).loaded_from == 'files'
+
+
+def test_the_cache_is_ignored_once_a_source_changes(pattern_dir):
+    first = PatternLibrary(str(pattern_dir))
+    touch(pattern_dir / 'notes.json')
+    second = PatternLibrary(str(pattern_dir))
+    assert second.loaded_from == 'files' and second.key != first.key
+    assert PatternLibrary(str(pattern_dir)).loaded_from == 'cache'
+
+    (pattern_dir / CACHE_DIR / CACHE_FILE).write_bytes(b'CSPT garbage')
+    assert PatternLibrary(str(pattern_dir)).loaded_from == 'files'
+
+
+def test_reload_picks_up_edits_and_keeps_the_patterns_on_a_broken_one(pattern_dir):
+    library = PatternLibrary(str(pattern_dir))
+    assert not library.reload()
+
+    path = pattern_dir / '01-sunrise.json'
+    data = json.loads(path.read_text())
+    data['title'] = 'Edited'
+    path.write_text(json.dumps(data))
+    touch(path)
+    assert library.reload()
+    assert library.patterns[0]['title'] == 'Edited' and library.generation == 2
+
+    path.write_text('{"name": ')
+    touch(path, 2)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert not library.reload()
+    assert 'Keeping current patterns' in output.getvalue()
+    assert library.patterns[0]['title'] == 'Edited'
+    # The broken file is reported once, not on every poll
+    assert not library.changed()
+
+    # So is a note that is not even a name
+    path.write_text(json.dumps(dict(data, notes=[['C']] + data['notes'][1:])))
+    touch(path, 3)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        assert not library.reload()
+    assert "unknown note ['C']" in output.getvalue()
+
+    (pattern_dir / '07-extra.json').write_text(json.dumps(dict(PATTERN, notes=['C', 'G'])))
+    path.write_text(json.dumps(data))
+    touch(path, 4)
+    assert library.reload()
+    assert [p['name'] for p in library.patterns][-1] == 'Test'
@@ -0,0 +1,53 @@
+import pytest
+
+from generative import Lookahead, Step
+from producer import Producer
+
+
+class Counter(Producer):
+    def __init__(self, count, fail=None, ahead=2):
+        super().__init__('counter', ahead)
+        self.count = count
+        self.fail = fail
+
+    def produce(self):
+        for item in range(self.count):
+            if item == self.fail:
+                raise ValueError(f"bad item {item}")
+            yield item
+
+
+def test_items_arrive_in_order_and_the_stream_ends():
+    producer = Counter(10).start()
+    assert list(producer) == list(range(10))
+    producer.stop()
+    assert not producer.thread.is_alive()
+
+
+def test_a_producer_error_is_raised_in_the_consumer():
+    producer = Counter(10, fail=5).start()
+    received = []
+    with pytest.raises(ValueError, match="bad item 5"):
+        for item in producer:
+            received.append(item)
+    assert received == [0, 1, 2, 3, 4]
+    producer.stop()
+
+
+def test_a_generator_error_ends_the_lookahead_instead_of_hanging():
+    def steps():
+        yield Step((1.0, 0.0, 0.0), 'C4', 0.1)
+        raise KeyError('C9')
+
+    lookahead = Lookahead(steps(), {'C4': 261.63}, phrase=1).start()
+    with pytest.raises(KeyError):
+        list(lookahead)
+    lookahead.stop()
+
+
+def test_a_producer_without_produce_cannot_be_made():
+    class Unfinished(Producer):
+        pass
+
+    with pytest.raises(TypeError, match='produce'):
+        Unfinished('unfinished', 1)
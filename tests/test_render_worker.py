@@ -0,0 +1,96 @@
+import errno
+import os
+import subprocess
+import sys
+
+from hal import SimBackend
+from oled_delta import DeltaDisplay
+from render_worker import RenderWorker
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FlakyDisplay:
+    """SimDisplay whose next data() writes fail with an I2C error"""
+
+    def __init__(self, display, failures):
+        self.display = display
+        self.failures = failures
+
+    def __getattr__(self, name):
+        return getattr(self.display, name)
+
+    def data(self, data):
+        if self.failures:
+            self.failures -= 1
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+        self.display.data(data)
+
+
+def paint_box(x):
+    def paint(buffer):
+        buffer.clear()
+        buffer.rect(x, 8, x + 20, 40)
+    return paint
+
+
+def test_failed_transfer_is_counted_and_the_worker_keeps_going():
+    backend = SimBackend(maxlen=0)
+    sim = backend.oled()
+    oled = DeltaDisplay(FlakyDisplay(sim, failures=1))
+    worker = RenderWorker(oled, threaded=True)
+
+    worker.submit(paint_box(10), pages=True)
+    assert worker.flush(timeout=2.0)
+    assert worker.errors == 1
+    assert worker.thread.is_alive()
+
+    # The frame after the failure goes out in full and reaches the panel
+    worker.submit(paint_box(60), pages=True)
+    assert worker.flush(timeout=2.0)
+    worker.stop()
+    assert worker.rendered == 1
+    assert oled.last_frame_bytes == oled.full_frame_bytes
+    assert [bytes(page) for page in sim.ram] == oled.last_pages
+
+
+def test_a_frame_that_raises_is_counted_and_the_worker_keeps_going(capsys):
+    backend = SimBackend(maxlen=0)
+    sim = backend.oled()
+    oled = DeltaDisplay(sim)
+    worker = RenderWorker(oled, threaded=True)
+
+    def broken(buffer):
+        raise ValueError("no such glyph")
+
+    for _ in range(2):
+        worker.submit(broken, pages=True)
+        assert worker.flush(timeout=2.0)
+    assert worker.failures == 2 and worker.rendered == 0
+    assert worker.thread.is_alive()
+    output = capsys.readouterr().out
+    assert output.count("framebuffer frame from test_a_frame_that_raises") == 1
+    assert "ValueError: no such glyph" in output
+
+    worker.submit(paint_box(60), pages=True)
+    assert worker.flush(timeout=2.0)
+    worker.stop()
+    assert worker.rendered == 1
+    assert [bytes(page) for page in sim.ram] == oled.last_pages
+
+
+def test_a_packed_frame_goes_out_without_loading_numpy():
+    script = (
+        "import sys\n"
+        "from hal import SimBackend\n"
+        "from oled_delta import DeltaDisplay\n"
+        "from render_worker import RenderWorker\n"
+        "sim = SimBackend(maxlen=0).oled()\n"
+        "worker = RenderWorker(DeltaDisplay(sim), threaded=False)\n"
+        "pages = [bytes([0xff] * 128)] * 8\n"
+        "worker.submit(lambda: pages, packed=True)\n"
+        "assert worker.rendered == 1, worker.stats()\n"
+        "assert [bytes(page) for page in sim.ram] == pages\n"
+        "assert 'framebuffer' not in sys.modules and 'numpy' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=REPO, check=True)
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from hal import VirtualClock
+from scheduler import Event, JitterStats, NOTE_GAP, Scheduler, compile_pattern, percentile
+
+
+class Recorder:
+    """Handlers that note when each event fired, and can take time doing it"""
+
+    def __init__(self, clock, cost=None):
+        self.clock = clock
+        self.cost = cost or {}
+        self.fired = []
+
+    def handler(self, kind):
+        def fire(*args):
+            self.fired.append((kind, self.clock.now()))
+            self.clock.sleep(self.cost.get(kind, 0.0))
+        return fire
+
+    def handlers(self, kinds=('color', 'tone_on', 'tone_off', 'display', 'led')):
+        return {kind: self.handler(kind) for kind in kinds}
+
+
+def test_events_fire_at_absolute_deadlines_without_drift():
+    clock = VirtualClock()
+    recorder = Recorder(clock, cost={'tone_on': 0.003, 'color': 0.002})
+    events = [Event(i * 0.1, kind, ()) for i in range(200) for kind in ('color', 'tone_on')]
+    stats = Scheduler(recorder.handlers(), clock).run(events, start=10.0)
+
+    # The handlers' own time never pushes later events back
+    tones = [at for kind, at in recorder.fired if kind == 'tone_on']
+    assert tones[-1] == pytest.approx(10.0 + 199 * 0.1 + 0.002, abs=1e-9)
+    assert [at for kind, at in recorder.fired if kind == 'color'][-1] == pytest.approx(10.0 + 199 * 0.1, abs=1e-9)
+    assert stats.first_fire == 10.0
+    assert stats.summary('color')['max'] == 0.0
+
+
+def test_late_cosmetic_events_are_dropped_and_the_rest_still_play():
+    clock = VirtualClock()
+    recorder = Recorder(clock, cost={'tone_on': 0.2})
+    events = [Event(0.0, 'tone_on', ()), Event(0.1, 'display', ()), Event(0.1, 'led', ()),
+              Event(0.1, 'color', ()), Event(0.1, 'tone_off', ()), Event(0.5, 'display', ())]
+    stats = Scheduler(recorder.handlers(), clock).run(events, start=0.0)
+
+    assert [kind for kind, _ in recorder.fired] == ['tone_on', 'color', 'tone_off', 'display']
+    assert stats.dropped == 2
+    assert abs(stats.summary('color')['max'] - 0.1) < 1e-9
+
+
+def test_cancel_stops_the_run_between_events():
+    clock = VirtualClock()
+    cancel = threading.Event()
+    recorder = Recorder(clock)
+    handlers = recorder.handlers()
+    handlers['tone_off'] = lambda: cancel.set()
+    events = [Event(0.0, 'tone_on', ()), Event(0.3, 'tone_off', ()), Event(0.35, 'color', ())]
+    stats = Scheduler(handlers, clock).run(events, start=0.0, cancel=cancel)
+
+    assert stats.cancelled
+    assert [kind for kind, _ in recorder.fired] == ['tone_on']
+    assert clock.now() == 0.3
+
+
+def test_compile_pattern_lays_out_notes_gaps_and_the_fade_out():
+    pattern = {'colors': [[1, 0, 0], [0, 1, 0]], 'notes': ['C4', 'E4'], 'durations': [0.2, 0.4]}
+    events = compile_pattern(pattern, {'C4': 262, 'E4': 330}, display=True)
+    second = 0.2 + NOTE_GAP
+    assert [(kind, args) for _, kind, args in events] == [
+        ('color', (1, 0, 0)), ('tone_on', (262,)), ('display', (pattern, 0)), ('tone_off', ()),
+        ('color', (0, 1, 0)), ('tone_on', (330,)), ('display', (pattern, 1)), ('tone_off', ()),
+        ('color', (0, 0, 0)),
+    ]
+    assert [event.at for event in events] == pytest.approx(
+        [0.0, 0.0, 0.0, 0.2, second, second, second, second + 0.4, second + 0.4 + NOTE_GAP])
+
+
+def test_percentile_edge_cases():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([7], 0.0) == percentile([7], 1.0) == 7
+    values = [1, 2, 3, 4]
+    assert percentile(values, 0.0) == 1
+    assert percentile(values, 0.5) == 2
+    assert percentile(values, 0.95) == 4
+    assert percentile(values, 1.0) == 4
+
+    # A rank that comes out whole is that value, not the one after it
+    assert percentile([1, 2], 0.5) == 1
+    assert percentile([1, 2], 0.99) == 2
+    values = [1, 2, 3, 4, 5, 6]
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 0.51) == 4
+    assert percentile(values, 0.99) == 6
+
+    stats = JitterStats()
+    assert stats.summary()['count'] == 0
+    stats.add('tone_on', 0.002)
+    assert stats.summary('color')['count'] == 0
+    assert stats.summary('tone_on')['max'] == 0.002
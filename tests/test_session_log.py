@@ -0,0 +1,106 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from color_symphony import ColorSymphony
+from hal import SimBackend, VirtualClock
+from led_output import gamma_table
+from session_log import COLOR, PATTERN, SessionRecorder, compare, describe, read_session, replay
+from show_base import BUTTON_PIN
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def record(path, library):
+    """A short crossfaded session: welcome, idle breathing, one pattern, idle
+
+    The stepped clock presses the button at a set time and never runs
+    late, so the session comes out the same every time.
+    """
+    backend = SimBackend(VirtualClock(), maxlen=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        show = ColorSymphony(backend, fade='ease', library=library,
+                             recorder=SessionRecorder(path), standby_after=None)
+
+        def stop():
+            show.running = False
+            show.wake.set()
+
+        origin = backend.clock.now()
+        backend.clock.call_at(origin + 2.0, lambda: backend.press(BUTTON_PIN))
+        backend.clock.call_at(origin + 7.0, stop)
+        show.run()
+
+
+def test_led_output_is_recorded_and_replays_the_same(tmp_path, pattern_dir, library):
+    path = str(tmp_path / 'session.bin')
+    record(path, library)
+    header, records = read_session(path)
+
+    # Idle breathing before the press and crossfade frames during the
+    # pattern both reach the log, as the duty cycles the LED was given
+    pattern = next(r for r in records if r.kind == PATTERN)
+    breathing = [r for r in records if r.kind == COLOR and r.at < pattern.at and len(set(r.floats)) == 1]
+    assert len(breathing) > 10
+    duties = set(gamma_table())
+    colors = [r for r in records if r.kind == COLOR and r.at > pattern.at]
+    assert len(colors) > 20
+    assert all(round(level, 2) in duties for r in colors for level in r.floats)
+
+    recorded, replayed = replay(path, speed=None, patterns=str(pattern_dir))
+    result = compare(recorded, replayed)
+    assert result['problems'] == []
+    assert result['patterns'] == (1, 1)
+    assert result['timing_max'] == 0.0
+
+
+def test_dropped_crossfade_frames_are_not_a_difference(tmp_path, library):
+    path = str(tmp_path / 'session.bin')
+    record(path, library)
+    recorded = read_session(path)
+    header, records = recorded
+
+    # A replay that ran late and lost every other fade frame mid-pattern
+    # still plays the same notes and leaves the LED on the same color
+    pattern = next(r for r in records if r.kind == PATTERN)
+    colors = [r for r in records if r.kind == COLOR and r.at > pattern.at]
+    lost = {id(r) for r in colors[1:-1:2]}
+    replayed = (header, [r for r in records if id(r) not in lost])
+    assert compare(recorded, replayed)['problems'] == []
+
+    # Leaving the idle breathing on another level when the press came is
+    # still caught
+    last = [r for r in records if r.kind == COLOR and r.at < pattern.at][-1]
+    changed = [r._replace(floats=[50.0, 50.0, 50.0]) if r is last else r for r in records]
+    assert compare(recorded, (header, changed))['problems'] == [
+        f"before the first pattern: the LED settled on {describe(last)}, replay left it on led (50.00%, 50.00%, 50.00%)"]
+
+
+@pytest.mark.parametrize('speed', [0.0, -2.0])
+def test_a_replay_speed_that_stops_the_clock_is_rejected(tmp_path, speed):
+    with pytest.raises(ValueError, match="above 0"):
+        replay(str(tmp_path / 'missing.bin'), speed=speed)
+
+
+@pytest.mark.parametrize('speed', ['-2', 'nan'])
+def test_a_negative_replay_speed_is_a_usage_error(speed):
+    result = subprocess.run([sys.executable, 'session_log.py', 'replay', 'missing.bin', '--speed', speed],
+                            cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert '--speed must be 0 or above' in result.stderr
+
+
+def test_speed_0_replays_on_the_stepped_clock(tmp_path, pattern_dir, library):
+    path = str(tmp_path / 'session.bin')
+    record(path, library)
+    result = subprocess.run([sys.executable, 'session_log.py', 'replay', path, '--speed', '0',
+                             '--patterns', str(pattern_dir), '--tolerance', '0'],
+                            cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Patterns: 1 recorded, 1 replayed' in result.stdout
+    assert 'max 0.00 ms' in result.stdout
+    assert 'Replay matches the recording' in result.stdout
@@ -0,0 +1,137 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from color_symphony import ColorSymphony
+from hal import SimBackend
+from input_events import DEBOUNCE
+from metrics import Registry, ShowMetrics
+from scheduler import SystemClock
+from show_base import BUTTON_PIN, BUZZER_PIN, ShowBase, leader_address
+from sync import DEFAULT_PORT
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def quiet_show(backend, library, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ColorSymphony(backend, library=library, standby_after=None, **options)
+
+
+def test_waking_from_standby_takes_at_least_the_debounce_time(library):
+    backend = SimBackend(SystemClock(), maxlen=0)
+    show = quiet_show(backend, library)
+    woke = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=lambda: woke.append(show.standby()), daemon=True)
+        thread.start()
+        backend.press(BUTTON_PIN)
+        thread.join(2.0)
+        show.cleanup()
+    assert woke and woke[0] >= DEBOUNCE
+
+
+def test_a_show_without_an_idle_animation_cannot_be_made(library):
+    class Unfinished(ShowBase):
+        pass
+
+    with pytest.raises(TypeError, match='idle_animation'):
+        Unfinished(SimBackend(), library=library)
+
+
+def test_a_press_mid_pattern_starts_the_next_one_straight_away(library):
+    backend = SimBackend(SystemClock())
+    show = quiet_show(backend, library, metrics=ShowMetrics(Registry()))
+    show.welcome_sequence = lambda: None
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=show.run, daemon=True)
+        thread.start()
+        backend.press(BUTTON_PIN)
+        time.sleep(0.5)
+        pressed = backend.clock.now()
+        backend.press(BUTTON_PIN)
+        time.sleep(0.2)
+        show.running = False
+        show.wake.set()
+        thread.join(5.0)
+    assert not thread.is_alive()
+
+    # The first pattern was cut short: the buzzer went quiet before the
+    # second pattern's first note, which came right after the debounce
+    assert show.metrics.registry.snapshot()['patterns_skipped_total'] >= 1
+    first = list(show.input_latencies)[1]
+    assert DEBOUNCE <= first < DEBOUNCE + 0.025
+    started = pressed + first
+    buzzer = [(at, kind) for at, kind, args in backend.events()
+              if kind in ('stop', 'frequency') and args[0] == BUZZER_PIN and pressed <= at <= started + 0.001]
+    assert [kind for _, kind in buzzer][-2:] == ['stop', 'frequency']
+    assert buzzer[-1][0] == pytest.approx(started, abs=0.001)
+
+
+class Follower:
+    """Just enough of a sync follower: local presses are not shared"""
+
+    def start(self, show):
+        pass
+
+    def announce(self, index, name):
+        return None
+
+    def report(self, stats, start):
+        pass
+
+    def close(self):
+        pass
+
+    def summary(self):
+        return ''
+
+
+def test_a_remote_start_mid_pattern_plays_the_pattern_the_leader_announced(library):
+    backend = SimBackend(SystemClock())
+    show = quiet_show(backend, library, sync=Follower())
+    show.welcome_sequence = lambda: None
+    played = []
+    play_pattern = show.play_pattern
+    show.play_pattern = lambda pattern, start=None: played.append(pattern['name']) or play_pattern(pattern, start)
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=show.run, daemon=True)
+        thread.start()
+        backend.press(BUTTON_PIN)
+        time.sleep(0.3)
+        for index in (2, 3):
+            show.remote_start(index, show.patterns[index]['name'], backend.clock.now() + 0.05)
+            time.sleep(0.3)
+        show.running = False
+        show.wake.set()
+        thread.join(5.0)
+    assert not thread.is_alive()
+    assert played == ['Sunrise', 'Cherry Blossom', 'Lightning']
+    assert show.pattern_index == 4
+
+
+@pytest.mark.parametrize('follow', ['host:abc', 'host:', 'host:0', 'host:65536', ':5005'])
+def test_a_bad_leader_address_is_a_usage_error(follow):
+    result = subprocess.run([sys.executable, 'color_symphony.py', '--simulate', '--follow', follow],
+                            cwd=REPO, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    assert result.returncode == 2
+    assert 'argument --follow' in result.stderr
+
+
+def test_leader_addresses_default_to_the_sync_port():
+    assert leader_address('pi.local') == ('pi.local', DEFAULT_PORT)
+    assert leader_address('10.0.0.2:6000') == ('10.0.0.2', 6000)
+
+
+@pytest.mark.parametrize('seconds', ['-1', 'nan'])
+def test_a_negative_standby_time_is_a_usage_error(seconds):
+    result = subprocess.run([sys.executable, 'color_symphony.py', '--simulate', '--standby-after', seconds],
+                            cwd=REPO, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    assert result.returncode == 2
+    assert '--standby-after must be 0 (never) or above' in result.stderr
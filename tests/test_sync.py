@@ -0,0 +1,90 @@
+import json
+import socket
+import time
+
+import pytest
+
+from sync import FOLLOWER_TIMEOUT, SyncFollower, SyncLeader, SyncStats
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_malformed_packets_do_not_stop_the_leader_or_follower():
+    leader = SyncLeader(0)
+    leader.start(None)
+    port = leader.sock.getsockname()[1]
+    follower = SyncFollower('127.0.0.1', port, name='unit')
+    follower.start(None)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        garbage = [b'[1, 2]', b'null', b'not json', b'{"type": "ping"}',
+                   b'{"type": "report", "seq": 1}', b'{"type": "ping", "t0": NaN}']
+        for packet in garbage:
+            sender.sendto(packet, ('127.0.0.1', port))
+        for packet in [b'[1, 2]', b'{"type": "pong", "t0": 1.0}', b'{"type": "play", "seq": 1}']:
+            sender.sendto(packet, follower.sock.getsockname())
+
+        # Both keep answering and measuring after the bad packets
+        assert wait_for(lambda: leader.rejected == len(garbage) and follower.rejected == 3)
+        sender.sendto(json.dumps({'type': 'ping', 't0': 1.5}).encode(), ('127.0.0.1', port))
+        sender.settimeout(2.0)
+        pong = json.loads(sender.recv(2048))
+        assert pong['type'] == 'pong' and pong['t0'] == 1.5
+        assert wait_for(lambda: follower.offset is not None)
+        assert leader.thread.is_alive() and follower.thread.is_alive()
+    finally:
+        sender.close()
+        follower.close()
+        leader.close()
+
+
+def test_stats_report_lateness_and_clock_quality():
+    stats = SyncStats()
+    stats.add('leader', 0.001)
+    stats.add('unit', -0.002, uncertainty=0.0004, offset_spread=0.0001)
+    stats.add('unit', 0.003, uncertainty=0.0003, offset_spread=0.0002)
+
+    unit = stats.summary('unit')
+    assert unit['count'] == 2 and unit['max'] == 0.003
+    assert (unit['uncertainty'], unit['offset_spread']) == (0.0003, 0.0002)
+    assert stats.summary('leader')['uncertainty'] is None
+    assert stats.summary()['count'] == 3
+    assert 'leader clock known to' in str(stats)
+
+
+def test_the_leader_only_waits_for_followers_it_has():
+    leader = SyncLeader(0)
+    try:
+        assert leader.announce(0, 'Sunrise') is None
+        assert leader.seq == 0
+
+        now = leader.clock.now()
+        leader.followers[('127.0.0.1', 9)] = now
+        start = leader.announce(0, 'Sunrise')
+        assert start - now == pytest.approx(leader.lead, abs=0.05)
+        assert leader.seq == 1
+
+        # A follower that stopped pinging no longer holds the show back
+        leader.followers[('127.0.0.1', 9)] = now - FOLLOWER_TIMEOUT - 1
+        assert leader.announce(1, 'Ocean Wave') is None
+    finally:
+        leader.close()
+
+
+def test_a_follower_reports_the_spread_of_its_offsets():
+    follower = SyncFollower('127.0.0.1', 9, name='unit')
+    try:
+        for t0, offset in [(1.0, 0.010), (2.0, 0.013), (3.0, 0.011)]:
+            follower.handle({'type': 'pong', 't0': t0, 't1': t0 + offset + 0.001,
+                             't2': t0 + offset + 0.001}, None, t0 + 0.002)
+        assert follower.offset_spread == pytest.approx(0.003)
+        assert 'offset spread 3.000 ms' in follower.summary()
+    finally:
+        follower.close()
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from sysfs_pwm import SysfsPWM, parse_channel
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fake_channel(root, chip=0, channel=2, attributes=('period', 'duty_cycle', 'enable')):
+    """A pwmchip with one exported channel, as regular files"""
+    path = root / f'pwmchip{chip}' / f'pwm{channel}'
+    path.mkdir(parents=True)
+    (root / f'pwmchip{chip}' / 'export').write_text('')
+    for name in attributes:
+        (path / name).write_text('0')
+    return path
+
+
+def read(path, name):
+    return int((path / name).read_text())
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_writes_land_in_the_attribute_files(tmp_path):
+    path = fake_channel(tmp_path)
+    pwm = SysfsPWM(0, 2, 1000, root=str(tmp_path), truncate=True)
+    pwm.start(25)
+    assert read(path, 'period') == 1_000_000
+    assert read(path, 'duty_cycle') == 250_000
+    assert read(path, 'enable') == 1
+
+    # A shorter period keeps the duty cycle inside it at every step
+    pwm.ChangeFrequency(4000)
+    assert read(path, 'period') == 250_000
+    assert read(path, 'duty_cycle') == 62_500
+
+    writes = pwm.writes
+    pwm.ChangeDutyCycle(25)
+    assert pwm.writes == writes
+    pwm.close()
+    assert read(path, 'enable') == 0
+
+
+def test_without_truncate_writes_go_in_place_as_on_sysfs(tmp_path):
+    path = fake_channel(tmp_path)
+    pwm = SysfsPWM(0, 2, 1000, root=str(tmp_path))
+    pwm.ChangeFrequency(4000)
+    # A regular file keeps the tail of the longer value written before
+    assert (path / 'period').read_text() == '2500000'
+    pwm.close()
+
+
+def test_no_descriptors_leak_when_an_attribute_is_missing(tmp_path):
+    fake_channel(tmp_path, attributes=('period', 'duty_cycle'))
+    before = open_fds()
+    with pytest.raises(OSError):
+        SysfsPWM(0, 2, 1000, root=str(tmp_path), truncate=True)
+    assert open_fds() == before
+
+
+@pytest.mark.parametrize('spec', ['18', '18=0', '18=0:x', 'a=0:2', '18=-1:2'])
+def test_bad_mappings_are_rejected(spec):
+    with pytest.raises(ValueError):
+        parse_channel(spec)
+
+
+def test_a_bad_mapping_is_a_usage_error():
+    result = subprocess.run([sys.executable, 'color_symphony.py', '--hw-pwm', '18=0'],
+                            cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert 'expected PIN=CHIP:CHANNEL' in result.stderr
+    assert 'Traceback' not in result.stderr
@@ -0,0 +1,60 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from fonts import BOLD_FONT_PATH, FONT_PATH, load_font
+from text_cache import TextRenderer
+
+FIXED = ["Color Symphony", "Color Symphony!", "Press button", "to start", "to start...", "Next up:",
+         "Complete!", "Welcome to", "Testing", "Red", "Green", "Blue", "♪", "●", "Rainbow Wave!"]
+
+
+def show_strings(library):
+    strings = list(FIXED)
+    for index, pattern in enumerate(library.patterns):
+        strings += [pattern['name'], pattern['title'], pattern['message'],
+                    f"{index + 1}/{len(library.patterns)}"]
+        strings += [f"Note: {note}" for note in pattern['notes']]
+    strings += [name.replace('_HIGH', "'") for name in library.notes]
+    return strings
+
+
+@pytest.mark.parametrize('path, size', [(FONT_PATH, 12), (BOLD_FONT_PATH, 16), (FONT_PATH, 16)])
+def test_text_is_drawn_exactly_like_imagedraw(library, path, size):
+    font = load_font(path, size)
+    renderer = TextRenderer()
+    for text in show_strings(library):
+        for xy in [(10, 5), (0, 0), (-3, 50)]:
+            expected = Image.new('1', (128, 64))
+            ImageDraw.Draw(expected).text(xy, text, font=font, fill=1)
+            drawn = Image.new('1', (128, 64))
+            renderer.draw(drawn, xy, text, font)
+            assert drawn.tobytes() == expected.tobytes(), (text, xy)
+
+
+def test_strings_are_cached_least_recently_used_first():
+    font = load_font(FONT_PATH, 12)
+    renderer = TextRenderer(max_strings=2)
+    first = renderer.render("one", font)
+    renderer.render("two", font)
+    assert renderer.render("one", font) is first
+    assert (renderer.hits, renderer.misses) == (1, 2)
+
+    # "two" was used longest ago, so it goes to make room
+    renderer.render("three", font)
+    renderer.render("one", font)
+    renderer.render("two", font)
+    assert (renderer.hits, renderer.misses) == (2, 4)
+    assert list(text for text, _ in renderer.strings) == ["one", "two"]
+    assert renderer.stats()['strings'] == 2 and renderer.stats()['glyphs'] > 90
+
+    # The same text in another font is another string
+    renderer.render("two", load_font(BOLD_FONT_PATH, 16))
+    assert renderer.misses == 5 and len(renderer.atlases) == 2
+
+
+def test_blank_text_draws_nothing():
+    renderer = TextRenderer()
+    image = Image.new('1', (32, 16))
+    renderer.draw(image, (4, 4), "   ", load_font(FONT_PATH, 12))
+    renderer.draw(image, (4, 4), "", load_font(FONT_PATH, 12))
+    assert image.getbbox() is None
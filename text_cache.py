@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+🔠 Color Symphony Text Cache
+Rasterizes each glyph of a font once into a 1-bit atlas, builds strings
+from those glyphs and keeps the finished string bitmaps, so OLED text is
+blitted instead of going through FreeType on every frame.
+"""
+
+import math
+import string
+import threading
+from collections import OrderedDict, namedtuple
+
+from PIL import Image, ImageChops, ImageDraw
+
+# Rendered strings kept before the least recently used is dropped
+DEFAULT_MAX_STRINGS = 256
+
+# Drawn ahead of a glyph to find where it lands inside a string: the
+# tallest glyph, indented so it does not reach the left edge either
+LEAD_IN = ' \u2588'
+
+# A rasterized character. left and top place the inked bitmap against
+# the pen; box_left and box_top are where the outline box reaches left
+# and up, bitmap_left and bitmap_top the same for the rasterized bitmap.
+Glyph = namedtuple('Glyph', 'bitmap left top advance box_left box_top bitmap_left bitmap_top')
+
+
+class GlyphAtlas:
+    """1-bit bitmaps of every glyph used so far in one font and size
+
+    Strings are laid out the way Pillow's basic layout does it: the pen
+    moves in 1/64 pixels and every glyph lands on the rounded pen. The
+    string is placed by its outline box but drawn by its bitmaps, and the
+    two can differ by a pixel, which is why each glyph keeps both.
+    """
+
+    def __init__(self, font, preload=string.printable.strip()):
+        self.font = font
+        self.glyphs = {}
+        self.kerning = {}
+        self.space = font.getlength(' ', mode='1')
+        for char in preload + ' ':
+            self.glyph(char)
+
+    def glyph(self, char):
+        """Glyph of a character, rasterized once"""
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.rasterize(char)
+        return glyph
+
+    def rasterize(self, char):
+        box_left, box_top, right, bottom = self.font.getbbox(char, mode='1')
+        advance = self.font.getlength(char, mode='1')
+        lead = LEAD_IN + ' ' * (int(max(right - box_left, 1) / max(self.space, 1)) + 1)
+        lead_box = self.font.getbbox(lead + char, mode='1')
+        margin = max(right - box_left, lead_box[3] - lead_box[1], 1)
+        alone = draw_text((right + 2 * margin, bottom + 2 * margin), (margin, margin), char, self.font)
+        box = alone.getbbox()
+        if box is None:
+            return Glyph(None, 0, 0, advance, 0, box_top, 0, box_top)
+
+        # After the lead-in the glyph is clear of the string's edges, so
+        # nothing shifts it and its ink lands exactly where the pen says
+        pen = pen_pixel(self.font.getlength(lead + char, mode='1') - advance)
+        size = (pen + right + 2 * margin, lead_box[3] + 2 * margin)
+        placed = ImageChops.subtract(draw_text(size, (margin, margin), lead + char, self.font),
+                                     draw_text(size, (margin, margin), lead, self.font))
+        left, top = placed.getbbox()[0] - margin - pen, placed.getbbox()[1] - margin
+
+        # Alone, the glyph is shifted by the difference between its box
+        # and bitmap edges; the box edges are known, which gives the others
+        return Glyph(alone.crop(box), left, top, advance,
+                     min(box_left, 0), box_top,
+                     min(box_left, 0) + left - (box[0] - margin),
+                     box_top + top - (box[1] - margin))
+
+    def kern(self, left, right):
+        """Pen adjustment between two characters, measured once"""
+        pair = left + right
+        adjust = self.kerning.get(pair)
+        if adjust is None:
+            adjust = (self.font.getlength(pair, mode='1')
+                      - self.glyph(left).advance - self.glyph(right).advance)
+            self.kerning[pair] = adjust
+        return adjust
+
+
+def draw_text(size, xy, text, font):
+    image = Image.new('1', size)
+    ImageDraw.Draw(image).text(xy, text, font=font, fill=1)
+    return image
+
+
+def pen_pixel(pen):
+    """The pixel a glyph starts on, rounding halves up like FreeType"""
+    return math.floor(pen + 0.5)
+
+
+class TextRenderer:
+    """Draws text by blitting cached string bitmaps built from glyph atlases"""
+
+    def __init__(self, max_strings=DEFAULT_MAX_STRINGS):
+        self.max_strings = max_strings
+        self.atlases = {}
+        self.strings = OrderedDict()
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def atlas(self, font):
+        with self.lock:
+            atlas = self.atlases.get(font)
+            if atlas is None:
+                atlas = self.atlases[font] = GlyphAtlas(font)
+            return atlas
+
+    def compose(self, text, font):
+        """Assemble a string bitmap from atlas glyphs, as ImageDraw.text would draw it"""
+        atlas = self.atlas(font)
+        placed = []
+        pen = 0.0
+        box_left = bitmap_left = 0
+        box_top = bitmap_top = None
+        previous = None
+        for char in text:
+            glyph = atlas.glyph(char)
+            if previous is not None:
+                pen += atlas.kern(previous, char)
+            x = pen_pixel(pen)
+            if glyph.bitmap is not None:
+                placed.append((glyph.bitmap, x + glyph.left, glyph.top))
+                box_left = min(box_left, x + glyph.box_left)
+                bitmap_left = min(bitmap_left, x + glyph.bitmap_left)
+                box_top = glyph.box_top if box_top is None else min(box_top, glyph.box_top)
+                bitmap_top = glyph.bitmap_top if bitmap_top is None else min(bitmap_top, glyph.bitmap_top)
+            pen += glyph.advance
+            previous = char
+
+        if not placed:
+            return Image.new('1', (1, 1)), (0, 0)
+        x0 = min(x for _, x, _ in placed)
+        y0 = min(y for _, _, y in placed)
+        x1 = max(x + bitmap.width for bitmap, x, _ in placed)
+        y1 = max(y + bitmap.height for bitmap, _, y in placed)
+
+        image = Image.new('1', (x1 - x0, y1 - y0))
+        for bitmap, x, y in placed:
+            image.paste(1, (x - x0, y - y0), bitmap)
+        return image, (x0 + box_left - bitmap_left, y0 + box_top - bitmap_top)
+
+    def render(self, text, font):
+        """Cached (bitmap, offset) of a whole string"""
+        key = (text, font)
+        with self.lock:
+            entry = self.strings.get(key)
+            if entry is not None:
+                self.strings.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self.compose(text, font)
+            self.strings[key] = entry
+            while len(self.strings) > self.max_strings:
+                self.strings.popitem(last=False)
+            return entry
+
+    def draw(self, image, xy, text, font):
+        """Blit text onto a 1-bit image, like ImageDraw.text(xy, text, fill=1)"""
+        bitmap, (dx, dy) = self.render(text, font)
+        image.paste(1, (xy[0] + dx, xy[1] + dy), bitmap)
+
+    def stats(self):
+        return {
+            'strings': len(self.strings),
+            'glyphs': sum(len(atlas.glyphs) for atlas in self.atlases.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+        }